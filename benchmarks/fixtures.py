@@ -0,0 +1,125 @@
+from emulator.api import WorkspaceApi
+from emulator.faults import FaultInjector
+from emulator.seed import seed_store
+from emulator.store import WorkspaceStore
+from emulator.transport import EmulatorHttp
+
+
+PARAGRAPH_TEXT = (
+    "The quick brown fox jumps over the lazy dog while benchmarks keep score.\n"
+)
+FORM_QUESTIONS = [f"Question {number}" for number in range(5)]
+LIST_FILE_COUNT = 25
+
+
+def _document(document_id, paragraphs):
+    return {
+        "documents": [
+            {
+                "id": document_id,
+                "title": f"Benchmark {document_id}",
+                "text": PARAGRAPH_TEXT * paragraphs,
+            }
+        ]
+    }
+
+
+def _spreadsheet(spreadsheet_id, rows, columns):
+    return {
+        "spreadsheets": [
+            {
+                "id": spreadsheet_id,
+                "title": f"Benchmark {spreadsheet_id}",
+                "values": [
+                    [f"r{row}c{column}" for column in range(columns)]
+                    for row in range(rows)
+                ],
+            }
+        ]
+    }
+
+
+def _form(form_id, responses):
+    return {
+        "forms": [
+            {
+                "id": form_id,
+                "title": f"Benchmark {form_id}",
+                "questions": FORM_QUESTIONS,
+                "responses": responses,
+            }
+        ]
+    }
+
+
+def _listing():
+    return {
+        "documents": [{"title": f"Doc {number}"} for number in range(LIST_FILE_COUNT)],
+        "spreadsheets": [{"title": f"Sheet {number}"} for number in range(LIST_FILE_COUNT)],
+        "forms": [{"title": f"Form {number}"} for number in range(LIST_FILE_COUNT)],
+    }
+
+
+def _owned_files(count):
+    return {"documents": [{"title": f"Owned {number}"} for number in range(count)]}
+
+
+def _corpus(documents, paragraphs):
+    return {
+        "documents": [
+            {
+                "id": f"corpus-{number}",
+                "title": f"Corpus {number}",
+                "text": "".join(
+                    f"Paragraph {paragraph} of document {number} mentions term{number * paragraphs + paragraph}. "
+                    + PARAGRAPH_TEXT
+                    for paragraph in range(paragraphs)
+                ),
+            }
+            for number in range(documents)
+        ]
+    }
+
+
+def _folder_tree(folders, files_per_folder):
+    folder_ids = ["tree-root"] + [f"tree-folder-{number}" for number in range(folders)]
+    return {
+        "folders": [{"id": "tree-root", "name": "Project"}]
+        + [
+            {
+                "id": folder_id,
+                "name": f"Folder {number}",
+                # Every folder sits one level below an earlier one.
+                "parent": folder_ids[number // 3],
+            }
+            for number, folder_id in enumerate(folder_ids[1:])
+        ],
+        "documents": [
+            {"title": f"Doc {folder_id} {number}", "parent": folder_id}
+            for folder_id in folder_ids
+            for number in range(files_per_folder)
+        ],
+    }
+
+
+DATASETS = {
+    "doc-small": lambda: _document("doc-small", 3),
+    # Roughly 40 paragraphs of ~80 characters per rendered page.
+    "doc-500-pages": lambda: _document("doc-500-pages", 20000),
+    "sheet-small": lambda: _spreadsheet("sheet-small", 5, 3),
+    "sheet-10k-rows": lambda: _spreadsheet("sheet-10k-rows", 10000, 10),
+    "sheet-1m-cells": lambda: _spreadsheet("sheet-1m-cells", 20000, 50),
+    "form-small": lambda: _form("form-small", 5),
+    "form-50k-responses": lambda: _form("form-50k-responses", 50000),
+    "listing": _listing,
+    "owned-files": lambda: _owned_files(1000),
+    "docs-corpus": lambda: _corpus(200, 200),
+    "folder-tree": lambda: _folder_tree(20, 15),
+}
+
+
+def create_emulator_http(dataset_names, page_size=None):
+    store = WorkspaceStore()
+    for name in dataset_names:
+        seed_store(store, DATASETS[name]())
+    return EmulatorHttp(WorkspaceApi(store, page_size=page_size), FaultInjector())
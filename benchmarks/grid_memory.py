@@ -0,0 +1,85 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from services.grid import Grid
+
+
+def _text_rows(rows, columns):
+    return [[f"r{row}c{column}" for column in range(columns)] for row in range(rows)]
+
+
+def _number_rows(rows, columns):
+    return [
+        [row * columns + column if column % 2 else (row + column) / 4 for column in range(columns)]
+        for row in range(rows)
+    ]
+
+
+def _table_rows(rows, columns):
+    # A header row over numbers, as most exported tables look.
+    return [[f"column {column}" for column in range(columns)]] + _number_rows(rows - 1, columns)
+
+
+SHAPES = {
+    "text": _text_rows,
+    "numbers": _number_rows,
+    "table": _table_rows,
+}
+
+
+def _measure(build):
+    # Tracing slows allocation down, so time and memory come from separate runs.
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    value = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, retained, peak, elapsed
+
+
+def compare(shape, rows, columns):
+    """Parses the same JSON into a list of lists and into a Grid."""
+    text = json.dumps(SHAPES[shape](rows, columns))
+    results = {}
+    for name, build in (
+        ("list-of-lists", lambda: json.loads(text)),
+        ("grid", lambda: Grid.from_json(text)),
+    ):
+        value, retained, peak, elapsed = _measure(build)
+        results[name] = {"retained_mb": retained / 1e6, "peak_mb": peak / 1e6, "parse_s": elapsed}
+        del value
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare the memory of sheet values held as lists and as a Grid."
+    )
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=50)
+    parser.add_argument("shapes", nargs="*", help=f"Any of {', '.join(SHAPES)} (default: all).")
+    args = parser.parse_args(argv)
+    unknown = [shape for shape in args.shapes if shape not in SHAPES]
+    if unknown:
+        parser.error(f"unknown shape(s): {', '.join(unknown)}")
+
+    print(f"{args.rows} rows x {args.columns} columns")
+    for shape in args.shapes or list(SHAPES):
+        results = compare(shape, args.rows, args.columns)
+        for name, result in results.items():
+            print(
+                f"{shape:8} {name:14} retained {result['retained_mb']:7.1f}MB  "
+                f"peak {result['peak_mb']:7.1f}MB  parse {result['parse_s']:.3f}s"
+            )
+        saving = results["list-of-lists"]["retained_mb"] / max(results["grid"]["retained_mb"], 1e-6)
+        print(f"{shape:8} grid holds the values in {saving:.1f}x less memory")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+BASELINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Wall time is noisy across machines, so it gets a generous ratio plus a fixed
+# allowance; request counts are deterministic and must never grow.
+TIME_TOLERANCE = 1.5
+TIME_SLACK_SECONDS = 0.25
+RSS_TOLERANCE = 1.25
+RSS_SLACK_MB = 16.0
+
+SHEET_10K_RANGE = "Sheet1!A1:J10000"
+SHEET_1M_RANGE = "Sheet1!A1:AX20000"
+
+
+def _csv_lines(rows, columns):
+    return "".join(
+        ",".join(f"r{row}c{column}" for column in range(columns)) + "\n"
+        for row in range(rows)
+    )
+
+
+def _edited_500_pages():
+    from benchmarks.fixtures import PARAGRAPH_TEXT
+
+    lines = [PARAGRAPH_TEXT] * 20000
+    lines[10000] = "One paragraph in the middle was rewritten.\n"
+    return "".join(lines)
+
+
+def _document_ops():
+    operations = [{"op": "heading", "text": "Benchmark summary", "at": "start"}]
+    operations += [
+        {"op": "insert", "text": f" [{number}]", "at": 1 + number * 7300}
+        for number in range(200)
+    ]
+    operations += [
+        {"op": "replace", "find": "lazy dog", "text": "sleepy dog", "all": False},
+        {"op": "append", "text": "Appendix"},
+    ]
+    return "".join(json.dumps(operation) + "\n" for operation in operations)
+
+
+def _workbook_spec():
+    tabs = [
+        {
+            "title": f"Tab {tab}",
+            "frozenRows": 1,
+            "headerFormat": {"textFormat": {"bold": True}},
+            "autoResizeColumns": True,
+            "data": [[f"r{row}c{column}" for column in range(10)] for row in range(1000)],
+        }
+        for tab in range(10)
+    ]
+    return json.dumps({"title": "Workbook", "sheets": tabs})
+
+
+def _json_grid(rows, columns):
+    # Built row by row, so the harness's own copy of the values does not
+    # show up in the peak RSS of the command under test.
+    return "[" + ", ".join(
+        json.dumps([f"r{row}c{column}" for column in range(columns)]) for row in range(rows)
+    ) + "]"
+
+
+CASES = {
+    "auth-logout": {"args": ["auth", "logout"]},
+    "docs-create": {"args": ["docs", "create", "Benchmark"]},
+    "docs-list": {"args": ["docs", "list"], "datasets": ["listing"]},
+    "docs-get-small": {"args": ["docs", "get", "doc-small"], "datasets": ["doc-small"]},
+    "docs-get-500-pages": {
+        "args": ["docs", "get", "doc-500-pages"],
+        "datasets": ["doc-500-pages"],
+    },
+    "docs-get-500-pages-markdown": {
+        "args": ["docs", "get", "doc-500-pages", "--format", "markdown"],
+        "datasets": ["doc-500-pages"],
+    },
+    "docs-get-500-pages-stream": {
+        "args": ["docs", "get", "doc-500-pages", "--stream"],
+        "datasets": ["doc-500-pages"],
+    },
+    "docs-get-500-pages-stream-markdown": {
+        "args": ["docs", "get", "doc-500-pages", "--stream", "--format", "markdown"],
+        "datasets": ["doc-500-pages"],
+    },
+    "docs-delete": {"args": ["docs", "delete", "doc-small", "--yes"], "datasets": ["doc-small"]},
+    "docs-copy": {"args": ["docs", "copy", "doc-small", "Copy"], "datasets": ["doc-small"]},
+    "docs-apply-200-ops-500-pages": {
+        "args": ["docs", "apply", "doc-500-pages", "-"],
+        "datasets": ["doc-500-pages"],
+        "stdin": _document_ops,
+    },
+    "docs-merge-50-rows": {
+        "args": ["docs", "merge", "doc-small"],
+        "datasets": ["doc-small"],
+        "csv_file": (51, 3),
+    },
+    "docs-grep-200-docs": {
+        "args": ["docs", "grep", "term12345"],
+        "datasets": ["docs-corpus"],
+    },
+    "docs-share": {
+        "args": ["docs", "share", "doc-small", "--email", "a@example.com", "--role", "reader"],
+        "datasets": ["doc-small"],
+    },
+    "docs-edit-append-500-pages": {
+        "args": ["docs", "edit", "doc-500-pages", "--append", "tail"],
+        "datasets": ["doc-500-pages"],
+    },
+    "docs-edit-set-small": {
+        "args": ["docs", "edit", "doc-small", "--set", "hello"],
+        "datasets": ["doc-small"],
+    },
+    "docs-edit-set-500-pages": {
+        "args": ["docs", "edit", "doc-500-pages", "--set", "hello"],
+        "datasets": ["doc-500-pages"],
+    },
+    "docs-edit-set-file-500-pages-one-paragraph": {
+        "args": ["docs", "edit", "doc-500-pages", "--set-file", "-"],
+        "datasets": ["doc-500-pages"],
+        "stdin": _edited_500_pages,
+    },
+    "sheets-create": {"args": ["sheets", "create", "Benchmark"]},
+    "sheets-create-spec-10-tabs": {
+        "args": ["sheets", "create", "--spec", "-"],
+        "stdin": _workbook_spec,
+    },
+    "sheets-list": {"args": ["sheets", "list"], "datasets": ["listing"]},
+    "sheets-read-small": {
+        "args": ["sheets", "read", "sheet-small", "Sheet1!A1:C5"],
+        "datasets": ["sheet-small"],
+    },
+    "sheets-read-10k-rows": {
+        "args": ["sheets", "read", "sheet-10k-rows", SHEET_10K_RANGE],
+        "datasets": ["sheet-10k-rows"],
+    },
+    "sheets-read-1m-cells": {
+        "args": ["sheets", "read", "sheet-1m-cells", SHEET_1M_RANGE],
+        "datasets": ["sheet-1m-cells"],
+    },
+    "sheets-read-1m-cells-ndjson": {
+        "args": ["--output", "ndjson", "sheets", "read", "sheet-1m-cells", SHEET_1M_RANGE],
+        "datasets": ["sheet-1m-cells"],
+    },
+    "sheets-query-1m-cells": {
+        "args": ["sheets", "query", "sheet-1m-cells", "SELECT r0c1, COUNT(*) FROM sheet GROUP BY r0c1 LIMIT 5"],
+        "datasets": ["sheet-1m-cells"],
+    },
+    "sheets-write-small": {
+        "args": ["sheets", "write", "sheet-small", "Sheet1!A1:C2", "1,2,3;4,5,6"],
+        "datasets": ["sheet-small"],
+    },
+    "sheets-write-10k-rows": {
+        "args": ["sheets", "write", "sheet-small", SHEET_10K_RANGE],
+        "datasets": ["sheet-small"],
+        "data": (10000, 10),
+    },
+    "sheets-write-1m-cells": {
+        "args": ["sheets", "write", "sheet-small", SHEET_1M_RANGE],
+        "datasets": ["sheet-small"],
+        "data": (20000, 50),
+    },
+    "sheets-write-1m-cells-csv-file": {
+        "args": ["sheets", "write", "sheet-small", SHEET_1M_RANGE, "--file"],
+        "datasets": ["sheet-small"],
+        "csv_file": (20000, 50),
+    },
+    "sheets-write-1m-cells-only-changed": {
+        "args": ["sheets", "write", "sheet-1m-cells", "Sheet1!A1", "--only-changed"],
+        "datasets": ["sheet-1m-cells"],
+        "data": (20000, 50),
+    },
+    "sheets-append-follow-10k-rows": {
+        "args": ["sheets", "append", "sheet-small", "Sheet1", "--follow", "-"],
+        "datasets": ["sheet-small"],
+        "input": (10000, 10),
+    },
+    "sheets-clear": {
+        "args": ["sheets", "clear", "sheet-small", "Sheet1!A1:C5", "--yes"],
+        "datasets": ["sheet-small"],
+    },
+    "forms-create": {"args": ["forms", "create", "Benchmark"]},
+    "forms-list": {"args": ["forms", "list"], "datasets": ["listing"]},
+    "forms-add-question": {
+        "args": ["forms", "add-question", "form-small", "--type", "choice",
+                 "--title", "Rate us", "--options", "Good,Bad"],
+        "datasets": ["form-small"],
+    },
+    "forms-get-responses-small": {
+        "args": ["forms", "get-responses", "form-small"],
+        "datasets": ["form-small"],
+    },
+    "forms-get-responses-50k": {
+        "args": ["forms", "get-responses", "form-50k-responses"],
+        "datasets": ["form-50k-responses"],
+    },
+    "forms-get-responses-50k-ndjson": {
+        "args": ["--output", "ndjson", "forms", "get-responses", "form-50k-responses"],
+        "datasets": ["form-50k-responses"],
+    },
+    "forms-sync-to-sheet-50k": {
+        "args": ["forms", "sync-to-sheet", "form-50k-responses", "sheet-small"],
+        "datasets": ["form-50k-responses", "sheet-small"],
+    },
+    # Two pool accounts: every page of one listing must come from the
+    # account that received its page token, or the emulator answers 400.
+    "forms-get-responses-50k-pool": {
+        "args": ["--pool", "--output", "ndjson", "forms", "get-responses", "form-50k-responses"],
+        "datasets": ["form-50k-responses"],
+        "pool": ["a", "b"],
+    },
+    "docs-list-pool": {
+        "args": ["--pool", "docs", "list"],
+        "datasets": ["listing"],
+        "pool": ["a", "b"],
+        "page_size": 10,
+    },
+    "drive-copy-tree-315-docs": {
+        "args": ["drive", "copy-tree", "tree-root", "Copy", "--mapping", "-"],
+        "datasets": ["folder-tree"],
+    },
+    "drive-permissions-report-1k-files": {
+        "args": ["drive", "permissions-report"],
+        "datasets": ["owned-files"],
+    },
+    "watch-once": {"args": ["watch", "--once"], "datasets": ["listing"]},
+}
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def run_case(name):
+    from google.oauth2.credentials import Credentials
+    import googleapiclient.http
+
+    import gsuite_cli
+    import requests
+
+    from benchmarks.fixtures import create_emulator_http
+    from emulator.transport import EmulatorAdapter
+
+    case = CASES[name]
+    emulator_http = create_emulator_http(case.get("datasets", []), case.get("page_size"))
+    emulator_adapter = EmulatorAdapter(emulator_http)
+    googleapiclient.http.build_http = lambda: emulator_http
+    requests.Session.get_adapter = lambda session, url: emulator_adapter
+    # Every profile gets its own token, so the emulator can tell accounts apart.
+    gsuite_cli.get_credentials = lambda profile=None: Credentials(token=f"benchmark-{profile}")
+
+    if "pool" in case:
+        from services.config import CONFIG_FILE
+
+        os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
+        with open(CONFIG_FILE, "w", encoding="utf-8") as config_file:
+            json.dump(
+                {"pool": {"profiles": case["pool"], "requests_per_minute": 100000}},
+                config_file,
+            )
+
+    args = list(case["args"])
+    if "data" in case:
+        args.append(_json_grid(*case["data"]))
+
+    if "csv_file" in case:
+        # HOME is already a throwaway directory for this process.
+        csv_path = os.path.join(os.path.expanduser("~"), "data.csv")
+        with open(csv_path, "w", encoding="utf-8") as csv_file:
+            csv_file.write(_csv_lines(*case["csv_file"]))
+        args.append(csv_path)
+
+    stdin = _csv_lines(*case["input"]) if "input" in case else None
+    if "stdin" in case:
+        stdin = case["stdin"]()
+
+    # Output goes to a file rather than CliRunner's in-memory buffers, which
+    # would hold every line a streaming command writes and count it as its RSS.
+    home_dir = os.path.expanduser("~")
+    output_path = os.path.join(home_dir, "output.txt")
+    stdin_path = os.path.join(home_dir, "stdin.txt")
+    with open(stdin_path, "w", encoding="utf-8") as stdin_file:
+        stdin_file.write(stdin or "")
+
+    saved_streams = sys.stdin, sys.stdout, sys.stderr
+    exception = None
+    exit_code = 0
+    with open(stdin_path, "r", encoding="utf-8") as stdin_file, open(
+        output_path, "w", encoding="utf-8"
+    ) as output_file:
+        sys.stdin, sys.stdout, sys.stderr = stdin_file, output_file, output_file
+        started = time.perf_counter()
+        try:
+            gsuite_cli.gsuite.main(args=args, prog_name="gsuite")
+        except SystemExit as exit_error:
+            exit_code = exit_error.code if isinstance(exit_error.code, int) else 1
+        except Exception as invoke_error:
+            exception = invoke_error
+        finally:
+            wall_time = time.perf_counter() - started
+            sys.stdin, sys.stdout, sys.stderr = saved_streams
+
+    last_line = ""
+    reported_error = False
+    with open(output_path, "r", encoding="utf-8") as output_file:
+        for line in output_file:
+            last_line = line.strip() or last_line
+            reported_error = reported_error or "Error [" in line
+
+    error = None
+    if exception is not None:
+        error = repr(exception)
+    elif exit_code != 0 or reported_error:
+        error = last_line or "failed"
+
+    return {
+        "wall_time_s": round(wall_time, 4),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "request_count": emulator_http.request_count,
+        "error": error,
+    }
+
+
+def _run_case_isolated(name):
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as home_dir:
+        # A throwaway HOME keeps user config and credentials out of the run.
+        env = dict(os.environ, HOME=home_dir)
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run_benchmarks", "--run-case", name],
+            cwd=repo_root,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip() or "benchmark process failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _load_baselines():
+    if not os.path.exists(BASELINES_FILE):
+        return {}
+    with open(BASELINES_FILE, "r", encoding="utf-8") as baselines_file:
+        return json.load(baselines_file)
+
+
+def _save_baselines(baselines):
+    with open(BASELINES_FILE, "w", encoding="utf-8") as baselines_file:
+        json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+        baselines_file.write("\n")
+
+
+def compare_to_baseline(result, baseline):
+    regressions = []
+    time_limit = baseline["wall_time_s"] * TIME_TOLERANCE + TIME_SLACK_SECONDS
+    if result["wall_time_s"] > time_limit:
+        regressions.append(
+            f"wall time {result['wall_time_s']}s > {time_limit:.3f}s"
+        )
+    rss_limit = baseline["peak_rss_mb"] * RSS_TOLERANCE + RSS_SLACK_MB
+    if result["peak_rss_mb"] > rss_limit:
+        regressions.append(f"peak RSS {result['peak_rss_mb']}MB > {rss_limit:.1f}MB")
+    if result["request_count"] > baseline["request_count"]:
+        regressions.append(
+            f"requests {result['request_count']} > {baseline['request_count']}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark gsuite CLI commands.")
+    parser.add_argument("cases", nargs="*", help="Case names to run (default: all).")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; best time wins.")
+    parser.add_argument("--update", action="store_true", help="Rewrite baselines.json.")
+    parser.add_argument("--list", action="store_true", help="List case names and exit.")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case)))
+        return 0
+
+    if args.list:
+        for name in CASES:
+            print(name)
+        return 0
+
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    baselines = _load_baselines()
+    failures = 0
+    for name in args.cases or list(CASES):
+        runs = [_run_case_isolated(name) for _ in range(max(1, args.repeat))]
+        errors = [run["error"] for run in runs if run.get("error")]
+        if errors:
+            failures += 1
+            print(f"FAIL {name}: {errors[0]}")
+            continue
+
+        result = min(runs, key=lambda run: run["wall_time_s"])
+        result.pop("error", None)
+        summary = (
+            f"{result['wall_time_s']:.3f}s  {result['peak_rss_mb']:.1f}MB  "
+            f"{result['request_count']} req"
+        )
+
+        if args.update:
+            baselines[name] = result
+            print(f"SAVE {name}: {summary}")
+            continue
+
+        if name not in baselines:
+            print(f"NEW  {name}: {summary} (no baseline, run with --update)")
+            continue
+
+        regressions = compare_to_baseline(result, baselines[name])
+        if regressions:
+            failures += 1
+            print(f"FAIL {name}: {summary} ({'; '.join(regressions)})")
+        else:
+            print(f"OK   {name}: {summary}")
+
+    if args.update:
+        _save_baselines(baselines)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import argparse
+import json
+
+from emulator.api import WorkspaceApi
+from emulator.faults import FaultInjector
+from emulator.seed import seed_store
+from emulator.server import create_server
+from emulator.store import WorkspaceStore
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m emulator",
+        description="Local Google Workspace emulator for load testing the gsuite CLI.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Fixed latency added to every request.")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra latency, up to this value.")
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=None,
+        help="Requests allowed per minute before answering 429.",
+    )
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probability of a random 429.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a random 503.")
+    parser.add_argument("--page-size", type=int, default=None, help="Maximum items per listing page.")
+    parser.add_argument("--seed-file", help="JSON file with documents, spreadsheets and forms to preload.")
+    parser.add_argument("--random-seed", type=int, default=None, help="Seed for fault injection.")
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args(argv)
+
+    store = WorkspaceStore()
+    if args.seed_file:
+        with open(args.seed_file, "r", encoding="utf-8") as seed_file:
+            seed_store(store, json.load(seed_file))
+
+    faults = FaultInjector(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit_per_minute=args.rate_limit,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        seed=args.random_seed,
+    )
+    server = create_server(
+        WorkspaceApi(store, page_size=args.page_size),
+        faults,
+        host=args.host,
+        port=args.port,
+        verbose=args.verbose,
+    )
+
+    url = f"http://{args.host}:{server.server_address[1]}"
+    print(f"Emulator listening on {url}")
+    print(f"Point the CLI at it with: export GSUITE_CLI_EMULATOR_URL={url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
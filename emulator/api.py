@@ -0,0 +1,888 @@
+import copy
+import re
+
+from emulator.store import (
+    DOCUMENT_MIME_TYPE,
+    FORM_MIME_TYPE,
+    SPREADSHEET_MIME_TYPE,
+    ApiError,
+    format_a1,
+    parse_a1,
+)
+
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def _first(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def _page(items, query, default_size, max_page_size):
+    requested = int(_first(query, "pageSize", default_size))
+    size = max(1, min(requested, max_page_size or requested))
+    offset = int(_first(query, "pageToken", "0") or 0)
+    page = items[offset:offset + size]
+    next_token = str(offset + size) if offset + size < len(items) else None
+    return page, next_token
+
+
+# Partial responses
+
+
+def parse_field_mask(fields):
+    """Parses a ``fields`` selector such as ``files(id,name),nextPageToken``.
+
+    Returns a dict mapping each selected key to its sub-mask, or ``None`` when
+    the whole value is selected. ``a/b`` and ``a.b`` are shorthand for ``a(b)``.
+    """
+    mask = {}
+    position = 0
+    while position < len(fields):
+        end = position
+        depth = 0
+        while end < len(fields) and (depth or fields[end] != ","):
+            depth += {"(": 1, ")": -1}.get(fields[end], 0)
+            end += 1
+        item = fields[position:end].strip()
+        position = end + 1
+        if not item:
+            continue
+
+        name, _, nested = item.partition("(")
+        if nested:
+            nested = nested[:-1] if nested.endswith(")") else nested
+        separator = re.search(r"[/.]", name)
+        if separator:
+            name, rest = name[:separator.start()], name[separator.end():]
+            nested = f"{rest}({nested})" if nested else rest
+        name = name.strip()
+        submask = parse_field_mask(nested) if nested else None
+        if name in mask and mask[name] is not None and submask is not None:
+            mask[name].update(submask)
+        else:
+            mask[name] = None if name in mask and mask[name] is None else submask
+    return mask
+
+
+def apply_field_mask(value, mask):
+    if mask is None or "*" in mask:
+        return value
+    if isinstance(value, list):
+        return [apply_field_mask(item, mask) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {
+        key: apply_field_mask(value[key], submask)
+        for key, submask in mask.items()
+        if key in value
+    }
+
+
+# Docs
+
+
+def render_document(document):
+    content = [{"endIndex": 1, "sectionBreak": {"sectionStyle": {}}}]
+    index = 1
+    for line in document["text"].splitlines(keepends=True):
+        end_index = index + len(line)
+        content.append(
+            {
+                "startIndex": index,
+                "endIndex": end_index,
+                "paragraph": {
+                    "elements": [
+                        {
+                            "startIndex": index,
+                            "endIndex": end_index,
+                            "textRun": {"content": line, "textStyle": {}},
+                        }
+                    ],
+                    "paragraphStyle": {"namedStyleType": "NORMAL_TEXT"},
+                },
+            }
+        )
+        index = end_index
+    return {
+        "documentId": document["documentId"],
+        "title": document["title"],
+        "revisionId": f"rev{document['revision']:08d}",
+        "body": {"content": content},
+    }
+
+
+def _apply_document_request(document, request):
+    text = document["text"]
+    if "insertText" in request:
+        insert = request["insertText"]
+        if "endOfSegmentLocation" in insert:
+            index = len(text)
+        else:
+            index = insert.get("location", {}).get("index", 1)
+        if index < 1 or index > len(text):
+            raise ApiError(400, f"Index {index} must be within the body range.")
+        document["text"] = text[:index - 1] + insert.get("text", "") + text[index - 1:]
+        return {}
+
+    if "deleteContentRange" in request:
+        content_range = request["deleteContentRange"].get("range", {})
+        start = content_range.get("startIndex", 1)
+        end = content_range.get("endIndex", start)
+        if start < 1 or end <= start or end > len(text):
+            raise ApiError(
+                400,
+                f"Invalid deletion range {start}-{end}; the final newline cannot be deleted.",
+            )
+        document["text"] = text[:start - 1] + text[end - 1:]
+        return {}
+
+    if "replaceAllText" in request:
+        replace = request["replaceAllText"]
+        contains = replace.get("containsText", {})
+        needle = contains.get("text", "")
+        if not needle:
+            raise ApiError(400, "replaceAllText requires containsText.text.")
+        flags = 0 if contains.get("matchCase") else re.IGNORECASE
+        pattern = re.compile(re.escape(needle), flags)
+        replacement = replace.get("replaceText", "")
+        document["text"], count = pattern.subn(lambda _: replacement, text)
+        return {"replaceAllText": {"occurrencesChanged": count}}
+
+    # Styling requests only change presentation, which the emulator does not model.
+    return {}
+
+
+def _documents_create(api, match, query, body):
+    document = api.store.create_document(body.get("title", "Untitled document"))
+    return 200, render_document(document)
+
+
+def _documents_get(api, match, query, body):
+    document = api.store.documents.get(match.group(1))
+    if document is None:
+        raise ApiError(404, "Requested entity was not found.")
+    return 200, render_document(document)
+
+
+def _documents_batch_update(api, match, query, body):
+    document_id = match.group(1)
+    with api.store.lock:
+        document = api.store.documents.get(document_id)
+        if document is None:
+            raise ApiError(404, "Requested entity was not found.")
+
+        current_revision = render_document(document)["revisionId"]
+        required_revision = body.get("writeControl", {}).get("requiredRevisionId")
+        if required_revision and required_revision != current_revision:
+            raise ApiError(
+                400,
+                f"The required revision ID '{required_revision}' does not match "
+                f"the latest revision '{current_revision}'.",
+            )
+
+        working = copy.deepcopy(document)
+        replies = [
+            _apply_document_request(working, request)
+            for request in body.get("requests", [])
+        ]
+        if working["text"] != document["text"]:
+            working["revision"] += 1
+        document.update(working)
+        api.store.touch(document_id)
+
+        return 200, {
+            "documentId": document_id,
+            "replies": replies,
+            "writeControl": {"requiredRevisionId": render_document(document)["revisionId"]},
+        }
+
+
+# Sheets
+
+
+def _spreadsheet(api, spreadsheet_id):
+    spreadsheet = api.store.spreadsheets.get(spreadsheet_id)
+    if spreadsheet is None:
+        raise ApiError(404, "Requested entity was not found.")
+    return spreadsheet
+
+
+def _resolve_sheet(spreadsheet, title):
+    if title is None:
+        return spreadsheet["sheets"][0]
+    for sheet in spreadsheet["sheets"]:
+        if sheet["properties"]["title"] == title:
+            return sheet
+    raise ApiError(400, f"Unable to parse range: {title}")
+
+
+def _locate(spreadsheet, cell_range):
+    bare_title = cell_range.strip("'").replace("''", "'")
+    for sheet in spreadsheet["sheets"]:
+        if sheet["properties"]["title"] == bare_title:
+            return sheet, None, None, None, None
+    title, start_row, start_col, end_row, end_col = parse_a1(cell_range)
+    return _resolve_sheet(spreadsheet, title), start_row, start_col, end_row, end_col
+
+
+def _format_cell(value):
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _coerce_input(value, value_input_option):
+    if value_input_option != "USER_ENTERED" or not isinstance(value, str):
+        return value
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() and "." not in value else number
+
+
+def _read_range(spreadsheet, cell_range, major_dimension="ROWS", value_render_option="FORMATTED_VALUE"):
+    sheet, start_row, start_col, end_row, end_col = _locate(spreadsheet, cell_range)
+    grid = sheet["values"]
+    start_row = start_row or 0
+    start_col = start_col or 0
+    last_row = len(grid) - 1 if end_row is None else min(end_row, len(grid) - 1)
+
+    values = []
+    for row in grid[start_row:last_row + 1]:
+        stop = len(row) if end_col is None else end_col + 1
+        cells = row[start_col:stop]
+        if value_render_option == "FORMATTED_VALUE":
+            cells = [_format_cell(cell) for cell in cells]
+        else:
+            # Stored values keep their types; the emulator has no formulas.
+            cells = list(cells)
+        while cells and cells[-1] == "":
+            cells.pop()
+        values.append(cells)
+    while values and not values[-1]:
+        values.pop()
+
+    if major_dimension == "COLUMNS":
+        width = max((len(row) for row in values), default=0)
+        values = [
+            [row[column] if column < len(row) else "" for row in values]
+            for column in range(width)
+        ]
+
+    width = max((len(row) for row in values), default=1)
+    resolved_end_row = end_row if end_row is not None else start_row + max(len(values), 1) - 1
+    resolved_end_col = end_col if end_col is not None else start_col + width - 1
+    result = {
+        "range": format_a1(
+            sheet["properties"]["title"],
+            start_row,
+            start_col,
+            resolved_end_row,
+            resolved_end_col,
+        ),
+        "majorDimension": major_dimension,
+    }
+    if values:
+        result["values"] = values
+    return result
+
+
+def _write_range(spreadsheet, cell_range, values, major_dimension, value_input_option, start_row=None):
+    sheet, range_row, start_col, _, _ = _locate(spreadsheet, cell_range)
+    if start_row is None:
+        start_row = range_row or 0
+    start_col = start_col or 0
+
+    if major_dimension == "COLUMNS":
+        height = max((len(column) for column in values), default=0)
+        values = [
+            [column[row] if row < len(column) else None for column in values]
+            for row in range(height)
+        ]
+
+    grid = sheet["values"]
+    for row_offset, row_values in enumerate(values):
+        row_index = start_row + row_offset
+        while len(grid) <= row_index:
+            grid.append([])
+        row = grid[row_index]
+        for column_offset, value in enumerate(row_values):
+            if value is None:
+                continue
+            column = start_col + column_offset
+            while len(row) <= column:
+                row.append("")
+            row[column] = _coerce_input(value, value_input_option)
+
+    rows = len(values)
+    columns = max((len(row) for row in values), default=0)
+    return {
+        "spreadsheetId": spreadsheet["spreadsheetId"],
+        "updatedRange": format_a1(
+            sheet["properties"]["title"],
+            start_row,
+            start_col,
+            start_row + max(rows, 1) - 1,
+            start_col + max(columns, 1) - 1,
+        ),
+        "updatedRows": rows,
+        "updatedColumns": columns,
+        "updatedCells": sum(len(row) for row in values),
+    }
+
+
+def _clear_range(spreadsheet, cell_range):
+    sheet, start_row, start_col, end_row, end_col = _locate(spreadsheet, cell_range)
+    start_row = start_row or 0
+    start_col = start_col or 0
+    grid = sheet["values"]
+    last_row = len(grid) - 1 if end_row is None else min(end_row, len(grid) - 1)
+    for row in grid[start_row:last_row + 1]:
+        stop = len(row) if end_col is None else min(end_col + 1, len(row))
+        for column in range(start_col, stop):
+            row[column] = ""
+    return _read_range(spreadsheet, cell_range)["range"]
+
+
+def _cell_from_extended_value(cell):
+    value = cell.get("userEnteredValue", {})
+    for key in ("stringValue", "numberValue", "boolValue", "formulaValue"):
+        if key in value:
+            return value[key]
+    return ""
+
+
+def _spreadsheet_resource(spreadsheet):
+    spreadsheet_id = spreadsheet["spreadsheetId"]
+    for sheet in spreadsheet["sheets"]:
+        # Real grids grow as values are written past their bounds.
+        grid = sheet["properties"].setdefault("gridProperties", {})
+        grid["rowCount"] = max(grid.get("rowCount", 0), len(sheet["values"]))
+        grid["columnCount"] = max(
+            grid.get("columnCount", 0),
+            max((len(row) for row in sheet["values"]), default=0),
+        )
+    return {
+        "spreadsheetId": spreadsheet_id,
+        "properties": copy.deepcopy(spreadsheet["properties"]),
+        "sheets": [
+            {"properties": copy.deepcopy(sheet["properties"])}
+            for sheet in spreadsheet["sheets"]
+        ],
+        "spreadsheetUrl": f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}/edit",
+    }
+
+
+def _spreadsheets_create(api, match, query, body):
+    with api.store.lock:
+        sheet_specs = body.get("sheets") or [{"properties": {"title": "Sheet1"}}]
+        spreadsheet = api.store.create_spreadsheet(
+            body.get("properties", {}).get("title", "Untitled spreadsheet"),
+            sheet_titles=[],
+        )
+        for number, spec in enumerate(sheet_specs):
+            properties = dict(spec.get("properties", {}))
+            properties.setdefault("title", f"Sheet{number + 1}")
+            sheet = api.store.add_sheet(spreadsheet, properties["title"], properties)
+            for grid_data in spec.get("data", []):
+                rows = [
+                    [_cell_from_extended_value(cell) for cell in row.get("values", [])]
+                    for row in grid_data.get("rowData", [])
+                ]
+                _write_range(
+                    spreadsheet,
+                    format_a1(sheet["properties"]["title"], 0, grid_data.get("startColumn", 0), 0, 0),
+                    rows,
+                    "ROWS",
+                    "RAW",
+                    start_row=grid_data.get("startRow", 0),
+                )
+        return 200, _spreadsheet_resource(spreadsheet)
+
+
+def _spreadsheets_get(api, match, query, body):
+    return 200, _spreadsheet_resource(_spreadsheet(api, match.group(1)))
+
+
+def _spreadsheets_batch_update(api, match, query, body):
+    with api.store.lock:
+        spreadsheet = _spreadsheet(api, match.group(1))
+        replies = []
+        for request in body.get("requests", []):
+            if "addSheet" in request:
+                properties = dict(request["addSheet"].get("properties", {}))
+                title = properties.pop("title", f"Sheet{len(spreadsheet['sheets']) + 1}")
+                sheet = api.store.add_sheet(spreadsheet, title, properties)
+                replies.append({"addSheet": {"properties": copy.deepcopy(sheet["properties"])}})
+            elif "updateSheetProperties" in request:
+                properties = request["updateSheetProperties"].get("properties", {})
+                for sheet in spreadsheet["sheets"]:
+                    if sheet["properties"]["sheetId"] == properties.get("sheetId"):
+                        sheet["properties"].update(properties)
+                replies.append({})
+            elif "deleteSheet" in request:
+                sheet_id = request["deleteSheet"].get("sheetId")
+                spreadsheet["sheets"] = [
+                    sheet for sheet in spreadsheet["sheets"]
+                    if sheet["properties"]["sheetId"] != sheet_id
+                ]
+                replies.append({})
+            else:
+                replies.append({})
+        api.store.touch(spreadsheet["spreadsheetId"])
+        return 200, {"spreadsheetId": spreadsheet["spreadsheetId"], "replies": replies}
+
+
+def _values_get(api, match, query, body):
+    with api.store.lock:
+        spreadsheet = _spreadsheet(api, match.group(1))
+        return 200, _read_range(
+            spreadsheet,
+            match.group(2),
+            _first(query, "majorDimension", "ROWS"),
+            _first(query, "valueRenderOption", "FORMATTED_VALUE"),
+        )
+
+
+def _values_update(api, match, query, body):
+    with api.store.lock:
+        spreadsheet = _spreadsheet(api, match.group(1))
+        result = _write_range(
+            spreadsheet,
+            match.group(2),
+            body.get("values", []),
+            body.get("majorDimension", "ROWS"),
+            _first(query, "valueInputOption", "RAW"),
+        )
+        api.store.touch(spreadsheet["spreadsheetId"])
+        return 200, result
+
+
+def _values_append(api, match, query, body):
+    with api.store.lock:
+        spreadsheet = _spreadsheet(api, match.group(1))
+        sheet, start_row, _, _, _ = _locate(spreadsheet, match.group(2))
+        grid = sheet["values"]
+        next_row = len(grid)
+        while next_row > 0 and not any(cell != "" for cell in grid[next_row - 1]):
+            next_row -= 1
+        next_row = max(next_row, start_row or 0)
+
+        updates = _write_range(
+            spreadsheet,
+            match.group(2),
+            body.get("values", []),
+            body.get("majorDimension", "ROWS"),
+            _first(query, "valueInputOption", "RAW"),
+            start_row=next_row,
+        )
+        api.store.touch(spreadsheet["spreadsheetId"])
+        return 200, {
+            "spreadsheetId": spreadsheet["spreadsheetId"],
+            "tableRange": match.group(2),
+            "updates": updates,
+        }
+
+
+def _values_clear(api, match, query, body):
+    with api.store.lock:
+        spreadsheet = _spreadsheet(api, match.group(1))
+        cleared = _clear_range(spreadsheet, match.group(2))
+        api.store.touch(spreadsheet["spreadsheetId"])
+        return 200, {"spreadsheetId": spreadsheet["spreadsheetId"], "clearedRange": cleared}
+
+
+def _values_batch_get(api, match, query, body):
+    with api.store.lock:
+        spreadsheet = _spreadsheet(api, match.group(1))
+        major_dimension = _first(query, "majorDimension", "ROWS")
+        return 200, {
+            "spreadsheetId": spreadsheet["spreadsheetId"],
+            "valueRanges": [
+                _read_range(spreadsheet, cell_range, major_dimension)
+                for cell_range in query.get("ranges", [])
+            ],
+        }
+
+
+def _values_batch_update(api, match, query, body):
+    with api.store.lock:
+        spreadsheet = _spreadsheet(api, match.group(1))
+        value_input_option = body.get("valueInputOption", "RAW")
+        responses = [
+            _write_range(
+                spreadsheet,
+                value_range["range"],
+                value_range.get("values", []),
+                value_range.get("majorDimension", "ROWS"),
+                value_input_option,
+            )
+            for value_range in body.get("data", [])
+        ]
+        api.store.touch(spreadsheet["spreadsheetId"])
+        return 200, {
+            "spreadsheetId": spreadsheet["spreadsheetId"],
+            "totalUpdatedRows": sum(item["updatedRows"] for item in responses),
+            "totalUpdatedColumns": max((item["updatedColumns"] for item in responses), default=0),
+            "totalUpdatedCells": sum(item["updatedCells"] for item in responses),
+            "totalUpdatedSheets": len({item["updatedRange"].split("!")[0] for item in responses}),
+            "responses": responses,
+        }
+
+
+def _values_batch_clear(api, match, query, body):
+    with api.store.lock:
+        spreadsheet = _spreadsheet(api, match.group(1))
+        cleared = [_clear_range(spreadsheet, cell_range) for cell_range in body.get("ranges", [])]
+        api.store.touch(spreadsheet["spreadsheetId"])
+        return 200, {"spreadsheetId": spreadsheet["spreadsheetId"], "clearedRanges": cleared}
+
+
+# Drive
+
+
+_QUERY_CLAUSE = re.compile(
+    r"^(?:'(?P<value_in>[^']*)'\s+in\s+(?P<collection>parents|owners)"
+    r"|(?P<field>mimeType|name|modifiedTime|trashed)\s*(?P<op>!=|>=|<=|=|>|<|contains)\s*"
+    r"(?P<value>'[^']*'|true|false))$",
+    re.IGNORECASE,
+)
+
+
+def _split_outside_quotes(text, separator):
+    parts, current, quoted, depth = [], "", False, 0
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if not quoted and depth == 0 and text[index:index + len(separator)].lower() == separator:
+            parts.append(current)
+            current = ""
+            index += len(separator)
+            continue
+        current += char
+        index += 1
+    parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _clause_matches(file_entry, clause):
+    if clause.startswith("(") and clause.endswith(")"):
+        return any(
+            _clause_matches(file_entry, part)
+            for part in _split_outside_quotes(clause[1:-1], " or ")
+        )
+
+    match = _QUERY_CLAUSE.match(clause)
+    if not match:
+        raise ApiError(400, f"Invalid Value: unsupported query clause '{clause}'.")
+
+    if match.group("collection") == "parents":
+        return match.group("value_in") in file_entry["parents"]
+    if match.group("collection"):
+        return match.group("value_in") in {"me", file_entry["owners"][0]["emailAddress"]}
+
+    field = match.group("field")
+    op = match.group("op").lower()
+    raw_value = match.group("value")
+    if field.lower() == "trashed":
+        expected = raw_value.lower() == "true"
+        return (file_entry["trashed"] == expected) == (op == "=")
+
+    value = raw_value.strip("'")
+    actual = file_entry[{"mimetype": "mimeType", "modifiedtime": "modifiedTime"}.get(field.lower(), field)]
+    if op == "contains":
+        return value.lower() in actual.lower()
+    return {
+        "=": actual == value,
+        "!=": actual != value,
+        ">": actual > value,
+        ">=": actual >= value,
+        "<": actual < value,
+        "<=": actual <= value,
+    }[op]
+
+
+def _public_file(file_entry, fields):
+    result = {key: copy.deepcopy(value) for key, value in file_entry.items() if key != "permissions"}
+    if fields and "permissions" in fields:
+        result["permissions"] = copy.deepcopy(file_entry["permissions"])
+    if fields and "permissionIds" in fields:
+        result["permissionIds"] = [permission["id"] for permission in file_entry["permissions"]]
+    return result
+
+
+def _files_list(api, match, query, body):
+    with api.store.lock:
+        q = _first(query, "q", "")
+        clauses = _split_outside_quotes(q, " and ") if q else []
+        files = [
+            file_entry for file_entry in api.store.files.values()
+            if not file_entry["trashed"]
+            and all(_clause_matches(file_entry, clause) for clause in clauses)
+        ]
+        page, next_token = _page(files, query, DEFAULT_PAGE_SIZE, api.page_size)
+        result = {"files": [_public_file(item, _first(query, "fields")) for item in page]}
+        if next_token:
+            result["nextPageToken"] = next_token
+        return 200, result
+
+
+def _files_get(api, match, query, body):
+    with api.store.lock:
+        return 200, _public_file(api.store.get_file(match.group(1)), _first(query, "fields"))
+
+
+def _files_create(api, match, query, body):
+    name = body.get("name", "Untitled")
+    mime_type = body.get("mimeType", "application/octet-stream")
+    creators = {
+        DOCUMENT_MIME_TYPE: api.store.create_document,
+        SPREADSHEET_MIME_TYPE: api.store.create_spreadsheet,
+        FORM_MIME_TYPE: api.store.create_form,
+    }
+    with api.store.lock:
+        if mime_type in creators:
+            created = creators[mime_type](name)
+            file_id = created.get("documentId") or created.get("spreadsheetId") or created.get("formId")
+            file_entry = api.store.files[file_id]
+            file_entry["parents"] = list(body.get("parents") or ["root"])
+        else:
+            file_entry = api.store.add_file(name, mime_type, body.get("parents"))
+        return 200, _public_file(file_entry, None)
+
+
+def _files_copy(api, match, query, body):
+    copied = api.store.copy_file(match.group(1), body.get("name"), body.get("parents"))
+    return 200, _public_file(copied, None)
+
+
+def _files_update(api, match, query, body):
+    with api.store.lock:
+        file_entry = api.store.get_file(match.group(1))
+        for key in ("name", "trashed"):
+            if key in body:
+                file_entry[key] = body[key]
+        api.store.touch(file_entry["id"])
+        return 200, _public_file(file_entry, None)
+
+
+def _files_delete(api, match, query, body):
+    api.store.delete_file(match.group(1))
+    return 204, None
+
+
+def _permissions_list(api, match, query, body):
+    with api.store.lock:
+        permissions = api.store.get_file(match.group(1))["permissions"]
+        page, next_token = _page(permissions, query, DEFAULT_PAGE_SIZE, api.page_size)
+        result = {"permissions": copy.deepcopy(page)}
+        if next_token:
+            result["nextPageToken"] = next_token
+        return 200, result
+
+
+def _permissions_create(api, match, query, body):
+    with api.store.lock:
+        file_entry = api.store.get_file(match.group(1))
+        permission = {
+            "id": api.store.new_id("perm"),
+            "type": body.get("type", "user"),
+            "role": body.get("role", "reader"),
+        }
+        if "emailAddress" in body:
+            permission["emailAddress"] = body["emailAddress"]
+        if "domain" in body:
+            permission["domain"] = body["domain"]
+        file_entry["permissions"].append(permission)
+        return 200, permission
+
+
+def _permissions_delete(api, match, query, body):
+    with api.store.lock:
+        file_entry = api.store.get_file(match.group(1))
+        file_entry["permissions"] = [
+            permission for permission in file_entry["permissions"]
+            if permission["id"] != match.group(2)
+        ]
+        return 204, None
+
+
+def _changes_start_token(api, match, query, body):
+    with api.store.lock:
+        return 200, {"startPageToken": str(len(api.store.changes))}
+
+
+def _changes_list(api, match, query, body):
+    with api.store.lock:
+        token = _first(query, "pageToken")
+        if token is None:
+            raise ApiError(400, "Required parameter: pageToken")
+        include_removed = _first(query, "includeRemoved", "true") != "false"
+        start = int(token)
+        changes = api.store.changes[start:]
+        size = int(_first(query, "pageSize", DEFAULT_PAGE_SIZE))
+        size = max(1, min(size, api.page_size or size))
+        page = changes[:size]
+        result = {
+            "kind": "drive#changeList",
+            "changes": [
+                copy.deepcopy(change) for change in page
+                if include_removed or not change["removed"]
+            ],
+        }
+        if len(changes) > size:
+            result["nextPageToken"] = str(start + size)
+        else:
+            result["newStartPageToken"] = str(len(api.store.changes))
+        return 200, result
+
+
+# Forms
+
+
+def _form(api, form_id):
+    form = api.store.forms.get(form_id)
+    if form is None:
+        raise ApiError(404, "Requested entity was not found.")
+    return form
+
+
+def _forms_create(api, match, query, body):
+    form = api.store.create_form(body.get("info", {}).get("title", "Untitled form"))
+    return 200, copy.deepcopy(form)
+
+
+def _forms_get(api, match, query, body):
+    with api.store.lock:
+        return 200, copy.deepcopy(_form(api, match.group(1)))
+
+
+def _forms_batch_update(api, match, query, body):
+    with api.store.lock:
+        form = _form(api, match.group(1))
+        replies = []
+        for request in body.get("requests", []):
+            if "createItem" in request:
+                item = copy.deepcopy(request["createItem"].get("item", {}))
+                item["itemId"] = api.store.new_id("item")
+                question_ids = []
+                question = item.get("questionItem", {}).get("question")
+                if question is not None:
+                    question["questionId"] = api.store.new_id("q")
+                    question_ids.append(question["questionId"])
+                index = request["createItem"].get("location", {}).get("index", len(form["items"]))
+                form["items"].insert(index, item)
+                replies.append({"createItem": {"itemId": item["itemId"], "questionId": question_ids}})
+            elif "updateFormInfo" in request:
+                form["info"].update(request["updateFormInfo"].get("info", {}))
+                replies.append({})
+            else:
+                replies.append({})
+        form["revisionId"] = f"{int(form['revisionId']) + 1:08d}"
+        api.store.touch(form["formId"])
+        return 200, {"replies": replies, "writeControl": {"requiredRevisionId": form["revisionId"]}}
+
+
+_RESPONSE_FILTER = re.compile(r"^\s*timestamp\s*(>=|>)\s*(\S+)\s*$")
+
+
+def _responses_list(api, match, query, body):
+    with api.store.lock:
+        form_id = match.group(1)
+        _form(api, form_id)
+        responses = api.store.responses.get(form_id, [])
+        response_filter = _first(query, "filter")
+        if response_filter:
+            filter_match = _RESPONSE_FILTER.match(response_filter)
+            if not filter_match:
+                raise ApiError(400, f"Invalid filter: {response_filter}")
+            op, timestamp = filter_match.groups()
+            responses = [
+                response for response in responses
+                if response["lastSubmittedTime"] > timestamp
+                or (op == ">=" and response["lastSubmittedTime"] == timestamp)
+            ]
+        page, next_token = _page(responses, query, 5000, api.page_size)
+        result = {}
+        if page:
+            # Stored responses are never mutated after they are added, so the
+            # page can be serialized without a defensive deep copy.
+            result["responses"] = list(page)
+        if next_token:
+            result["nextPageToken"] = next_token
+        return 200, result
+
+
+ROUTES = [
+    ("POST", r"/v1/documents", _documents_create),
+    ("GET", r"/v1/documents/([^/:]+)", _documents_get),
+    ("POST", r"/v1/documents/([^/:]+):batchUpdate", _documents_batch_update),
+    ("POST", r"/v4/spreadsheets", _spreadsheets_create),
+    ("GET", r"/v4/spreadsheets/([^/:]+)", _spreadsheets_get),
+    ("POST", r"/v4/spreadsheets/([^/:]+):batchUpdate", _spreadsheets_batch_update),
+    ("GET", r"/v4/spreadsheets/([^/:]+)/values:batchGet", _values_batch_get),
+    ("POST", r"/v4/spreadsheets/([^/:]+)/values:batchUpdate", _values_batch_update),
+    ("POST", r"/v4/spreadsheets/([^/:]+)/values:batchClear", _values_batch_clear),
+    ("GET", r"/v4/spreadsheets/([^/:]+)/values/(.+)", _values_get),
+    ("PUT", r"/v4/spreadsheets/([^/:]+)/values/(.+)", _values_update),
+    ("POST", r"/v4/spreadsheets/([^/:]+)/values/(.+):append", _values_append),
+    ("POST", r"/v4/spreadsheets/([^/:]+)/values/(.+):clear", _values_clear),
+    ("GET", r"/drive/v3/files", _files_list),
+    ("POST", r"/drive/v3/files", _files_create),
+    ("GET", r"/drive/v3/files/([^/]+)", _files_get),
+    ("PATCH", r"/drive/v3/files/([^/]+)", _files_update),
+    ("DELETE", r"/drive/v3/files/([^/]+)", _files_delete),
+    ("POST", r"/drive/v3/files/([^/]+)/copy", _files_copy),
+    ("GET", r"/drive/v3/files/([^/]+)/permissions", _permissions_list),
+    ("POST", r"/drive/v3/files/([^/]+)/permissions", _permissions_create),
+    ("DELETE", r"/drive/v3/files/([^/]+)/permissions/([^/]+)", _permissions_delete),
+    ("GET", r"/drive/v3/changes/startPageToken", _changes_start_token),
+    ("GET", r"/drive/v3/changes", _changes_list),
+    ("POST", r"/v1/forms", _forms_create),
+    ("GET", r"/v1/forms/([^/:]+)", _forms_get),
+    ("POST", r"/v1/forms/([^/:]+):batchUpdate", _forms_batch_update),
+    ("GET", r"/v1/forms/([^/:]+)/responses", _responses_list),
+]
+
+_COMPILED_ROUTES = [
+    (method, re.compile(pattern), handler) for method, pattern, handler in ROUTES
+]
+
+
+class WorkspaceApi:
+    """Routes Google Workspace REST calls to a :class:`WorkspaceStore`.
+
+    ``page_size`` caps every paginated listing so clients are forced through
+    their pagination paths.
+    """
+
+    def __init__(self, store, page_size=None):
+        self.store = store
+        self.page_size = page_size
+
+    def dispatch(self, method, path, query, body):
+        for route_method, pattern, handler in _COMPILED_ROUTES:
+            if route_method != method:
+                continue
+            match = pattern.fullmatch(path)
+            if match:
+                try:
+                    status, payload = handler(self, match, query, body or {})
+                    fields = _first(query, "fields")
+                    if fields and status == 200 and payload is not None:
+                        payload = apply_field_mask(payload, parse_field_mask(fields))
+                    return status, payload
+                except ApiError as error:
+                    return error.status, error.payload()
+        return 404, ApiError(404, f"No emulated endpoint for {method} {path}.").payload()
@@ -0,0 +1,75 @@
+import random
+import threading
+import time
+from collections import Counter
+
+from emulator.store import ApiError
+
+
+class FaultInjector:
+    """Applies latency, per-minute rate limiting and random 429/5xx errors."""
+
+    def __init__(
+        self,
+        latency_ms=0,
+        jitter_ms=0,
+        rate_limit_per_minute=None,
+        throttle_rate=0.0,
+        error_rate=0.0,
+        seed=None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float(rate_limit_per_minute or 0)
+        self._refilled_at = time.monotonic()
+        self.stats = Counter()
+
+    def _take_token(self):
+        if not self.rate_limit_per_minute:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            refill = (now - self._refilled_at) * self.rate_limit_per_minute / 60.0
+            self._tokens = min(float(self.rate_limit_per_minute), self._tokens + refill)
+            self._refilled_at = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _roll(self, probability):
+        if probability <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < probability
+
+    def delay(self):
+        if not self.latency_ms and not self.jitter_ms:
+            return
+        with self._lock:
+            jitter = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0
+        time.sleep((self.latency_ms + jitter) / 1000.0)
+
+    def check(self):
+        """Returns an ``ApiError`` to send instead of the real response, or ``None``."""
+        if not self._take_token():
+            return ApiError(429, "Quota exceeded for quota metric 'Requests' (emulated).")
+        if self._roll(self.throttle_rate):
+            return ApiError(429, "Rate limit exceeded (emulated).")
+        if self._roll(self.error_rate):
+            return ApiError(503, "The service is currently unavailable (emulated).")
+        return None
+
+    def record(self, method, status):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats[f"{method} {status}"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
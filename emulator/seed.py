@@ -0,0 +1,83 @@
+from emulator.store import FOLDER_MIME_TYPE
+
+
+def seed_store(store, spec):
+    """Populates a store from a seed spec.
+
+    The spec mirrors what the CLI manipulates::
+
+        {
+          "documents": [{"id": "...", "title": "...", "text": "..."}],
+          "spreadsheets": [{"id": "...", "title": "...", "values": [["a", "b"]]}],
+          "forms": [{"id": "...", "title": "...", "questions": ["Name"], "responses": 10}],
+          "folders": [{"id": "...", "name": "...", "parent": "..."}]
+        }
+
+    ``id`` is optional everywhere; ``responses`` may be a count of synthetic
+    responses or a list of ``{question_id: value}`` answer maps. Folders are
+    created first, and any entry may name its folder with ``parent``.
+    """
+    for folder in spec.get("folders", []):
+        store.add_file(
+            folder.get("name", "Untitled folder"),
+            FOLDER_MIME_TYPE,
+            [folder["parent"]] if folder.get("parent") else None,
+            file_id=folder.get("id"),
+        )
+
+    def place(file_id, entry_spec):
+        if entry_spec.get("parent"):
+            store.files[file_id]["parents"] = [entry_spec["parent"]]
+
+    for document in spec.get("documents", []):
+        created = store.create_document(
+            document.get("title", "Untitled document"),
+            document.get("text", ""),
+            file_id=document.get("id"),
+        )
+        place(created["documentId"], document)
+
+    for spreadsheet_spec in spec.get("spreadsheets", []):
+        spreadsheet = store.create_spreadsheet(
+            spreadsheet_spec.get("title", "Untitled spreadsheet"),
+            file_id=spreadsheet_spec.get("id"),
+        )
+        place(spreadsheet["spreadsheetId"], spreadsheet_spec)
+        spreadsheet["sheets"][0]["values"] = [
+            list(row) for row in spreadsheet_spec.get("values", [])
+        ]
+
+    for form_spec in spec.get("forms", []):
+        form = store.create_form(
+            form_spec.get("title", "Untitled form"),
+            file_id=form_spec.get("id"),
+        )
+        place(form["formId"], form_spec)
+        question_ids = []
+        for number, title in enumerate(form_spec.get("questions", [])):
+            question_id = f"q{number}"
+            question_ids.append(question_id)
+            form["items"].append(
+                {
+                    "itemId": f"item{number}",
+                    "title": title,
+                    "questionItem": {
+                        "question": {
+                            "questionId": question_id,
+                            "textQuestion": {"paragraph": False},
+                        }
+                    },
+                }
+            )
+
+        responses = form_spec.get("responses", [])
+        if isinstance(responses, int):
+            responses = [
+                {
+                    question_id: f"answer {number}-{question_id}"
+                    for question_id in question_ids
+                }
+                for number in range(responses)
+            ]
+        for answers in responses:
+            store.add_response(form["formId"], answers)
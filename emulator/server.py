@@ -0,0 +1,171 @@
+import email.parser
+import hashlib
+import json
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+STATS_PATH = "/_emulator/stats"
+BATCH_PATH_PREFIX = "/batch/"
+BATCH_BOUNDARY = "batch_emulator_response"
+JSON_CONTENT_TYPE = "application/json; charset=UTF-8"
+
+
+def response_content_type(target):
+    if urlparse(target).path.startswith(BATCH_PATH_PREFIX):
+        return f"multipart/mixed; boundary={BATCH_BOUNDARY}"
+    return JSON_CONTENT_TYPE
+
+
+def _account_tag(authorization):
+    return hashlib.sha1(authorization.encode("utf-8")).hexdigest()[:8]
+
+
+def _bind_page_token(payload, authorization):
+    # Like Google's APIs, a page token only works for the account that
+    # received it, so a client that switches accounts mid-listing fails.
+    if authorization and isinstance(payload, dict) and payload.get("nextPageToken"):
+        payload["nextPageToken"] = f"{_account_tag(authorization)}.{payload['nextPageToken']}"
+    return payload
+
+
+def _unbind_page_token(query, authorization):
+    """Strips the account tag off ``pageToken``; returns False for another account's token."""
+    token = (query.get("pageToken") or [""])[0]
+    tag, separator, inner = token.partition(".")
+    if not separator or not authorization:
+        return True
+    if tag != _account_tag(authorization):
+        return False
+    query["pageToken"] = [inner]
+    return True
+
+
+def _handle_batch(api, faults, body, authorization=None):
+    """Answers a multipart/mixed batch like Google's batch endpoints.
+
+    Every part runs through ``handle_request`` on its own, so fault
+    injection and stats apply per call, as quota does for real batches.
+    """
+    text = body.decode("utf-8") if isinstance(body, bytes) else body or ""
+    boundary = text.lstrip().split("\n", 1)[0].strip()[2:]
+    message = email.parser.Parser().parsestr(
+        f"Content-Type: multipart/mixed; boundary=\"{boundary}\"\r\n\r\n{text}"
+    )
+    if not boundary or not message.is_multipart():
+        return 400, json.dumps(
+            {"error": {"code": 400, "message": "Invalid batch payload.", "status": "INVALID_ARGUMENT"}}
+        ).encode("utf-8")
+
+    parts = []
+    for part in message.get_payload():
+        inner = part.get_payload().replace("\r\n", "\n")
+        head, _, inner_body = inner.partition("\n\n")
+        method, target, _ = head.split("\n", 1)[0].split(" ", 2)
+        status, encoded = handle_request(
+            api, faults, method, target, inner_body.strip().encode("utf-8"), authorization
+        )
+        content_id = (part.get("Content-ID") or "").strip("<>")
+        parts.append(
+            f"--{BATCH_BOUNDARY}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-{content_id}>\r\n\r\n"
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: {JSON_CONTENT_TYPE}\r\n"
+            f"Content-Length: {len(encoded)}\r\n\r\n"
+            f"{encoded.decode('utf-8')}\r\n"
+        )
+    parts.append(f"--{BATCH_BOUNDARY}--\r\n")
+    return 200, "".join(parts).encode("utf-8")
+
+
+def handle_request(api, faults, method, target, body, authorization=None):
+    """Runs one raw request through fault injection and the API router.
+
+    ``authorization`` is the request's Authorization header; page tokens are
+    bound to it. Returns ``(status, encoded_body)`` so both the HTTP server
+    and the in-process transport produce byte-identical responses.
+    """
+    parsed = urlparse(target)
+    path = unquote(parsed.path)
+    if path == STATS_PATH:
+        return 200, json.dumps(faults.snapshot()).encode("utf-8")
+    if path.startswith(BATCH_PATH_PREFIX):
+        return _handle_batch(api, faults, body, authorization)
+
+    faults.delay()
+    error = faults.check()
+    if error is not None:
+        status, payload = error.status, error.payload()
+    else:
+        try:
+            parsed_body = json.loads(body) if body else {}
+        except ValueError:
+            parsed_body = None
+        if parsed_body is None:
+            status, payload = 400, {
+                "error": {"code": 400, "message": "Invalid JSON payload.", "status": "INVALID_ARGUMENT"}
+            }
+        else:
+            query = parse_qs(parsed.query, keep_blank_values=True)
+            if _unbind_page_token(query, authorization):
+                status, payload = api.dispatch(method, path, query, parsed_body)
+                payload = _bind_page_token(payload, authorization)
+            else:
+                status, payload = 400, {
+                    "error": {"code": 400, "message": "Invalid page token.", "status": "INVALID_ARGUMENT"}
+                }
+
+    faults.record(method, status)
+    encoded = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    return status, encoded
+
+
+def make_handler(api, faults, verbose=False):
+    class EmulatorRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _dispatch(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            status, encoded = handle_request(
+                api, faults, self.command, self.path, body, self.headers.get("Authorization")
+            )
+
+            etag = None
+            if self.command == "GET" and status == 200:
+                # Like Google's APIs: a strong ETag over the body, and a 304
+                # when the client already holds that version.
+                etag = '"' + hashlib.sha1(encoded).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    status, encoded = 304, b""
+
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "private, max-age=0, must-revalidate")
+            if encoded:
+                self.send_header("Content-Type", response_content_type(self.path))
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            if encoded:
+                self.wfile.write(encoded)
+
+        do_GET = _dispatch
+        do_POST = _dispatch
+        do_PUT = _dispatch
+        do_PATCH = _dispatch
+        do_DELETE = _dispatch
+
+        def log_message(self, format, *args):
+            if verbose:
+                super().log_message(format, *args)
+
+    return EmulatorRequestHandler
+
+
+def create_server(api, faults, host="127.0.0.1", port=8765, verbose=False):
+    server = ThreadingHTTPServer((host, port), make_handler(api, faults, verbose))
+    server.daemon_threads = True
+    return server
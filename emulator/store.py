@@ -0,0 +1,284 @@
+import copy
+import itertools
+import re
+import threading
+from datetime import datetime, timezone
+
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+DOCUMENT_MIME_TYPE = "application/vnd.google-apps.document"
+SPREADSHEET_MIME_TYPE = "application/vnd.google-apps.spreadsheet"
+FORM_MIME_TYPE = "application/vnd.google-apps.form"
+
+EMULATOR_USER = "emulator@example.com"
+
+
+class ApiError(Exception):
+    STATUS_NAMES = {
+        400: "INVALID_ARGUMENT",
+        403: "PERMISSION_DENIED",
+        404: "NOT_FOUND",
+        429: "RESOURCE_EXHAUSTED",
+        500: "INTERNAL",
+        503: "UNAVAILABLE",
+    }
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+    def payload(self):
+        return {
+            "error": {
+                "code": self.status,
+                "message": self.message,
+                "status": self.STATUS_NAMES.get(self.status, "UNKNOWN"),
+            }
+        }
+
+
+def now_timestamp():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")[:-4] + "Z"
+
+
+def column_index(letters):
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + (ord(letter) - ord("A") + 1)
+    return index - 1
+
+
+def column_letters(index):
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+_CELL_PATTERN = re.compile(r"^([A-Za-z]*)(\d*)$")
+
+
+def _parse_cell(cell):
+    match = _CELL_PATTERN.match(cell)
+    if not match:
+        raise ApiError(400, f"Unable to parse range: {cell}")
+    letters, digits = match.groups()
+    column = column_index(letters) if letters else None
+    row = int(digits) - 1 if digits else None
+    return row, column
+
+
+def parse_a1(cell_range):
+    """Splits an A1 range into (sheet title, start row, start col, end row, end col).
+
+    Bounds are zero-based and inclusive; ``None`` means the range is open on
+    that side.
+    """
+    sheet_title = None
+    cells = cell_range
+    if "!" in cell_range:
+        sheet_title, cells = cell_range.rsplit("!", 1)
+    elif not re.match(r"^[A-Za-z]*\d*(:[A-Za-z]*\d*)?$", cell_range):
+        return cell_range.strip("'"), None, None, None, None
+
+    if sheet_title is not None:
+        sheet_title = sheet_title.strip("'").replace("''", "'")
+
+    if ":" in cells:
+        start, end = cells.split(":", 1)
+    else:
+        start, end = cells, cells
+    start_row, start_col = _parse_cell(start)
+    end_row, end_col = _parse_cell(end)
+    if start == end and start_row is not None and start_col is not None:
+        end_row, end_col = start_row, start_col
+    return sheet_title, start_row, start_col, end_row, end_col
+
+
+def format_a1(sheet_title, start_row, start_col, end_row, end_col):
+    quoted = sheet_title
+    if not re.match(r"^\w+$", sheet_title):
+        quoted = "'" + sheet_title.replace("'", "''") + "'"
+    start = f"{column_letters(start_col)}{start_row + 1}"
+    end = f"{column_letters(end_col)}{end_row + 1}"
+    return f"{quoted}!{start}:{end}"
+
+
+class WorkspaceStore:
+    """Thread-safe in-memory state for Drive files and their Docs/Sheets/Forms content."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.files = {}
+        self.documents = {}
+        self.spreadsheets = {}
+        self.forms = {}
+        self.responses = {}
+        self.changes = []
+        self._ids = itertools.count(1)
+
+    def new_id(self, prefix):
+        return f"{prefix}{next(self._ids):06d}"
+
+    def record_change(self, file_id, removed=False):
+        with self.lock:
+            change = {
+                "kind": "drive#change",
+                "changeType": "file",
+                "fileId": file_id,
+                "removed": removed,
+                "time": now_timestamp(),
+            }
+            if not removed:
+                change["file"] = {
+                    key: copy.deepcopy(value)
+                    for key, value in self.files[file_id].items()
+                    if key != "permissions"
+                }
+            self.changes.append(change)
+
+    def add_file(self, name, mime_type, parents=None, file_id=None):
+        with self.lock:
+            timestamp = now_timestamp()
+            file_id = file_id or self.new_id("file")
+            self.files[file_id] = {
+                "id": file_id,
+                "name": name,
+                "mimeType": mime_type,
+                "parents": list(parents or ["root"]),
+                "createdTime": timestamp,
+                "modifiedTime": timestamp,
+                "trashed": False,
+                "owners": [{"emailAddress": EMULATOR_USER, "me": True}],
+                "permissions": [
+                    {
+                        "id": "owner",
+                        "type": "user",
+                        "role": "owner",
+                        "emailAddress": EMULATOR_USER,
+                    }
+                ],
+            }
+            self.record_change(file_id)
+            return self.files[file_id]
+
+    def get_file(self, file_id):
+        file_entry = self.files.get(file_id)
+        if file_entry is None or file_entry["trashed"]:
+            raise ApiError(404, f"File not found: {file_id}.")
+        return file_entry
+
+    def touch(self, file_id):
+        with self.lock:
+            if file_id in self.files:
+                self.files[file_id]["modifiedTime"] = now_timestamp()
+                self.record_change(file_id)
+
+    def delete_file(self, file_id):
+        with self.lock:
+            self.get_file(file_id)
+            del self.files[file_id]
+            self.documents.pop(file_id, None)
+            self.spreadsheets.pop(file_id, None)
+            self.forms.pop(file_id, None)
+            self.responses.pop(file_id, None)
+            self.record_change(file_id, removed=True)
+
+    def copy_file(self, file_id, name=None, parents=None):
+        with self.lock:
+            source = self.get_file(file_id)
+            copied = self.add_file(
+                name or f"Copy of {source['name']}",
+                source["mimeType"],
+                parents or source["parents"],
+            )
+            copied_id = copied["id"]
+            if file_id in self.documents:
+                document = copy.deepcopy(self.documents[file_id])
+                document.update(documentId=copied_id, title=copied["name"], revision=1)
+                self.documents[copied_id] = document
+            if file_id in self.spreadsheets:
+                spreadsheet = copy.deepcopy(self.spreadsheets[file_id])
+                spreadsheet["spreadsheetId"] = copied_id
+                spreadsheet["properties"]["title"] = copied["name"]
+                self.spreadsheets[copied_id] = spreadsheet
+            if file_id in self.forms:
+                form = copy.deepcopy(self.forms[file_id])
+                form["formId"] = copied_id
+                self.forms[copied_id] = form
+                self.responses[copied_id] = []
+            return copied
+
+    def create_document(self, title, text="", file_id=None):
+        with self.lock:
+            file_entry = self.add_file(title, DOCUMENT_MIME_TYPE, file_id=file_id)
+            if not text.endswith("\n"):
+                text += "\n"
+            self.documents[file_entry["id"]] = {
+                "documentId": file_entry["id"],
+                "title": title,
+                "text": text,
+                "revision": 1,
+            }
+            return self.documents[file_entry["id"]]
+
+    def create_spreadsheet(self, title, sheet_titles=None, file_id=None):
+        with self.lock:
+            file_entry = self.add_file(title, SPREADSHEET_MIME_TYPE, file_id=file_id)
+            spreadsheet = {
+                "spreadsheetId": file_entry["id"],
+                "properties": {"title": title},
+                "sheets": [],
+            }
+            self.spreadsheets[file_entry["id"]] = spreadsheet
+            for sheet_title in ["Sheet1"] if sheet_titles is None else sheet_titles:
+                self.add_sheet(spreadsheet, sheet_title)
+            return spreadsheet
+
+    def add_sheet(self, spreadsheet, title, properties=None):
+        sheet_ids = [sheet["properties"]["sheetId"] for sheet in spreadsheet["sheets"]]
+        sheet_properties = {
+            "sheetId": 0 if not sheet_ids else max(sheet_ids) + 1,
+            "title": title,
+            "index": len(spreadsheet["sheets"]),
+            "sheetType": "GRID",
+            "gridProperties": {"rowCount": 1000, "columnCount": 26},
+        }
+        sheet_properties.update(properties or {})
+        sheet = {"properties": sheet_properties, "values": []}
+        spreadsheet["sheets"].append(sheet)
+        return sheet
+
+    def create_form(self, title, file_id=None):
+        with self.lock:
+            file_entry = self.add_file(title, FORM_MIME_TYPE, file_id=file_id)
+            form_id = file_entry["id"]
+            self.forms[form_id] = {
+                "formId": form_id,
+                "info": {"title": title, "documentTitle": title},
+                "items": [],
+                "revisionId": "00000001",
+                "responderUri": f"https://docs.google.com/forms/d/e/{form_id}/viewform",
+            }
+            self.responses[form_id] = []
+            return self.forms[form_id]
+
+    def add_response(self, form_id, answers, submitted_time=None):
+        with self.lock:
+            response = {
+                "responseId": self.new_id("resp"),
+                "createTime": submitted_time or now_timestamp(),
+                "lastSubmittedTime": submitted_time or now_timestamp(),
+                "answers": {
+                    question_id: {
+                        "questionId": question_id,
+                        "textAnswers": {"answers": [{"value": str(value)}]},
+                    }
+                    for question_id, value in answers.items()
+                },
+            }
+            self.responses[form_id].append(response)
+            return response
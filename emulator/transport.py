@@ -0,0 +1,84 @@
+import io
+
+import httplib2
+import requests
+
+from emulator.server import handle_request, response_content_type
+
+
+class EmulatorHttp:
+    """httplib2-compatible transport that answers requests from an in-process emulator.
+
+    Passing it wherever googleapiclient expects an ``Http`` object exercises
+    the full client stack without opening sockets.
+    """
+
+    def __init__(self, api, faults):
+        self.api = api
+        self.faults = faults
+        self.timeout = None
+        self.follow_redirects = True
+        self.redirect_codes = set()
+        self.connections = {}
+        self.request_count = 0
+
+    def close(self):
+        pass
+
+    def add_certificate(self, *args, **kwargs):
+        pass
+
+    def request(
+        self,
+        uri,
+        method="GET",
+        body=None,
+        headers=None,
+        redirections=5,
+        connection_type=None,
+    ):
+        self.request_count += 1
+        authorization = next(
+            (value for name, value in (headers or {}).items() if name.lower() == "authorization"),
+            None,
+        )
+        status, encoded = handle_request(self.api, self.faults, method, uri, body, authorization)
+        response = httplib2.Response(
+            {"status": str(status), "content-type": response_content_type(uri)}
+        )
+        return response, encoded
+
+
+class EmulatorAdapter(requests.adapters.BaseAdapter):
+    """requests transport adapter backed by the same emulator as an ``EmulatorHttp``.
+
+    Mount it on a session (or return it from ``Session.get_adapter``) to route
+    raw HTTP calls, such as streamed downloads, to the emulator. Requests are
+    counted on the shared ``EmulatorHttp``.
+    """
+
+    def __init__(self, emulator_http):
+        super().__init__()
+        self.emulator_http = emulator_http
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.emulator_http.request_count += 1
+        status, encoded = handle_request(
+            self.emulator_http.api,
+            self.emulator_http.faults,
+            request.method,
+            request.url,
+            request.body,
+            request.headers.get("Authorization"),
+        )
+        response = requests.Response()
+        response.status_code = status
+        response.headers["content-type"] = response_content_type(request.url)
+        response.raw = io.BytesIO(encoded)
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
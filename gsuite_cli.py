@@ -1,14 +1,40 @@
+import csv
+import json
+import os
+import re
+import sqlite3
+
 import click
 
 from services.app_config import load_app_config
-from services import docs_service
-from services import forms_service
-from services import sheets_service
+from services import completion
+from services import drive_watch
+from services import output
+from services import tracing
+from services.auth_service import add_service_account
 from services.auth_service import login as login_user
 from services.auth_service import logout as logout_user
-from services.config import CLIENT_SECRETS_FILE
-from services.credentials import get_credentials
+from services.config import CLIENT_SECRETS_FILE, DEFAULT_PROFILE
+from services.credential_pool import CredentialPool
+from services.credentials import get_credentials, list_profiles, validate_profile_name
 from services.errors import echo_error, echo_exception, echo_warning
+from services.lazy import lazy_import
+
+# Loaded on first use so that startup, and shell completion in particular,
+# does not pay for googleapiclient.
+docs_index = lazy_import("services.docs_index")
+docs_merge = lazy_import("services.docs_merge")
+docs_ops = lazy_import("services.docs_ops")
+docs_service = lazy_import("services.docs_service")
+drive_copy = lazy_import("services.drive_copy")
+drive_permissions = lazy_import("services.drive_permissions")
+forms_service = lazy_import("services.forms_service")
+forms_sync = lazy_import("services.forms_sync")
+google_client = lazy_import("services.google_client")
+sheets_builder = lazy_import("services.sheets_builder")
+sheets_follow = lazy_import("services.sheets_follow")
+sheets_query = lazy_import("services.sheets_query")
+sheets_service = lazy_import("services.sheets_service")
 
 
 VALID_DOC_FORMATS = {"plain_text", "markdown"}
@@ -55,10 +81,120 @@ def _resolve_docs_format(app_config, cli_format):
     return "plain_text"
 
 
+def _root_options():
+    root = click.get_current_context().find_root()
+    return root.obj or {}
+
+
+def _active_profile():
+    return _root_options().get("profile") or DEFAULT_PROFILE
+
+
+def _build_credential_pool(app_config):
+    pool_config = app_config.get("pool", {})
+    profiles = pool_config.get("profiles") or list_profiles()
+    named_credentials = []
+    for profile in profiles:
+        creds = get_credentials(profile)
+        if creds:
+            named_credentials.append((profile, creds))
+        else:
+            echo_warning("pool", f"Skipping profile '{profile}' without usable credentials.")
+
+    if not named_credentials:
+        echo_error(
+            "pool",
+            "No profiles with usable credentials for --pool.",
+            "Run 'python3 gsuite_cli.py --profile <name> auth login' for each account.",
+        )
+        return None
+
+    try:
+        requests_per_minute = int(pool_config.get("requests_per_minute", 60))
+    except (TypeError, ValueError):
+        requests_per_minute = 60
+    return CredentialPool(named_credentials, max(1, requests_per_minute))
+
+
+def _get_credentials(read_only=False):
+    """Returns credentials for a command.
+
+    Read-only commands get a credential pool when --pool is set. Everything
+    else stays pinned to the active profile, which owns the resources it writes.
+    """
+    if read_only and _root_options().get("pool"):
+        return _build_credential_pool(_get_app_config())
+    return get_credentials(_active_profile())
+
+
+def _echo_files(kind, files, heading, empty_message):
+    """Writes files as the paginated listing yields them.
+
+    The first ones are also cached for shell completion of ``kind`` IDs.
+    """
+    listed = []
+    count = 0
+    for item in files:
+        if not count:
+            output.text(heading)
+        count += 1
+        if len(listed) < completion.MAX_ENTRIES:
+            listed.append(item)
+        output.record({"id": item["id"], "name": item.get("name", "")})
+        output.text(f"{item.get('name', '')} ({item['id']})")
+    if not count:
+        output.text(empty_message)
+    completion.remember(_active_profile(), kind, listed)
+
+
 @click.group()
-def gsuite():
+@click.option(
+    "--profile",
+    envvar="GSUITE_CLI_PROFILE",
+    default=None,
+    help="Named credential profile to use. Defaults to 'default'.",
+)
+@click.option(
+    "--pool",
+    is_flag=True,
+    envvar="GSUITE_CLI_POOL",
+    help="Spread read-only requests across the configured pool of profiles.",
+)
+@click.option(
+    "--trace",
+    is_flag=True,
+    envvar="GSUITE_CLI_TRACE",
+    help="Write JSON trace events (e.g. concurrency limit changes) to stderr.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    envvar="GSUITE_CLI_NO_CACHE",
+    help="Bypass the on-disk HTTP response cache.",
+)
+@click.option(
+    "--output",
+    "output_format",
+    type=click.Choice(output.FORMATS, case_sensitive=False),
+    default="table",
+    show_default=True,
+    envvar="GSUITE_CLI_OUTPUT",
+    help="table for people; ndjson or json for one JSON record per item, written as it arrives.",
+)
+@click.pass_context
+def gsuite(ctx, profile, pool, trace, no_cache, output_format):
     """A CLI for interacting with Google Workspace (Docs, Sheets, Forms)."""
-    pass
+    try:
+        validate_profile_name(profile)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--profile")
+    if trace:
+        tracing.enable()
+    if no_cache:
+        google_client.disable_http_cache()
+    output.set_format(output_format.lower())
+    ctx.call_on_close(output.finish)
+    ctx.obj = {"profile": profile, "pool": pool}
 
 @gsuite.group()
 def auth():
@@ -66,11 +202,24 @@ def auth():
     pass
 
 @auth.command()
-def login():
+@click.option(
+    "--service-account-key",
+    "service_account_key",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Store a service account key for the profile instead of running OAuth.",
+)
+def login(service_account_key):
     """Logs in to Google Workspace."""
+    profile = _active_profile()
     try:
-        login_user()
-        click.echo("Authentication successful. Credentials saved.")
+        if service_account_key:
+            add_service_account(profile, service_account_key)
+            output.text(f"Service account key saved for profile '{profile}'.")
+            return
+        login_user(profile)
+        output.text("Authentication successful. Credentials saved.")
+    except ValueError as error:
+        echo_error("auth login", str(error))
     except FileNotFoundError as error:
         echo_error(
             "auth login",
@@ -84,28 +233,44 @@ def login():
 def logout():
     """Logs out from Google Workspace."""
     try:
-        result = logout_user()
+        result = logout_user(_active_profile())
     except Exception as error:
         echo_exception("auth logout", error)
         return
 
+    output.record(result)
     if not result["credentials_found"]:
-        click.echo("No local credentials found.")
+        output.text("No local credentials found.")
         return
 
     if result["revocation_attempted"]:
         if result["token_revoked"]:
-            click.echo("Refresh token revoked.")
+            output.text("Refresh token revoked.")
         else:
             echo_warning(
                 "auth logout",
                 result["revoke_error"] or "Could not revoke refresh token.",
             )
     else:
-        click.echo("No refresh token found to revoke.")
+        output.text("No refresh token found to revoke.")
 
     if result["credentials_deleted"]:
-        click.echo("Local credentials deleted.")
+        output.text("Local credentials deleted.")
+
+@auth.command(name="profiles")
+def list_auth_profiles():
+    """Lists stored credential profiles."""
+    profiles = list_profiles()
+    if not profiles:
+        output.text("No profiles found.")
+        return
+
+    active = _active_profile()
+    output.text("Profiles:")
+    for profile in profiles:
+        marker = " (active)" if profile == active else ""
+        output.record({"profile": profile, "active": profile == active})
+        output.text(f"{profile}{marker}")
 
 @gsuite.group()
 def docs():
@@ -116,15 +281,20 @@ def docs():
 @click.argument('title')
 def create(title):
     """Creates a new Google Doc."""
-    creds = get_credentials()
+    creds = _get_credentials()
     if not creds:
         return
 
     try:
         document = docs_service.create_document(creds, title)
-        click.echo(f"Created document with title: {title}")
-        click.echo(f"Document ID: {document.get('documentId')}")
-        click.echo(f"Document URL: https://docs.google.com/document/d/{document.get('documentId')}/edit")
+        output.record({
+            "id": document.get("documentId"),
+            "title": title,
+            "url": f"https://docs.google.com/document/d/{document.get('documentId')}/edit",
+        })
+        output.text(f"Created document with title: {title}")
+        output.text(f"Document ID: {document.get('documentId')}")
+        output.text(f"Document URL: https://docs.google.com/document/d/{document.get('documentId')}/edit")
     except Exception as error:
         echo_exception("docs create", error)
 
@@ -132,25 +302,23 @@ def create(title):
 @docs.command()
 def list():
     """Lists Google Docs."""
-    creds = get_credentials()
+    creds = _get_credentials(read_only=True)
     if not creds:
         return
 
     try:
-        items = docs_service.list_documents(creds)
-
-        if not items:
-            click.echo('No documents found.')
-        else:
-            click.echo('Documents:')
-            for item in items:
-                click.echo(f"{item['name']} ({item['id']})")
+        _echo_files(
+            "docs",
+            docs_service.iter_document_files(creds, fields="id, name"),
+            "Documents:",
+            "No documents found.",
+        )
     except Exception as error:
         echo_exception("docs list", error)
 
 
 @docs.command()
-@click.argument('document_id')
+@click.argument('document_id', shell_complete=completion.complete_ids('docs'))
 @click.option(
     '--format',
     'output_format',
@@ -159,12 +327,21 @@ def list():
     help='Output format for document content. Defaults to config value.',
 )
 @click.option('--output', 'output_path', help='Save content to a local file path.')
-def get(document_id, output_format, output_path):
+@click.option(
+    '--stream',
+    is_flag=True,
+    help='Low-memory mode: parse the response incrementally and write text as it arrives.',
+)
+def get(document_id, output_format, output_path, stream):
     """Gets the content of a Google Doc."""
-    creds = get_credentials()
+    creds = _get_credentials(read_only=True)
     if not creds:
         return
 
+    if stream:
+        _stream_document(creds, document_id, output_format, output_path)
+        return
+
     try:
         app_config = _get_app_config()
         summary = docs_service.get_document_summary(creds, document_id)
@@ -178,31 +355,83 @@ def get(document_id, output_format, output_path):
         if output_path:
             with open(output_path, "w", encoding="utf-8") as output_file:
                 output_file.write(rendered_content)
-            click.echo(
+            output.record({"id": summary["document_id"], "format": selected_format, "path": output_path})
+            output.text(
                 f"Document content saved to '{output_path}' in {selected_format} format."
             )
             return
 
+        output.record({
+            "id": summary["document_id"],
+            "title": summary["title"],
+            "format": selected_format,
+            "content": rendered_content,
+        })
         if selected_format == "markdown":
-            click.echo(rendered_content, nl=False)
+            output.text(rendered_content, nl=False)
             return
 
-        click.echo(f"Document Title: {summary['title']}")
-        click.echo(f"Document ID: {summary['document_id']}")
-        click.echo("\nContent:")
+        output.text(f"Document Title: {summary['title']}")
+        output.text(f"Document ID: {summary['document_id']}")
+        output.text("\nContent:")
         if rendered_content:
-            click.echo(rendered_content, nl=False)
+            output.text(rendered_content, nl=False)
         else:
-            click.echo("Document is empty or has no readable content.")
+            output.text("Document is empty or has no readable content.")
+    except Exception as error:
+        echo_exception("docs get", error)
+
+
+def _stream_document(creds, document_id, output_format, output_path):
+    try:
+        selected_format = _resolve_docs_format(_get_app_config(), output_format)
+        metadata, chunks = docs_service.stream_document_content(
+            creds,
+            document_id,
+            selected_format,
+        )
+
+        if output_path:
+            with open(output_path, "w", encoding="utf-8") as output_file:
+                for chunk in chunks:
+                    output_file.write(chunk)
+            output.record({"id": document_id, "format": selected_format, "path": output_path})
+            output.text(
+                f"Document content saved to '{output_path}' in {selected_format} format."
+            )
+            return
+
+        if output.is_structured():
+            # Content arrives in pieces; each becomes a record of its own.
+            for chunk in chunks:
+                if chunk:
+                    output.record({"id": document_id, "format": selected_format, "text": chunk})
+            return
+
+        if selected_format == "markdown":
+            for chunk in chunks:
+                output.text(chunk, nl=False)
+            return
+
+        output.text(f"Document Title: {metadata['title']}")
+        output.text(f"Document ID: {metadata['document_id']}")
+        output.text("\nContent:")
+        has_content = False
+        for chunk in chunks:
+            if chunk:
+                has_content = True
+                output.text(chunk, nl=False)
+        if not has_content:
+            output.text("Document is empty or has no readable content.")
     except Exception as error:
         echo_exception("docs get", error)
 
 @docs.command()
-@click.argument('document_id')
+@click.argument('document_id', shell_complete=completion.complete_ids('docs'))
 @click.option('--yes', is_flag=True, help='Skip delete confirmation prompt.')
 def delete(document_id, yes):
     """Deletes a Google Doc."""
-    creds = get_credentials()
+    creds = _get_credentials()
     if not creds:
         return
 
@@ -211,38 +440,46 @@ def delete(document_id, yes):
         confirmed = click.confirm(
             f"Delete document '{document_id}'?",
             default=False,
+            err=output.is_structured(),
         )
         if not confirmed:
-            click.echo("Delete cancelled.")
+            output.text("Delete cancelled.")
             return
 
     try:
         docs_service.delete_document(creds, document_id)
-        click.echo(f"Document with ID '{document_id}' deleted successfully.")
+        output.record({"id": document_id, "deleted": True})
+        output.text(f"Document with ID '{document_id}' deleted successfully.")
     except Exception as error:
         echo_exception("docs delete", error)
 
 
 @docs.command()
-@click.argument('document_id')
+@click.argument('document_id', shell_complete=completion.complete_ids('docs'))
 @click.argument('new_title')
 def copy(document_id, new_title):
     """Copies a Google Doc with a new title."""
-    creds = get_credentials()
+    creds = _get_credentials()
     if not creds:
         return
 
     try:
         copied_doc = docs_service.copy_document(creds, document_id, new_title)
         copied_id = copied_doc.get("id")
-        click.echo(f"Copied document to: {copied_doc.get('name')} ({copied_id})")
-        click.echo(f"Document URL: https://docs.google.com/document/d/{copied_id}/edit")
+        output.record({
+            "id": copied_id,
+            "title": copied_doc.get("name"),
+            "source_id": document_id,
+            "url": f"https://docs.google.com/document/d/{copied_id}/edit",
+        })
+        output.text(f"Copied document to: {copied_doc.get('name')} ({copied_id})")
+        output.text(f"Document URL: https://docs.google.com/document/d/{copied_id}/edit")
     except Exception as error:
         echo_exception("docs copy", error)
 
 
 @docs.command(name='share')
-@click.argument('document_id')
+@click.argument('document_id', shell_complete=completion.complete_ids('docs'))
 @click.option('--email', required=True, help='Email address to share with.')
 @click.option(
     '--role',
@@ -252,35 +489,48 @@ def copy(document_id, new_title):
 )
 def share_document(document_id, email, role):
     """Shares a Google Doc with an email and role."""
-    creds = get_credentials()
+    creds = _get_credentials()
     if not creds:
         return
 
     try:
         selected_role = role.lower()
-        docs_service.share_document(creds, document_id, email, selected_role)
-        click.echo(
+        permission = docs_service.share_document(creds, document_id, email, selected_role)
+        output.record({
+            "id": document_id,
+            "permission_id": permission.get("id"),
+            "email": email,
+            "role": selected_role,
+        })
+        output.text(
             f"Shared document '{document_id}' with '{email}' as '{selected_role}'."
         )
     except Exception as error:
         echo_exception("docs share", error)
 
 @docs.command()
-@click.argument('document_id')
+@click.argument('document_id', shell_complete=completion.complete_ids('docs'))
 @click.option('--append', help='Text content to append to the document.')
 @click.option('--set', 'set_content', help='Replace all document content with this text.')
-def edit(document_id, append, set_content):
-    """Edits a Google Doc using --append or --set."""
-    creds = get_credentials()
+@click.option(
+    '--set-file',
+    'set_file',
+    type=click.File('r', encoding='utf-8'),
+    help="Replace all document content with the contents of a file ('-' for stdin).",
+)
+def edit(document_id, append, set_content, set_file):
+    """Edits a Google Doc using --append, --set or --set-file."""
+    creds = _get_credentials()
     if not creds:
         return
 
-    if append is None and set_content is None:
-        echo_error("docs edit", "Provide one edit mode: --append or --set.")
+    modes = [mode for mode in (append, set_content, set_file) if mode is not None]
+    if not modes:
+        echo_error("docs edit", "Provide one edit mode: --append, --set or --set-file.")
         return
 
-    if append is not None and set_content is not None:
-        echo_error("docs edit", "Use only one mode at a time: --append or --set.")
+    if len(modes) > 1:
+        echo_error("docs edit", "Use only one mode at a time: --append, --set or --set-file.")
         return
 
     try:
@@ -289,15 +539,214 @@ def edit(document_id, append, set_content):
                 echo_error("docs edit", "--append requires non-empty text.")
                 return
             docs_service.append_text(creds, document_id, append)
-            click.echo(f"Text appended to document ID '{document_id}' successfully.")
+            output.record({"id": document_id, "appended": True})
+            output.text(f"Text appended to document ID '{document_id}' successfully.")
             return
 
-        docs_service.set_text(creds, document_id, set_content or "")
-        click.echo(f"Document ID '{document_id}' content replaced successfully.")
+        if set_file is not None:
+            set_content = set_file.read()
+
+        request_count = docs_service.set_text(creds, document_id, set_content or "")
+        output.record({"id": document_id, "requests": request_count})
+        if not request_count:
+            output.text(f"Document ID '{document_id}' already has this content.")
+            return
+        output.text(
+            f"Document ID '{document_id}' content replaced successfully "
+            f"({request_count} edit requests)."
+        )
     except Exception as error:
         echo_exception("docs edit", error)
 
 
+@docs.command(name="apply")
+@click.argument("document_id", shell_complete=completion.complete_ids("docs"))
+@click.argument("ops_file", type=click.File("r", encoding="utf-8"))
+def apply_ops(document_id, ops_file):
+    """Applies JSON Lines edit operations to a Google Doc ('-' reads stdin)."""
+    creds = _get_credentials()
+    if not creds:
+        return
+
+    try:
+        operations = docs_ops.read_operations(ops_file)
+    except ValueError as error:
+        echo_error("docs apply", str(error))
+        return
+    if not operations:
+        echo_error("docs apply", "The operations file has no operations.")
+        return
+
+    try:
+        request_count, batch_count, revision_id = docs_ops.apply_operations(
+            creds, document_id, operations
+        )
+    except ValueError as error:
+        echo_error("docs apply", str(error))
+        return
+    except Exception as error:
+        echo_exception("docs apply", error)
+        return
+
+    output.record({
+        "id": document_id,
+        "operations": len(operations),
+        "requests": request_count,
+        "batches": batch_count,
+        "revision_id": revision_id,
+    })
+    if not request_count:
+        output.text(f"No changes for document ID '{document_id}'.")
+        return
+    output.text(
+        f"Applied {len(operations)} operations to document ID '{document_id}' "
+        f"({request_count} requests in {batch_count} batchUpdate calls)."
+    )
+    if revision_id:
+        output.text(f"Revision: {revision_id}")
+
+
+@docs.command(name="merge")
+@click.argument("template_id", shell_complete=completion.complete_ids("docs"))
+@click.argument("data_path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--name",
+    "name_template",
+    help="Title for each copy, e.g. 'Offer - {{name}}'. Defaults to '<template> - <row>'.",
+)
+@click.option(
+    "--output",
+    "output_path",
+    type=click.Path(dir_okay=False),
+    help="CSV of created documents, also used to resume. Defaults to <data>.merged.csv.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1, max=64),
+    default=16,
+    show_default=True,
+    help="Upper bound on documents created in parallel; the adaptive limit may run fewer.",
+)
+def merge_documents(template_id, data_path, name_template, output_path, workers):
+    """Creates one copy of a template Doc per CSV row, filling {{column}} placeholders."""
+    creds = _get_credentials()
+    if not creds:
+        return
+
+    output_path = output_path or docs_merge.default_output_path(data_path)
+
+    def report_result(result):
+        output.record(result)
+        output.text(f"Row {result['row']}: {result['name']} ({result['document_id']})")
+
+    try:
+        totals = docs_merge.merge(
+            creds,
+            template_id,
+            data_path,
+            output_path,
+            name_template=name_template,
+            workers=workers,
+            on_result=report_result,
+        )
+    except Exception as error:
+        echo_exception("docs merge", error)
+        return
+
+    for row_number, error in totals["failed"]:
+        echo_exception(f"docs merge (row {row_number})", error)
+    output.text(
+        f"Merged {totals['merged']} documents, skipped {totals['skipped']} already done, "
+        f"{len(totals['failed'])} failed."
+    )
+    output.text(f"Results written to: {output_path}")
+
+
+@docs.command(name="grep")
+@click.argument("pattern")
+@click.option("-i", "--ignore-case", is_flag=True, help="Match case-insensitively.")
+@click.option("-F", "--fixed-strings", is_flag=True, help="Treat PATTERN as plain text, not a regex.")
+@click.option(
+    "-l",
+    "--files-with-matches",
+    is_flag=True,
+    help="Only list matching documents, not lines.",
+)
+@click.option(
+    "--max-age",
+    type=click.IntRange(min=0),
+    default=300,
+    show_default=True,
+    help="Seconds to trust the local index before checking Drive for changed docs.",
+)
+@click.option("--refresh", is_flag=True, help="Check Drive for changed docs first.")
+@click.option("--offline", is_flag=True, help="Never contact Google; search the index as-is.")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1, max=64),
+    default=16,
+    show_default=True,
+    help="Upper bound on documents fetched in parallel while updating the index.",
+)
+def grep_documents(
+    pattern,
+    ignore_case,
+    fixed_strings,
+    files_with_matches,
+    max_age,
+    refresh,
+    offline,
+    workers,
+):
+    """Searches the text of all Docs through a local index."""
+    creds = None
+    if not offline:
+        creds = _get_credentials(read_only=True)
+        if not creds:
+            return
+
+    path = docs_index.index_path(_active_profile())
+    try:
+        totals = docs_index.ensure_index(
+            creds,
+            path,
+            max_age=max_age,
+            refresh=refresh,
+            offline=offline,
+            workers=workers,
+        )
+        if totals is not None:
+            for document_id, error in totals["failed"]:
+                echo_exception(f"docs grep (index {document_id})", error)
+            click.echo(
+                f"Index updated: {totals['indexed']} fetched, {totals['unchanged']} unchanged, "
+                f"{totals['removed']} removed.",
+                err=True,
+            )
+
+        reported = set()
+        for document_id, title, line_number, snippet in docs_index.search(
+            pattern,
+            path,
+            ignore_case=ignore_case,
+            fixed_strings=fixed_strings,
+        ):
+            if files_with_matches:
+                if document_id not in reported:
+                    reported.add(document_id)
+                    output.record({"id": document_id, "title": title})
+                    output.text(f"{title} ({document_id})")
+                continue
+            output.record({"id": document_id, "title": title, "line": line_number, "text": snippet})
+            output.text(f"{title} ({document_id}):{line_number}: {snippet}")
+    except re.error as error:
+        echo_error("docs grep", f"Invalid pattern: {error}")
+    except ValueError as error:
+        echo_error("docs grep", str(error))
+    except Exception as error:
+        echo_exception("docs grep", error)
+
+
 @gsuite.group()
 def sheets():
     """Commands for Google Sheets."""
@@ -305,21 +754,65 @@ def sheets():
 
 
 @sheets.command(name="create")
-@click.argument("title")
-def create_sheet(title):
+@click.argument("title", required=False)
+@click.option(
+    "--spec",
+    "spec_file",
+    type=click.File("r", encoding="utf-8"),
+    default=None,
+    help="JSON spec with tabs, initial data and formatting ('-' reads stdin).",
+)
+def create_sheet(title, spec_file):
     """Creates a new Google Sheet."""
-    creds = get_credentials()
+    spec = None
+    if spec_file is not None:
+        try:
+            spec = json.load(spec_file)
+        except ValueError as error:
+            echo_error("sheets create", f"Invalid spec JSON: {error}")
+            return
+        if not isinstance(spec, dict):
+            echo_error("sheets create", "The spec must be a JSON object.")
+            return
+    if not title and not (spec and spec.get("title")):
+        echo_error("sheets create", "Provide a TITLE argument or a 'title' in the --spec file.")
+        return
+
+    creds = _get_credentials()
     if not creds:
         return
 
     try:
-        spreadsheet = sheets_service.create_spreadsheet(creds, title)
+        if spec is None:
+            spreadsheet = sheets_service.create_spreadsheet(creds, title)
+            builder = None
+        else:
+            spreadsheet, builder = sheets_builder.create_from_spec(creds, spec, title)
         spreadsheet_id = spreadsheet.get("spreadsheetId")
-        click.echo(f"Created spreadsheet with title: {title}")
-        click.echo(f"Spreadsheet ID: {spreadsheet_id}")
-        click.echo(
+        created_title = spreadsheet.get("properties", {}).get("title", title)
+        record = {
+            "id": spreadsheet_id,
+            "title": created_title,
+            "url": spreadsheet.get("spreadsheetUrl"),
+        }
+        if builder is not None:
+            record["tabs"] = [sheet["properties"]["title"] for sheet in spreadsheet.get("sheets", [])]
+            record["requests"] = builder.requests_sent
+            record["batches"] = builder.batches_sent
+        output.record(record)
+        output.text(f"Created spreadsheet with title: {created_title}")
+        output.text(f"Spreadsheet ID: {spreadsheet_id}")
+        output.text(
             f"Spreadsheet URL: {spreadsheet.get('spreadsheetUrl')}"
         )
+        if builder is not None:
+            output.text(f"Tabs: {', '.join(record['tabs'])}")
+            output.text(
+                f"Applied {builder.requests_sent} structural requests "
+                f"in {builder.batches_sent} batchUpdate calls."
+            )
+    except ValueError as error:
+        echo_error("sheets create", str(error))
     except Exception as error:
         echo_exception("sheets create", error)
 
@@ -327,52 +820,66 @@ def create_sheet(title):
 @sheets.command(name="list")
 def list_sheets():
     """Lists Google Sheets."""
-    creds = get_credentials()
+    creds = _get_credentials(read_only=True)
     if not creds:
         return
 
     try:
-        items = sheets_service.list_spreadsheets(creds)
-        if not items:
-            click.echo("No spreadsheets found.")
-            return
-
-        click.echo("Spreadsheets:")
-        for item in items:
-            click.echo(f"{item['name']} ({item['id']})")
+        _echo_files(
+            "sheets",
+            sheets_service.iter_spreadsheets(creds),
+            "Spreadsheets:",
+            "No spreadsheets found.",
+        )
     except Exception as error:
         echo_exception("sheets list", error)
 
 
 @sheets.command(name="read")
-@click.argument("spreadsheet_id")
+@click.argument("spreadsheet_id", shell_complete=completion.complete_ids("sheets"))
 @click.argument("cell_range")
 def read_sheet(spreadsheet_id, cell_range):
     """Reads values from a spreadsheet range."""
-    creds = get_credentials()
+    creds = _get_credentials(read_only=True)
     if not creds:
         return
 
+    if output.is_structured():
+        # One record per row, parsed out of the response while it downloads.
+        try:
+            for key, value in sheets_service.stream_values(creds, spreadsheet_id, cell_range):
+                if key == "row":
+                    output.record(value)
+        except Exception as error:
+            echo_exception("sheets read", error)
+        return
+
     try:
         result = sheets_service.read_values(creds, spreadsheet_id, cell_range)
         values = result.get("values", [])
         if not values:
-            click.echo("No values found.")
+            output.text("No values found.")
             return
 
-        click.echo(f"Range: {result.get('range', cell_range)}")
-        click.echo(f"Major Dimension: {result.get('majorDimension', 'ROWS')}")
-        click.echo("Values:")
-        for row in values:
-            click.echo("\t".join(str(cell) for cell in row))
+        output.text(f"Range: {result.get('range', cell_range)}")
+        output.text(f"Major Dimension: {result.get('majorDimension', 'ROWS')}")
+        output.text("Values:")
+        for rows in values.chunks():
+            output.text("\n".join("\t".join(map(str, row)) for row in rows))
     except Exception as error:
         echo_exception("sheets read", error)
 
 
 @sheets.command(name="write")
-@click.argument("spreadsheet_id")
+@click.argument("spreadsheet_id", shell_complete=completion.complete_ids("sheets"))
 @click.argument("cell_range")
-@click.argument("data")
+@click.argument("data", required=False)
+@click.option(
+    "--file",
+    "data_file",
+    type=click.File("r", encoding="utf-8"),
+    help="Read values from a CSV or JSON file ('-' for stdin) instead of DATA.",
+)
 @click.option(
     "--major-dimension",
     type=click.Choice(["rows", "columns"], case_sensitive=False),
@@ -387,20 +894,37 @@ def read_sheet(spreadsheet_id, cell_range):
     show_default=True,
     help="How input data should be interpreted by Sheets.",
 )
+@click.option(
+    "--only-changed",
+    is_flag=True,
+    help="Read the range first and write only the rows that differ.",
+)
 def write_sheet(
     spreadsheet_id,
     cell_range,
     data,
+    data_file,
     major_dimension,
     value_input_option,
+    only_changed,
 ):
     """Writes values to a spreadsheet range."""
-    creds = get_credentials()
+    if (data is None) == (data_file is None):
+        echo_error("sheets write", "Provide either DATA or --file <file|->.")
+        return
+    if only_changed and major_dimension.lower() != "rows":
+        echo_error("sheets write", "--only-changed compares rows; use --major-dimension rows.")
+        return
+
+    creds = _get_credentials()
     if not creds:
         return
 
     try:
-        values = sheets_service.parse_input_data(data)
+        if data_file is not None:
+            values = sheets_service.parse_input_file(data_file)
+        else:
+            values = sheets_service.parse_input_data(data)
     except ValueError as error:
         echo_error("sheets write", str(error))
         return
@@ -408,6 +932,26 @@ def write_sheet(
         echo_exception("sheets write", error)
         return
 
+    if only_changed:
+        try:
+            result = sheets_service.write_changed_values(
+                creds,
+                spreadsheet_id,
+                cell_range,
+                values,
+                value_input_option=value_input_option.upper(),
+            )
+            output.record(result)
+            output.text(
+                f"Updated {result['changedRows']} changed rows "
+                f"in {len(result['responses'])} ranges "
+                f"({result['unchangedRows']} unchanged)."
+            )
+            output.text(f"Updated cells: {result.get('totalUpdatedCells', 0)}")
+        except Exception as error:
+            echo_exception("sheets write", error)
+        return
+
     try:
         result = sheets_service.write_values(
             creds,
@@ -417,21 +961,231 @@ def write_sheet(
             major_dimension=major_dimension.upper(),
             value_input_option=value_input_option.upper(),
         )
-        click.echo(f"Updated range: {result.get('updatedRange', cell_range)}")
-        click.echo(f"Updated rows: {result.get('updatedRows', 0)}")
-        click.echo(f"Updated columns: {result.get('updatedColumns', 0)}")
-        click.echo(f"Updated cells: {result.get('updatedCells', 0)}")
+        output.record(result)
+        output.text(f"Updated range: {result.get('updatedRange', cell_range)}")
+        output.text(f"Updated rows: {result.get('updatedRows', 0)}")
+        output.text(f"Updated columns: {result.get('updatedColumns', 0)}")
+        output.text(f"Updated cells: {result.get('updatedCells', 0)}")
     except Exception as error:
         echo_exception("sheets write", error)
 
 
+@sheets.command(name="append")
+@click.argument("spreadsheet_id", shell_complete=completion.complete_ids("sheets"))
+@click.argument("cell_range")
+@click.argument("data", required=False)
+@click.option(
+    "--follow",
+    "follow_path",
+    help="Tail a file (or '-' for stdin) and append each line as a row.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=500,
+    show_default=True,
+    help="Flush after this many buffered rows.",
+)
+@click.option(
+    "--flush-interval",
+    type=click.FloatRange(min=0),
+    default=2.0,
+    show_default=True,
+    help="Flush buffered rows after this many seconds.",
+)
+@click.option(
+    "--max-buffered-rows",
+    type=click.IntRange(min=1),
+    default=10000,
+    show_default=True,
+    help="Pause reading input when this many rows are waiting to be sent.",
+)
+@click.option(
+    "--delimiter",
+    default=",",
+    show_default=True,
+    help="Field delimiter for followed lines.",
+)
+@click.option(
+    "--exit-on-eof",
+    is_flag=True,
+    help="Stop at the end of the followed file instead of waiting for more lines.",
+)
+@click.option(
+    "--value-input-option",
+    type=click.Choice(["raw", "user_entered"], case_sensitive=False),
+    default="raw",
+    show_default=True,
+    help="How input data should be interpreted by Sheets.",
+)
+def append_sheet(
+    spreadsheet_id,
+    cell_range,
+    data,
+    follow_path,
+    batch_size,
+    flush_interval,
+    max_buffered_rows,
+    delimiter,
+    exit_on_eof,
+    value_input_option,
+):
+    """Appends rows after the last row of a table range."""
+    if (data is None) == (follow_path is None):
+        echo_error("sheets append", "Provide either DATA or --follow <file|->.")
+        return
+
+    creds = _get_credentials()
+    if not creds:
+        return
+
+    if data is not None:
+        try:
+            values = sheets_service.parse_input_data(data)
+        except ValueError as error:
+            echo_error("sheets append", str(error))
+            return
+
+        try:
+            result = sheets_service.append_values(
+                creds,
+                spreadsheet_id,
+                cell_range,
+                values,
+                value_input_option=value_input_option.upper(),
+            )
+            updates = result.get("updates", {})
+            output.record(updates)
+            output.text(f"Appended range: {updates.get('updatedRange', cell_range)}")
+            output.text(f"Appended rows: {updates.get('updatedRows', 0)}")
+        except Exception as error:
+            echo_exception("sheets append", error)
+        return
+
+    def report_flush(row_count, offset):
+        output.record({"rows": row_count, "offset": offset})
+        output.text(f"Appended {row_count} rows (committed offset {offset}).")
+
+    def report_retry(attempt, delay, error):
+        status = getattr(getattr(error, "resp", None), "status", None)
+        reason = f"HTTP {status}" if status is not None else str(error)
+        click.echo(
+            f"Append failed ({reason}); retrying in {delay:g}s "
+            f"(attempt {attempt} of {sheets_follow.MAX_APPEND_ATTEMPTS}).",
+            err=True,
+        )
+
+    try:
+        totals = sheets_follow.follow(
+            creds,
+            spreadsheet_id,
+            cell_range,
+            follow_path,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_buffered_rows=max_buffered_rows,
+            value_input_option=value_input_option.upper(),
+            delimiter=delimiter,
+            exit_on_eof=exit_on_eof,
+            on_flush=report_flush,
+            on_retry=report_retry,
+        )
+        output.record(totals)
+        output.text(
+            f"Stopped following. Appended {totals['rows']} rows "
+            f"in {totals['batches']} batches."
+        )
+    except ValueError as error:
+        echo_error("sheets append", f"Invalid input line: {error}")
+    except Exception as error:
+        echo_exception("sheets append", error)
+
+
+@sheets.command(name="query")
+@click.argument("spreadsheet_id", shell_complete=completion.complete_ids("sheets"))
+@click.argument("sql", required=False)
+@click.option("--sheet", "sheet_title", help="Sheet (tab) to snapshot. Defaults to the first sheet.")
+@click.option(
+    "--index",
+    "index_columns",
+    multiple=True,
+    help="Create an index on this column in the local snapshot. Repeatable.",
+)
+@click.option(
+    "--max-age",
+    type=click.IntRange(min=0),
+    default=300,
+    show_default=True,
+    help="Seconds to trust the snapshot before revalidating with Drive.",
+)
+@click.option("--refresh", is_flag=True, help="Download a fresh snapshot first.")
+@click.option("--offline", is_flag=True, help="Never contact Google; use the snapshot as-is.")
+@click.option("--schema", is_flag=True, help="Show snapshot columns and types instead of querying.")
+def query_sheet(
+    spreadsheet_id,
+    sql,
+    sheet_title,
+    index_columns,
+    max_age,
+    refresh,
+    offline,
+    schema,
+):
+    """Runs SQL against a local snapshot of a sheet (table name: sheet)."""
+    if not sql and not schema:
+        echo_error("sheets query", "Provide a SQL statement or use --schema.")
+        return
+
+    creds = None
+    if not offline:
+        creds = _get_credentials(read_only=True)
+        if not creds:
+            return
+
+    try:
+        snapshot, _ = sheets_query.ensure_snapshot(
+            creds,
+            spreadsheet_id,
+            sheet_title=sheet_title,
+            # Pooled reads may come from any pool account, so they are kept
+            # apart from every single profile's snapshots.
+            profile="pool" if _root_options().get("pool") else _active_profile(),
+            max_age=max_age,
+            refresh=refresh,
+            offline=offline,
+        )
+        if index_columns:
+            sheets_query.ensure_indexes(snapshot, index_columns)
+
+        if schema:
+            columns, row_count = sheets_query.describe_snapshot(snapshot)
+            output.text(f"Table: {sheets_query.TABLE_NAME} ({row_count} rows)")
+            for name, column_type in columns:
+                output.record({"name": name, "type": column_type})
+                output.text(f"  {name}\t{column_type}")
+            return
+
+        columns, rows = sheets_query.run_query(snapshot, sql)
+        if columns:
+            output.text("\t".join(columns))
+        for row in rows:
+            output.record(dict(zip(columns, row)))
+            output.text("\t".join("" if cell is None else str(cell) for cell in row))
+    except sqlite3.Error as error:
+        echo_error("sheets query", f"SQL error: {error}")
+    except ValueError as error:
+        echo_error("sheets query", str(error))
+    except Exception as error:
+        echo_exception("sheets query", error)
+
+
 @sheets.command(name="clear")
-@click.argument("spreadsheet_id")
+@click.argument("spreadsheet_id", shell_complete=completion.complete_ids("sheets"))
 @click.argument("cell_range")
 @click.option('--yes', is_flag=True, help='Skip clear confirmation prompt.')
 def clear_sheet(spreadsheet_id, cell_range, yes):
     """Clears values in a spreadsheet range."""
-    creds = get_credentials()
+    creds = _get_credentials()
     if not creds:
         return
 
@@ -440,14 +1194,16 @@ def clear_sheet(spreadsheet_id, cell_range, yes):
         confirmed = click.confirm(
             f"Clear range '{cell_range}' in spreadsheet '{spreadsheet_id}'?",
             default=False,
+            err=output.is_structured(),
         )
         if not confirmed:
-            click.echo("Clear cancelled.")
+            output.text("Clear cancelled.")
             return
 
     try:
         result = sheets_service.clear_values(creds, spreadsheet_id, cell_range)
-        click.echo(
+        output.record(result)
+        output.text(
             f"Cleared range: {result.get('clearedRange', cell_range)}"
         )
     except Exception as error:
@@ -464,18 +1220,24 @@ def forms():
 @click.argument("title")
 def create_form(title):
     """Creates a new Google Form."""
-    creds = get_credentials()
+    creds = _get_credentials()
     if not creds:
         return
 
     try:
         form = forms_service.create_form(creds, title)
         form_id = form.get("formId")
-        click.echo(f"Created form with title: {title}")
-        click.echo(f"Form ID: {form_id}")
-        click.echo(f"Edit URL: https://docs.google.com/forms/d/{form_id}/edit")
+        output.record({
+            "id": form_id,
+            "title": title,
+            "editUrl": f"https://docs.google.com/forms/d/{form_id}/edit",
+            "responderUri": form.get("responderUri"),
+        })
+        output.text(f"Created form with title: {title}")
+        output.text(f"Form ID: {form_id}")
+        output.text(f"Edit URL: https://docs.google.com/forms/d/{form_id}/edit")
         if form.get("responderUri"):
-            click.echo(f"Responder URL: {form.get('responderUri')}")
+            output.text(f"Responder URL: {form.get('responderUri')}")
     except Exception as error:
         echo_exception("forms create", error)
 
@@ -483,25 +1245,18 @@ def create_form(title):
 @forms.command(name="list")
 def list_forms():
     """Lists Google Forms."""
-    creds = get_credentials()
+    creds = _get_credentials(read_only=True)
     if not creds:
         return
 
     try:
-        items = forms_service.list_forms(creds)
-        if not items:
-            click.echo("No forms found.")
-            return
-
-        click.echo("Forms:")
-        for item in items:
-            click.echo(f"{item['name']} ({item['id']})")
+        _echo_files("forms", forms_service.iter_forms(creds), "Forms:", "No forms found.")
     except Exception as error:
         echo_exception("forms list", error)
 
 
 @forms.command(name="add-question")
-@click.argument("form_id")
+@click.argument("form_id", shell_complete=completion.complete_ids("forms"))
 @click.option(
     "--type",
     "question_type",
@@ -516,7 +1271,7 @@ def list_forms():
 )
 def add_question(form_id, question_type, question_title, options):
     """Adds a question to a Google Form."""
-    creds = get_credentials()
+    creds = _get_credentials()
     if not creds:
         return
 
@@ -539,7 +1294,13 @@ def add_question(form_id, question_type, question_title, options):
             question_title,
             parsed_options,
         )
-        click.echo(
+        output.record({
+            "id": form_id,
+            "type": question_type.lower(),
+            "title": question_title,
+            "options": parsed_options,
+        })
+        output.text(
             f"Added '{question_type.lower()}' question to form '{form_id}'."
         )
     except ValueError as error:
@@ -549,41 +1310,314 @@ def add_question(form_id, question_type, question_title, options):
 
 
 @forms.command(name="get-responses")
-@click.argument("form_id")
+@click.argument("form_id", shell_complete=completion.complete_ids("forms"))
 def get_responses(form_id):
     """Gets responses for a Google Form."""
-    creds = get_credentials()
+    creds = _get_credentials(read_only=True)
     if not creds:
         return
 
-    try:
-        result = forms_service.get_responses(creds, form_id)
-        responses = result.get("responses", [])
-
-        click.echo(f"Form ID: {form_id}")
-        click.echo(f"Total responses: {len(responses)}")
-        if not responses:
-            return
+    if output.is_structured():
+        # Pages are written out as they arrive instead of collected first.
+        try:
+            for response in forms_service.iter_responses(creds, form_id):
+                output.record(response)
+        except Exception as error:
+            echo_exception("forms get-responses", error)
+        return
 
-        for response in responses:
+    output.text(f"Form ID: {form_id}")
+    total = 0
+    try:
+        for response in forms_service.iter_responses(creds, form_id):
+            total += 1
             response_id = response.get("responseId", "unknown")
             submitted = response.get("lastSubmittedTime", "unknown")
-            click.echo(f"Response {response_id} ({submitted})")
+            output.text(f"Response {response_id} ({submitted})")
 
             answers = response.get("answers", {})
             if not answers:
-                click.echo("  No answers.")
+                output.text("  No answers.")
                 continue
 
             for question_id, answer_data in answers.items():
                 values = forms_service.extract_answer_values(answer_data)
                 if values:
-                    click.echo(f"  {question_id}: {', '.join(values)}")
+                    output.text(f"  {question_id}: {', '.join(values)}")
                 else:
-                    click.echo(f"  {question_id}: [non-text answer]")
+                    output.text(f"  {question_id}: [non-text answer]")
     except Exception as error:
         echo_exception("forms get-responses", error)
+        return
+
+    # Responses are printed page by page, so the total comes last.
+    output.text(f"Total responses: {total}")
+
+
+@forms.command(name="sync-to-sheet")
+@click.argument("form_id", shell_complete=completion.complete_ids("forms"))
+@click.argument("spreadsheet_id", shell_complete=completion.complete_ids("sheets"))
+@click.option("--sheet", "sheet_title", help="Sheet (tab) to append to. Defaults to the first sheet.")
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="Rows sent per append request.",
+)
+def sync_to_sheet(form_id, spreadsheet_id, sheet_title, batch_size):
+    """Appends new form responses to a spreadsheet, one row per response."""
+    creds = _get_credentials()
+    if not creds:
+        return
+
+    def report_batch(row_count):
+        output.record({"appended": row_count})
+        output.text(f"Appended {row_count} responses.")
+
+    try:
+        totals = forms_sync.sync(
+            creds,
+            form_id,
+            spreadsheet_id,
+            sheet_title=sheet_title,
+            batch_size=batch_size,
+            on_batch=report_batch,
+        )
+    except Exception as error:
+        echo_exception("forms sync-to-sheet", error)
+        return
+
+    output.record(totals)
+    if not totals["appended"]:
+        output.text("No new responses.")
+        return
+    output.text(
+        f"Synced {totals['appended']} new responses in {totals['batches']} batches "
+        f"({totals['duplicates']} already synced)."
+    )
+
+
+@gsuite.group()
+def drive():
+    """Commands for Google Drive folders and sharing."""
+    pass
+
+
+@drive.command(name="copy-tree")
+@click.argument("folder_id")
+@click.argument("dest_name")
+@click.option("--parent", "parent_id", help="Folder to create the copy in. Defaults to the source's parent.")
+@click.option(
+    "--mapping",
+    "mapping_path",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    help="CSV file for the source-to-copy ID mapping ('-' for stdout). Defaults to '<dest_name>.mapping.csv'.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1, max=64),
+    default=8,
+    show_default=True,
+    help="Upper bound on batch requests in flight.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1, max=100),
+    default=20,
+    show_default=True,
+    help="Copy calls per batch request.",
+)
+def copy_tree(folder_id, dest_name, parent_id, mapping_path, workers, batch_size):
+    """Copies a Drive folder and everything below it into a new folder."""
+    creds = _get_credentials()
+    if not creds:
+        return
+
+    mapping_path = mapping_path or drive_copy.default_mapping_path(dest_name)
+    to_stdout = mapping_path == "-"
+    # With --output ndjson or json the mapping records are the output, so
+    # '-' does not also write the CSV to stdout.
+    write_csv = not (to_stdout and output.is_structured())
+    with click.open_file(mapping_path if write_csv else os.devnull, "w", encoding="utf-8") as mapping_file:
+        writer = csv.DictWriter(mapping_file, fieldnames=drive_copy.MAPPING_FIELDS)
+        writer.writeheader()
+
+        def report_copied(record):
+            output.record(record)
+            writer.writerow(record)
+            mapping_file.flush()
+
+        try:
+            totals = drive_copy.copy_tree(
+                creds,
+                folder_id,
+                dest_name,
+                parent_id=parent_id,
+                workers=workers,
+                batch_size=batch_size,
+                on_copied=report_copied,
+            )
+        except ValueError as error:
+            echo_error("drive copy-tree", str(error))
+            return
+        except Exception as error:
+            echo_exception("drive copy-tree", error)
+            return
+
+    for path, error in totals["failed"]:
+        echo_exception(f"drive copy-tree ({path})", error)
+    click.echo(
+        f"Copied {totals['files']} files and {totals['folders']} folders, "
+        f"{len(totals['failed'])} failed. New folder ID: {totals['root_id']}",
+        err=to_stdout or output.is_structured(),
+    )
+    if write_csv and not to_stdout:
+        output.text(f"Mapping written to: {mapping_path}")
+
+
+@drive.command(name="permissions-report")
+@click.option(
+    "--report",
+    "report_path",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    default="-",
+    show_default=True,
+    help="CSV file for the report ('-' for stdout).",
+)
+@click.option(
+    "--type",
+    "report_types",
+    multiple=True,
+    type=click.Choice(sorted(drive_watch.WATCH_TYPES), case_sensitive=False),
+    help="File type to audit. Repeatable. Defaults to all types.",
+)
+@click.option(
+    "--full",
+    is_flag=True,
+    help="Fetch the permissions of every file, not only those changed since the last run.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1, max=64),
+    default=8,
+    show_default=True,
+    help="Upper bound on batch requests in flight.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1, max=100),
+    default=50,
+    show_default=True,
+    help="permissions.list calls per batch request.",
+)
+def permissions_report(report_path, report_types, full, workers, batch_size):
+    """Reports who has access to every doc, sheet and form you own."""
+    creds = _get_credentials()
+    if not creds:
+        return
+
+    selected_types = sorted({item.lower() for item in report_types}) or sorted(
+        drive_watch.WATCH_TYPES
+    )
+    to_stdout = report_path == "-"
+    # With --output ndjson or json the records are the report, so '-' does
+    # not also write the CSV to stdout.
+    write_csv = not (to_stdout and output.is_structured())
+    with click.open_file(report_path if write_csv else os.devnull, "w", encoding="utf-8") as report_file:
+        writer = csv.DictWriter(report_file, fieldnames=drive_permissions.REPORT_FIELDS)
+        writer.writeheader()
+
+        def report_row(row):
+            output.record(row)
+            writer.writerow(row)
+
+        try:
+            totals = drive_permissions.permissions_report(
+                creds,
+                drive_permissions.state_file_path(_active_profile()),
+                types=selected_types,
+                full=full,
+                workers=workers,
+                batch_size=batch_size,
+                on_row=report_row,
+            )
+        except Exception as error:
+            echo_exception("drive permissions-report", error)
+            return
+
+    for file_id, error in totals["failed"]:
+        echo_exception(f"drive permissions-report ({file_id})", error)
+    click.echo(
+        f"Reported {totals['permissions']} permissions on {totals['files']} files "
+        f"({totals['fetched']} fetched, {totals['unchanged']} unchanged, "
+        f"{len(totals['failed'])} failed); {totals['anyone_with_link']} files "
+        "are open to anyone with the link.",
+        err=to_stdout or output.is_structured(),
+    )
+    if write_csv and not to_stdout:
+        output.text(f"Report written to: {report_path}")
+
+
+@gsuite.command(name="watch")
+@click.option(
+    "--type",
+    "watch_types",
+    multiple=True,
+    type=click.Choice(sorted(drive_watch.WATCH_TYPES), case_sensitive=False),
+    help="File type to report. Repeatable. Defaults to all types.",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.1),
+    default=5.0,
+    show_default=True,
+    help="Poll interval in seconds while changes are arriving.",
+)
+@click.option(
+    "--max-interval",
+    type=click.FloatRange(min=0.1),
+    default=300.0,
+    show_default=True,
+    help="Longest poll interval reached after quiet polls.",
+)
+@click.option("--once", is_flag=True, help="Poll a single time and exit.")
+def watch(watch_types, interval, max_interval, once):
+    """Streams Drive changes to docs, sheets and forms as NDJSON."""
+    creds = _get_credentials(read_only=True)
+    if not creds:
+        return
+    profile = _active_profile()
+    if isinstance(creds, CredentialPool):
+        # A page token belongs to one account's change feed, so every poll
+        # runs as the same profile and its token is stored under that profile.
+        profile, creds = creds.pin(profile)
+
+    selected_types = sorted({item.lower() for item in watch_types}) or sorted(
+        drive_watch.WATCH_TYPES
+    )
+
+    def emit(event):
+        if output.is_structured():
+            output.record(event)
+        else:
+            output.text(json.dumps(event))
+
+    try:
+        drive_watch.watch(
+            creds,
+            profile,
+            selected_types,
+            emit,
+            min_interval=interval,
+            max_interval=max(interval, max_interval),
+            once=once,
+        )
+    except KeyboardInterrupt:
+        pass
+    except Exception as error:
+        echo_exception("watch", error)
 
 
 if __name__ == '__main__':
-    gsuite()
+    gsuite(prog_name="gsuite", complete_var="_GSUITE_COMPLETE")
@@ -13,6 +13,10 @@ DEFAULT_CONFIG = {
         "docs_delete": True,
         "sheets_clear": True,
     },
+    "pool": {
+        "profiles": [],
+        "requests_per_minute": 60,
+    },
 }
 
 
@@ -1,35 +1,55 @@
+import json
 import os
-from urllib.error import HTTPError, URLError
+import shutil
 from urllib.parse import urlencode
-from urllib.request import Request, urlopen
-
-from google_auth_oauthlib.flow import InstalledAppFlow
 
 from services.config import (
     CLIENT_SECRETS_FILE,
-    CREDENTIALS_FILE,
     TOKEN_REVOKE_URL,
     SCOPES,
 )
-from services.credentials import ensure_credentials_dir, load_token_payload
+from services.credentials import (
+    credentials_file,
+    ensure_credentials_dir,
+    load_token_payload,
+    validate_profile_name,
+)
+
+
+def add_service_account(profile, key_file):
+    validate_profile_name(profile)
+    with open(key_file, "r", encoding="utf-8") as source:
+        payload = json.load(source)
+    if payload.get("type") != "service_account":
+        raise ValueError(f"'{key_file}' is not a service account key file.")
 
+    ensure_credentials_dir(profile)
+    shutil.copyfile(key_file, credentials_file(profile))
+    os.chmod(credentials_file(profile), 0o600)
 
-def login():
-    ensure_credentials_dir()
+
+def login(profile=None):
+    validate_profile_name(profile)
+    ensure_credentials_dir(profile)
 
     if not os.path.exists(CLIENT_SECRETS_FILE):
         raise FileNotFoundError(
             f"client_secrets.json not found at {CLIENT_SECRETS_FILE}"
         )
 
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRETS_FILE, SCOPES)
     creds = flow.run_local_server(port=0)
 
-    with open(CREDENTIALS_FILE, "w", encoding="utf-8") as token_file:
+    with open(credentials_file(profile), "w", encoding="utf-8") as token_file:
         token_file.write(creds.to_json())
 
 
 def _revoke_refresh_token(refresh_token):
+    from urllib.error import HTTPError, URLError
+    from urllib.request import Request, urlopen
+
     encoded_data = urlencode({"token": refresh_token}).encode("utf-8")
     request = Request(
         TOKEN_REVOKE_URL,
@@ -46,8 +66,9 @@ def _revoke_refresh_token(refresh_token):
         return False, f"Token revocation request failed: {error.reason}"
 
 
-def logout():
-    if not os.path.exists(CREDENTIALS_FILE):
+def logout(profile=None):
+    token_path = credentials_file(profile)
+    if not os.path.exists(token_path):
         return {
             "credentials_found": False,
             "credentials_deleted": False,
@@ -56,7 +77,7 @@ def logout():
             "revoke_error": None,
         }
 
-    payload = load_token_payload()
+    payload = load_token_payload(profile)
     refresh_token = payload.get("refresh_token")
 
     revocation_attempted = bool(refresh_token)
@@ -65,7 +86,7 @@ def logout():
     if refresh_token:
         token_revoked, revoke_error = _revoke_refresh_token(refresh_token)
 
-    os.remove(CREDENTIALS_FILE)
+    os.remove(token_path)
 
     return {
         "credentials_found": True,
@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+import time
+
+from services.config import CACHE_DIR, DEFAULT_PROFILE
+
+
+COMPLETION_CACHE_FILE = os.path.join(CACHE_DIR, "completion.json")
+MAX_ENTRIES = 500
+# Entries older than this trigger a background listing on the next completion.
+REFRESH_AFTER_SECONDS = 3600
+# Keystrokes arrive far faster than a listing finishes; start at most one
+# background refresh per this many seconds.
+REFRESH_RETRY_SECONDS = 60
+
+CLI_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gsuite_cli.py")
+
+
+def _load():
+    try:
+        with open(COMPLETION_CACHE_FILE, "r", encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def remember(profile, kind, files):
+    """Stores the latest listing of ``kind`` (docs, sheets or forms) for completion.
+
+    The cache only speeds up typing, so failing to write it is ignored.
+    """
+    cache = _load()
+    entries = cache.setdefault(profile or DEFAULT_PROFILE, {})
+    entries[kind] = {
+        "updated": time.time(),
+        "items": [
+            {"id": item["id"], "name": item.get("name", "")}
+            for item in files[:MAX_ENTRIES]
+        ],
+    }
+    temp_path = f"{COMPLETION_CACHE_FILE}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(temp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(temp_path, COMPLETION_CACHE_FILE)
+    except OSError:
+        pass
+
+
+def _refresh_in_background(profile, kind):
+    import subprocess
+
+    stamp_path = os.path.join(CACHE_DIR, f"completion-{profile}-{kind}.refresh")
+    try:
+        if time.time() - os.path.getmtime(stamp_path) < REFRESH_RETRY_SECONDS:
+            return
+    except OSError:
+        pass
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(stamp_path, "w", encoding="utf-8"):
+            pass
+        # The list command writes the cache itself; its output is discarded.
+        # The completion variables are dropped so the child runs the command
+        # instead of completing again.
+        env = {
+            key: value for key, value in os.environ.items()
+            if not key.startswith("COMP_") and not key.endswith("_COMPLETE")
+        }
+        subprocess.Popen(
+            [sys.executable, CLI_SCRIPT, "--profile", profile, kind, "list"],
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def complete_ids(kind):
+    """Returns a click ``shell_complete`` callback for IDs of ``kind``.
+
+    Candidates come only from the local cache written by the list commands,
+    matched by ID prefix or by a substring of the file name, so completion
+    never waits on the network.
+    """
+
+    def complete(ctx, param, incomplete):
+        from click.shell_completion import CompletionItem
+
+        profile = ctx.find_root().params.get("profile") or DEFAULT_PROFILE
+        entry = _load().get(profile, {}).get(kind, {})
+        if time.time() - entry.get("updated", 0) > REFRESH_AFTER_SECONDS:
+            _refresh_in_background(profile, kind)
+
+        needle = incomplete.lower()
+        return [
+            CompletionItem(item["id"], help=item["name"])
+            for item in entry.get("items", [])
+            if item["id"].startswith(incomplete) or needle in item["name"].lower()
+        ]
+
+    return complete
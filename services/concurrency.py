@@ -0,0 +1,155 @@
+import random
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from services.tracing import trace
+
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 6
+MAX_BACKOFF_SECONDS = 30.0
+
+
+class AimdLimiter:
+    """Additive-increase/multiplicative-decrease limit on in-flight requests to one API.
+
+    Every healthy response adds ``1 / limit``, so the limit grows by about one
+    per round of requests. It only grows while the limit is actually in use
+    and latency stays within ``latency_tolerance`` times the fastest response
+    seen. A 429 or 5xx multiplies the limit by ``decrease``. Responses to
+    requests that were already in flight when the limit was cut do not cut it
+    again, so one burst of errors counts as a single congestion signal.
+    """
+
+    def __init__(
+        self,
+        api,
+        initial=4,
+        minimum=1,
+        maximum=64,
+        decrease=0.5,
+        latency_tolerance=2.0,
+    ):
+        self.api = api
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._min_latency = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+            return time.monotonic()
+
+    def release(self, started, status=None):
+        """Returns a permit. ``status`` is the HTTP error status, if any."""
+        now = time.monotonic()
+        with self._condition:
+            fully_used = self._in_flight >= int(self._limit)
+            self._in_flight -= 1
+            previous = int(self._limit)
+
+            if status in RETRYABLE_STATUSES:
+                self._decrease(started, now, status)
+            elif status is None:
+                latency = now - started
+                if self._min_latency is None or latency < self._min_latency:
+                    self._min_latency = latency
+                healthy = latency <= self._min_latency * self.latency_tolerance + 0.05
+                if fully_used and healthy:
+                    self._limit = min(self.maximum, self._limit + 1.0 / self._limit)
+                    if int(self._limit) != previous:
+                        self._report(previous, "increase")
+
+            self._condition.notify_all()
+
+    def congested(self, started, status):
+        """Cuts the limit for a throttled call inside a successful response.
+
+        Used for the parts of a batch request, whose permit was already
+        returned when the batch as a whole succeeded.
+        """
+        with self._condition:
+            self._decrease(started, time.monotonic(), status)
+
+    def _decrease(self, started, now, status):
+        if started >= self._last_decrease:
+            previous = int(self._limit)
+            self._limit = max(self.minimum, self._limit * self.decrease)
+            self._last_decrease = now
+            self._report(previous, "decrease", status=status)
+
+    def _report(self, previous, reason, **fields):
+        trace(
+            "concurrency",
+            api=self.api,
+            reason=reason,
+            previous_limit=previous,
+            limit=int(self._limit),
+            in_flight=self._in_flight,
+            **fields,
+        )
+
+    def snapshot(self):
+        with self._condition:
+            return {"api": self.api, "limit": int(self._limit), "in_flight": self._in_flight}
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(api):
+    """Returns the process-wide limiter for ``api`` (drive, docs, sheets or forms)."""
+    with _limiters_lock:
+        limiter = _limiters.get(api)
+        if limiter is None:
+            limiter = _limiters[api] = AimdLimiter(api)
+        return limiter
+
+
+def call(api, function, *args, **kwargs):
+    """Runs one API call under ``api``'s concurrency limit.
+
+    Retryable failures feed the limiter and are retried with jittered
+    exponential backoff, so callers should not also pass ``num_retries``.
+    """
+    limiter = get_limiter(api)
+    delay = 0.5
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        started = limiter.acquire()
+        try:
+            result = function(*args, **kwargs)
+        except HttpError as error:
+            status = error.resp.status
+            limiter.release(started, status)
+            if status not in RETRYABLE_STATUSES or attempt == MAX_ATTEMPTS:
+                raise
+        except BaseException:
+            limiter.release(started, status=0)
+            raise
+        else:
+            limiter.release(started)
+            return result
+        time.sleep(delay * (0.5 + random.random()))
+        delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+
+
+def trace_limits():
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    for limiter in limiters:
+        trace("concurrency", reason="summary", **limiter.snapshot())
@@ -4,6 +4,9 @@ SCOPES = [
     "https://www.googleapis.com/auth/documents",
     "https://www.googleapis.com/auth/spreadsheets",
     "https://www.googleapis.com/auth/drive.file",
+    # drive.file alone only sees files this app created or opened. Listing
+    # and copying everything in a folder needs read access to all of Drive.
+    "https://www.googleapis.com/auth/drive.readonly",
     "https://www.googleapis.com/auth/forms.body",
     "https://www.googleapis.com/auth/forms.responses.readonly",
 ]
@@ -12,5 +15,16 @@ CREDENTIALS_DIR = os.path.join(os.path.expanduser("~"), ".gsuite_cli")
 CLIENT_SECRETS_FILE = os.path.join(CREDENTIALS_DIR, "client_secrets.json")
 CREDENTIALS_FILE = os.path.join(CREDENTIALS_DIR, "credentials.json")
 CONFIG_FILE = os.path.join(CREDENTIALS_DIR, "config.json")
+PROFILES_DIR = os.path.join(CREDENTIALS_DIR, "profiles")
+DEFAULT_PROFILE = "default"
+FOLLOW_STATE_DIR = os.path.join(CREDENTIALS_DIR, "follow")
+SYNC_STATE_DIR = os.path.join(CREDENTIALS_DIR, "sync")
+CACHE_DIR = os.path.join(CREDENTIALS_DIR, "cache")
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")
+WATCH_STATE_FILE = os.path.join(CREDENTIALS_DIR, "watch_state.json")
 
 TOKEN_REVOKE_URL = "https://oauth2.googleapis.com/revoke"
+
+# Point every API client at a local emulator (see `python3 -m emulator`)
+# instead of Google, e.g. GSUITE_CLI_EMULATOR_URL=http://127.0.0.1:8765
+EMULATOR_URL = os.environ.get("GSUITE_CLI_EMULATOR_URL") or None
@@ -0,0 +1,117 @@
+import contextlib
+import threading
+import time
+from collections import deque
+
+
+RATE_WINDOW_SECONDS = 60.0
+
+
+class CredentialPool:
+    """Spreads API requests across several profiles' credentials.
+
+    Each credential has its own sliding one-minute window. ``acquire`` hands out
+    the credential with the most headroom and waits when every credential is at
+    ``requests_per_minute``. Pass a pool anywhere the services expect ``creds``;
+    the API transport acquires a credential for every HTTP request it sends.
+    Paginated reads run inside ``pinned`` so that every page comes from the
+    account that issued the page token. Only read paths should receive a pool; writes stay on a single profile.
+    """
+
+    def __init__(self, named_credentials, requests_per_minute=60):
+        if not named_credentials:
+            raise ValueError("A credential pool needs at least one profile.")
+        self.requests_per_minute = requests_per_minute
+        self._entries = [
+            {"profile": profile, "creds": creds, "requests": deque(), "total": 0}
+            for profile, creds in named_credentials
+        ]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expire(self, entry, now):
+        while entry["requests"] and now - entry["requests"][0] >= RATE_WINDOW_SECONDS:
+            entry["requests"].popleft()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                pinned_entry = getattr(self._local, "entry", None)
+                candidates = [pinned_entry] if pinned_entry else self._entries
+                for entry in candidates:
+                    self._expire(entry, now)
+                entry = min(candidates, key=lambda item: len(item["requests"]))
+                if len(entry["requests"]) < self.requests_per_minute:
+                    entry["requests"].append(now)
+                    entry["total"] += 1
+                    return entry["creds"]
+                wait = min(
+                    RATE_WINDOW_SECONDS - (now - item["requests"][0])
+                    for item in candidates
+                )
+            time.sleep(max(wait, 0.01))
+
+    @contextlib.contextmanager
+    def pinned(self):
+        """Sends the calling thread's requests as one account until the block ends.
+
+        The account with the most headroom is chosen on entry. Requests are
+        still counted one by one against its budget. Nested blocks keep the
+        outer account.
+        """
+        if getattr(self._local, "entry", None) is not None:
+            yield
+            return
+        with self._lock:
+            now = time.monotonic()
+            for entry in self._entries:
+                self._expire(entry, now)
+            self._local.entry = min(self._entries, key=lambda item: len(item["requests"]))
+        try:
+            yield
+        finally:
+            self._local.entry = None
+
+    def pin(self, preferred=None):
+        """Returns ``(profile, creds)`` of one credential for calls that must
+        all run as the same account, e.g. following one user's change feed.
+
+        ``preferred`` wins when it is in the pool; otherwise the first profile
+        does, so repeated runs keep using the same account.
+        """
+        for entry in self._entries:
+            if entry["profile"] == preferred:
+                return entry["profile"], entry["creds"]
+        return self._entries[0]["profile"], self._entries[0]["creds"]
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            result = []
+            for entry in self._entries:
+                self._expire(entry, now)
+                result.append(
+                    {
+                        "profile": entry["profile"],
+                        "last_minute": len(entry["requests"]),
+                        "total": entry["total"],
+                    }
+                )
+            return result
+
+
+def pinned(creds):
+    """Keeps a pool on one account for a paginated read; a no-op for plain credentials."""
+    if isinstance(creds, CredentialPool):
+        return creds.pinned()
+    return contextlib.nullcontext()
+
+
+def resolve_credentials(creds):
+    if isinstance(creds, CredentialPool):
+        return creds.acquire()
+    return creds
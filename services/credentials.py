@@ -1,28 +1,90 @@
 import json
 import os
+import re
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-
-from services.config import CREDENTIALS_DIR, CREDENTIALS_FILE, SCOPES
+from services.config import (
+    CREDENTIALS_DIR,
+    CREDENTIALS_FILE,
+    DEFAULT_PROFILE,
+    EMULATOR_URL,
+    PROFILES_DIR,
+    SCOPES,
+)
 from services.errors import echo_error
 
 
-def ensure_credentials_dir():
+def ensure_credentials_dir(profile=None):
     os.makedirs(CREDENTIALS_DIR, exist_ok=True)
+    if profile and profile != DEFAULT_PROFILE:
+        os.makedirs(PROFILES_DIR, exist_ok=True)
+
+
+def validate_profile_name(profile):
+    if profile and not re.fullmatch(r"[A-Za-z0-9_.-]+", profile):
+        raise ValueError(
+            f"Invalid profile name '{profile}'. Use letters, digits, '.', '_' or '-'."
+        )
+
+
+def credentials_file(profile=None):
+    if not profile or profile == DEFAULT_PROFILE:
+        return CREDENTIALS_FILE
+    validate_profile_name(profile)
+    return os.path.join(PROFILES_DIR, f"{profile}.json")
 
 
-def load_token_payload():
-    if not os.path.exists(CREDENTIALS_FILE):
+def list_profiles():
+    profiles = []
+    if os.path.exists(CREDENTIALS_FILE):
+        profiles.append(DEFAULT_PROFILE)
+    if os.path.isdir(PROFILES_DIR):
+        for file_name in sorted(os.listdir(PROFILES_DIR)):
+            if file_name.endswith(".json"):
+                profiles.append(file_name[:-len(".json")])
+    return profiles
+
+
+def load_token_payload(profile=None):
+    token_path = credentials_file(profile)
+    if not os.path.exists(token_path):
         return {}
-    with open(CREDENTIALS_FILE, "r", encoding="utf-8") as token_file:
+    with open(token_path, "r", encoding="utf-8") as token_file:
         return json.load(token_file)
 
 
-def get_credentials():
+def granted_scopes(creds):
+    """Returns the sorted scopes ``creds`` were granted, or [] when unknown."""
+    return sorted(getattr(creds, "scopes", None) or [])
+
+
+def _login_hint(profile):
+    if profile and profile != DEFAULT_PROFILE:
+        return f"python3 gsuite_cli.py --profile {profile} auth login"
+    return "python3 gsuite_cli.py auth login"
+
+
+def get_credentials(profile=None):
+    # google.auth is imported here rather than at module level so commands
+    # that never authenticate, such as shell completion, start quickly.
+    from google.auth.credentials import AnonymousCredentials
+    from google.auth.transport.requests import Request
+    from google.oauth2 import service_account
+    from google.oauth2.credentials import Credentials
+
+    if EMULATOR_URL:
+        # The emulator does not check tokens, so no login is required.
+        return AnonymousCredentials()
+
+    token_path = credentials_file(profile)
     creds = None
-    if os.path.exists(CREDENTIALS_FILE):
-        creds = Credentials.from_authorized_user_file(CREDENTIALS_FILE)
+    if os.path.exists(token_path):
+        if load_token_payload(profile).get("type") == "service_account":
+            return service_account.Credentials.from_service_account_file(
+                token_path,
+                scopes=SCOPES,
+            )
+
+        creds = Credentials.from_authorized_user_file(token_path)
 
         granted_scopes = set(creds.scopes or [])
         required_scopes = set(SCOPES)
@@ -30,8 +92,10 @@ def get_credentials():
         if missing_scopes:
             echo_error(
                 "auth",
-                "Stored credentials are missing required scopes.",
-                "Run 'python3 gsuite_cli.py auth login' to re-authorize with new scopes.",
+                "Stored credentials are missing required scopes: "
+                + ", ".join(scope.rsplit("/", 1)[-1] for scope in missing_scopes)
+                + ".",
+                f"Run '{_login_hint(profile)}' to re-authorize with new scopes.",
             )
             return None
 
@@ -45,7 +109,8 @@ def get_credentials():
                     echo_error(
                         "auth",
                         "Stored credentials are no longer valid for current scopes.",
-                        "Run 'python3 gsuite_cli.py auth logout' then 'python3 gsuite_cli.py auth login'.",
+                        "Run 'python3 gsuite_cli.py auth logout' then "
+                        f"'{_login_hint(profile)}'.",
                     )
                     return None
                 echo_error("auth", f"Failed to refresh credentials: {error}")
@@ -54,7 +119,7 @@ def get_credentials():
             echo_error(
                 "auth",
                 "Credentials not found or expired.",
-                "Run 'python3 gsuite_cli.py auth login' first.",
+                f"Run '{_login_hint(profile)}' first.",
             )
             return None
 
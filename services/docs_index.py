@@ -0,0 +1,376 @@
+from array import array
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from googleapiclient.errors import HttpError
+
+from services import concurrency
+from services import docs_service
+from services.config import CACHE_DIR
+from services.credentials import granted_scopes
+
+
+COMMIT_EVERY = 50
+SNIPPET_WIDTH = 80
+# More literals rarely narrow the candidates further but each costs a scan
+# of the vocabulary.
+MAX_QUERY_LITERALS = 3
+
+_TERM_PATTERN = re.compile(r"\w+")
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, title TEXT, modified_time TEXT)",
+    "CREATE TABLE IF NOT EXISTS lines ("
+    " doc_id TEXT, line_number INTEGER, text TEXT,"
+    " PRIMARY KEY (doc_id, line_number)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE)",
+    # One posting per term and document, holding the packed numbers of the
+    # lines that contain the term, so a query only re-checks lines that
+    # contain every literal of the pattern.
+    "CREATE TABLE IF NOT EXISTS postings ("
+    " term_id INTEGER, doc_id TEXT, line_numbers BLOB,"
+    " PRIMARY KEY (term_id, doc_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS postings_by_doc ON postings (doc_id)",
+]
+
+
+def index_path(profile):
+    """Returns the index file of ``profile``; accounts see different documents."""
+    return os.path.join(CACHE_DIR, f"docs_index-{profile}.sqlite")
+
+
+def _connect(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    connection = sqlite3.connect(path)
+    for statement in _SCHEMA:
+        connection.execute(statement)
+    return connection
+
+
+def _get_meta(connection, key, default=None):
+    row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return default if row is None else json.loads(row[0])
+
+
+def _set_meta(connection, key, value):
+    connection.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+        (key, json.dumps(value)),
+    )
+
+
+def _remove_document(connection, document_id):
+    connection.execute("DELETE FROM postings WHERE doc_id = ?", (document_id,))
+    connection.execute("DELETE FROM lines WHERE doc_id = ?", (document_id,))
+    connection.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+
+
+def _index_document(connection, file_entry, text):
+    document_id = file_entry["id"]
+    _remove_document(connection, document_id)
+
+    lines = []
+    line_numbers_by_term = {}
+    for line_number, line in enumerate(text.split("\n"), start=1):
+        if not line.strip():
+            continue
+        lines.append((document_id, line_number, line))
+        for term in set(_TERM_PATTERN.findall(line.lower())):
+            line_numbers_by_term.setdefault(term, []).append(line_number)
+
+    terms = list(line_numbers_by_term)
+    connection.executemany(
+        "INSERT OR IGNORE INTO terms (term) VALUES (?)",
+        ((term,) for term in terms),
+    )
+    term_ids = {}
+    for start in range(0, len(terms), 500):
+        chunk = terms[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        term_ids.update(
+            (term, term_id)
+            for term_id, term in connection.execute(
+                f"SELECT id, term FROM terms WHERE term IN ({placeholders})",
+                chunk,
+            )
+        )
+
+    connection.executemany(
+        "INSERT INTO postings (term_id, doc_id, line_numbers) VALUES (?, ?, ?)",
+        (
+            (term_ids[term], document_id, array("I", line_numbers).tobytes())
+            for term, line_numbers in line_numbers_by_term.items()
+        ),
+    )
+    connection.executemany(
+        "INSERT INTO lines (doc_id, line_number, text) VALUES (?, ?, ?)",
+        lines,
+    )
+    connection.execute(
+        "INSERT INTO documents (id, title, modified_time) VALUES (?, ?, ?)",
+        (document_id, file_entry.get("name", ""), file_entry.get("modifiedTime")),
+    )
+
+
+def update_index(creds, path, workers=8, on_document=None):
+    """Brings the index in line with Drive.
+
+    One listing of all Docs is compared with the stored ``modifiedTime`` of
+    each indexed document. Only new and changed documents are fetched, on up
+    to ``workers`` threads under the adaptive concurrency limit; documents
+    that disappeared are dropped. Returns counts of what changed.
+    """
+    connection = _connect(path)
+    try:
+        indexed = dict(connection.execute("SELECT id, modified_time FROM documents"))
+        listed = set()
+        stale = []
+        for file_entry in docs_service.iter_document_files(creds):
+            listed.add(file_entry["id"])
+            if indexed.get(file_entry["id"]) != file_entry.get("modifiedTime"):
+                stale.append(file_entry)
+
+        removed = [document_id for document_id in indexed if document_id not in listed]
+        for document_id in removed:
+            _remove_document(connection, document_id)
+
+        totals = {
+            "indexed": 0,
+            "removed": len(removed),
+            "unchanged": len(listed) - len(stale),
+            "failed": [],
+        }
+
+        def record(future, file_entry):
+            try:
+                text = future.result()
+            except HttpError as error:
+                if error.resp.status == 404:
+                    _remove_document(connection, file_entry["id"])
+                    totals["removed"] += 1
+                else:
+                    totals["failed"].append((file_entry["id"], error))
+                return
+            except Exception as error:
+                totals["failed"].append((file_entry["id"], error))
+                return
+            _index_document(connection, file_entry, text)
+            totals["indexed"] += 1
+            if totals["indexed"] % COMMIT_EVERY == 0:
+                connection.commit()
+            if on_document:
+                on_document(file_entry)
+
+        # Only a window of documents is held in memory; each is written to
+        # the index as soon as its text arrives.
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            for file_entry in stale:
+                future = executor.submit(
+                    concurrency.call,
+                    "docs",
+                    docs_service.get_document_text,
+                    creds,
+                    file_entry["id"],
+                )
+                pending[future] = file_entry
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for finished in done:
+                        record(finished, pending.pop(finished))
+
+            for finished in list(pending):
+                finished.exception()
+                record(finished, pending.pop(finished))
+
+        _set_meta(connection, "checked_at", time.time())
+        _set_meta(connection, "scopes", granted_scopes(creds))
+        connection.commit()
+    finally:
+        connection.close()
+
+    concurrency.trace_limits()
+    return totals
+
+
+def ensure_index(creds, path, max_age=300, refresh=False, offline=False, workers=8):
+    """Updates the index unless it was checked within ``max_age`` seconds
+    with the same granted scopes.
+
+    Returns the update totals, or None when the index was used as-is.
+    """
+    if offline:
+        if not os.path.exists(path):
+            raise ValueError("No local docs index yet; run once without --offline.")
+        return None
+    if not refresh and os.path.exists(path):
+        connection = _connect(path)
+        try:
+            checked_at = _get_meta(connection, "checked_at", 0)
+            scopes = _get_meta(connection, "scopes")
+        finally:
+            connection.close()
+        # Wider scopes reveal documents the last listing could not see.
+        if time.time() - checked_at < max_age and scopes == granted_scopes(creds):
+            return None
+    return update_index(creds, path, workers=workers)
+
+
+def _required_literals(pattern):
+    """Returns word fragments every match of ``pattern`` must contain.
+
+    Only plain characters outside groups, classes and optional quantifiers
+    count, so the result is safe to filter on but may be empty, in which
+    case every indexed line is checked.
+    """
+    literals = []
+    current = []
+    depth = 0
+    in_class = False
+
+    def flush():
+        if current:
+            literals.append("".join(current).lower())
+            current.clear()
+
+    position = 0
+    while position < len(pattern):
+        character = pattern[position]
+        if in_class:
+            if character == "\\":
+                position += 1
+            elif character == "]":
+                in_class = False
+        elif character == "\\":
+            flush()
+            position += 1
+        elif character == "[":
+            flush()
+            in_class = True
+        elif character == "(":
+            flush()
+            depth += 1
+        elif character == ")":
+            flush()
+            depth = max(0, depth - 1)
+        elif character == "|" and depth == 0:
+            # A top-level alternative needs none of the other branch's text.
+            return []
+        elif character in "?*{":
+            # The preceding character may be absent from a match.
+            if current:
+                current.pop()
+            flush()
+            if character == "{":
+                closing = pattern.find("}", position)
+                position = len(pattern) if closing < 0 else closing
+        elif depth == 0 and (character.isalnum() or character == "_"):
+            current.append(character)
+        else:
+            flush()
+        position += 1
+    flush()
+
+    unique = sorted(set(literals), key=len, reverse=True)
+    return unique[:MAX_QUERY_LITERALS]
+
+
+def _snippet(line, match, width=SNIPPET_WIDTH):
+    line = line.strip()
+    if len(line) <= width * 2:
+        return line
+    start = max(0, match.start() - width)
+    end = min(len(line), match.end() + width)
+    return ("…" if start else "") + line[start:end] + ("…" if end < len(line) else "")
+
+
+def _candidate_lines(connection, literals):
+    """Maps document IDs to the line numbers that contain every literal."""
+    candidates = None
+    for literal in literals:
+        lines_by_document = {}
+        for document_id, packed in connection.execute(
+            "SELECT doc_id, line_numbers FROM postings WHERE term_id IN"
+            " (SELECT id FROM terms WHERE instr(term, ?) > 0)",
+            (literal,),
+        ):
+            line_numbers = array("I")
+            line_numbers.frombytes(packed)
+            lines_by_document.setdefault(document_id, set()).update(line_numbers)
+
+        if candidates is None:
+            candidates = lines_by_document
+        else:
+            candidates = {
+                document_id: candidates[document_id] & line_numbers
+                for document_id, line_numbers in lines_by_document.items()
+                if candidates.get(document_id, set()) & line_numbers
+            }
+        if not candidates:
+            break
+    return candidates or {}
+
+
+def _candidate_rows(connection, candidates):
+    document_ids = list(candidates)
+    titles = {}
+    for start in range(0, len(document_ids), 500):
+        chunk = document_ids[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        titles.update(connection.execute(
+            f"SELECT id, title FROM documents WHERE id IN ({placeholders})",
+            chunk,
+        ))
+
+    for document_id in sorted(document_ids, key=lambda key: (titles.get(key, ""), key)):
+        line_numbers = sorted(candidates[document_id])
+        for start in range(0, len(line_numbers), 500):
+            chunk = line_numbers[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            for line_number, text in connection.execute(
+                "SELECT line_number, text FROM lines"
+                f" WHERE doc_id = ? AND line_number IN ({placeholders})"
+                " ORDER BY line_number",
+                [document_id, *chunk],
+            ):
+                yield document_id, titles.get(document_id, ""), line_number, text
+
+
+def search(pattern, path, ignore_case=False, fixed_strings=False):
+    """Yields ``(document_id, title, line_number, snippet)`` for matching lines.
+
+    Candidate lines come from the inverted index; each one is confirmed with
+    the full regular expression before it is reported.
+    """
+    expression = re.escape(pattern) if fixed_strings else pattern
+    regex = re.compile(expression, re.IGNORECASE if ignore_case else 0)
+    if fixed_strings:
+        literals = sorted(
+            {term.lower() for term in _TERM_PATTERN.findall(pattern)},
+            key=len,
+            reverse=True,
+        )[:MAX_QUERY_LITERALS]
+    else:
+        literals = _required_literals(pattern)
+
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        if literals:
+            rows = _candidate_rows(connection, _candidate_lines(connection, literals))
+        else:
+            rows = connection.execute(
+                "SELECT lines.doc_id, documents.title, lines.line_number, lines.text"
+                " FROM lines JOIN documents ON documents.id = lines.doc_id"
+                " ORDER BY documents.title, lines.doc_id, lines.line_number"
+            )
+        for document_id, title, line_number, text in rows:
+            match = regex.search(text)
+            if match:
+                yield document_id, title, line_number, _snippet(text, match)
+    finally:
+        connection.close()
@@ -0,0 +1,138 @@
+import csv
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from services import concurrency
+from services import docs_service
+from services import drive_service
+
+
+OUTPUT_FIELDS = ["row", "document_id", "name", "url"]
+
+# Matches exactly what the document replacement looks for: the column name
+# between the braces, with no extra spaces.
+_PLACEHOLDER_PATTERN = re.compile(r"\{\{([^{}]+)\}\}")
+
+
+def default_output_path(data_path):
+    root, _ = os.path.splitext(data_path)
+    return f"{root}.merged.csv"
+
+
+def render_name(name_template, row, fallback):
+    if not name_template:
+        return fallback
+    return _PLACEHOLDER_PATTERN.sub(lambda match: row.get(match.group(1)) or "", name_template)
+
+
+def load_completed_rows(output_path):
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, "r", encoding="utf-8", newline="") as output_file:
+        return {
+            int(record["row"])
+            for record in csv.DictReader(output_file)
+            if record.get("row", "").isdigit() and record.get("document_id")
+        }
+
+
+def _merge_row(creds, template_id, row_number, row, name):
+    copied = concurrency.call("drive", docs_service.copy_document, creds, template_id, name)
+    document_id = copied["id"]
+    replacements = {f"{{{{{column}}}}}": value or "" for column, value in row.items() if column}
+    try:
+        concurrency.call(
+            "docs",
+            docs_service.replace_placeholders,
+            creds,
+            document_id,
+            replacements,
+        )
+    except Exception:
+        # Leave nothing half-merged behind so a rerun starts the row cleanly.
+        try:
+            concurrency.call("drive", docs_service.delete_document, creds, document_id)
+        except Exception:
+            pass
+        raise
+
+    return {
+        "row": row_number,
+        "document_id": document_id,
+        "name": copied.get("name", name),
+        "url": f"https://docs.google.com/document/d/{document_id}/edit",
+    }
+
+
+def merge(
+    creds,
+    template_id,
+    data_path,
+    output_path,
+    name_template=None,
+    workers=8,
+    on_result=None,
+):
+    """Creates one filled-in copy of ``template_id`` per CSV row.
+
+    Every ``{{column}}`` placeholder is replaced in a single batchUpdate per
+    copy. Rows run on up to ``workers`` threads, with the number of requests
+    actually in flight set per API by the adaptive concurrency controller.
+    Only ``workers * 2`` rows are read ahead. Rows already listed in
+    ``output_path`` are skipped, so an interrupted merge can be rerun.
+    """
+    template_name = concurrency.call(
+        "drive", drive_service.get_file_metadata, creds, template_id, fields="name"
+    )["name"]
+    completed_rows = load_completed_rows(output_path)
+    totals = {"merged": 0, "skipped": 0, "failed": []}
+
+    write_header = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+    output_lock = threading.Lock()
+
+    with open(data_path, "r", encoding="utf-8-sig", newline="") as data_file, open(
+        output_path, "a", encoding="utf-8", newline=""
+    ) as output_file:
+        writer = csv.DictWriter(output_file, fieldnames=OUTPUT_FIELDS)
+        if write_header:
+            writer.writeheader()
+            output_file.flush()
+
+        def record(future, row_number):
+            try:
+                result = future.result()
+            except Exception as error:
+                totals["failed"].append((row_number, error))
+                return
+            with output_lock:
+                writer.writerow(result)
+                output_file.flush()
+            totals["merged"] += 1
+            if on_result:
+                on_result(result)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            for row_number, row in enumerate(csv.DictReader(data_file), start=1):
+                if row_number in completed_rows:
+                    totals["skipped"] += 1
+                    continue
+
+                name = render_name(name_template, row, f"{template_name} - {row_number}")
+                future = executor.submit(_merge_row, creds, template_id, row_number, row, name)
+                pending[future] = row_number
+
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for finished in done:
+                        record(finished, pending.pop(finished))
+
+            for finished in list(pending):
+                finished.exception()
+                record(finished, pending.pop(finished))
+
+    concurrency.trace_limits()
+    totals["failed"].sort(key=lambda item: item[0])
+    return totals
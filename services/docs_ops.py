@@ -0,0 +1,311 @@
+import bisect
+import json
+
+from services.docs_service import _utf16_length
+from services.google_client import build_service
+
+
+MAX_BATCH_REQUESTS = 500
+SNAPSHOT_FIELDS = (
+    "revisionId,"
+    "body(content(startIndex,endIndex,paragraph(elements(startIndex,endIndex,textRun(content)))))"
+)
+HEADING_LEVELS = range(1, 7)
+OPERATIONS = ("append", "insert", "paragraph", "heading", "replace", "delete")
+
+
+def read_operations(lines):
+    """Parses JSON Lines edit operations, skipping blank lines.
+
+    Raises ValueError naming the offending line for invalid JSON or an
+    unknown operation.
+    """
+    operations = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            operation = json.loads(line)
+        except ValueError as error:
+            raise ValueError(f"Line {line_number}: invalid JSON ({error}).") from None
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+            raise ValueError(
+                f"Line {line_number}: expected an object with \"op\" set to one of "
+                f"{', '.join(OPERATIONS)}."
+            )
+        operation["_line"] = line_number
+        operations.append(operation)
+    return operations
+
+
+class _Snapshot:
+    """Maps offsets in a document's plain text onto document indexes.
+
+    Only top-level paragraphs contribute text; tables and other structural
+    elements are skipped, so anchors cannot point inside them.
+    """
+
+    def __init__(self, document):
+        self.revision_id = document.get("revisionId")
+        self.text_parts = []
+        self.segment_offsets = []
+        self.segments = []
+        self.paragraphs = []
+        offset = 0
+        end_index = 1
+        for structural_element in document.get("body", {}).get("content", []):
+            end_index = max(end_index, structural_element.get("endIndex", 0))
+            paragraph = structural_element.get("paragraph")
+            if paragraph is None:
+                continue
+            self.paragraphs.append(
+                (structural_element["startIndex"], structural_element["endIndex"])
+            )
+            for paragraph_element in paragraph.get("elements", []):
+                content = paragraph_element.get("textRun", {}).get("content")
+                if not content:
+                    continue
+                self.segment_offsets.append(offset)
+                self.segments.append((paragraph_element["startIndex"], content))
+                self.text_parts.append(content)
+                offset += len(content)
+        self.text = "".join(self.text_parts)
+        # The body always ends with a newline that cannot be edited around.
+        self.end_index = end_index
+        self.last_index = max(1, end_index - 1)
+
+    def index_at(self, offset, closing=False):
+        position = (
+            bisect.bisect_left(self.segment_offsets, offset) - 1
+            if closing
+            else bisect.bisect_right(self.segment_offsets, offset) - 1
+        )
+        position = max(0, position)
+        start_index, content = self.segments[position]
+        return start_index + _utf16_length(content[:offset - self.segment_offsets[position]])
+
+    def find(self, needle, occurrences):
+        """Returns the ``(start, end)`` index ranges of ``needle`` in the text."""
+        if not needle:
+            raise ValueError("the text to find must not be empty")
+        ranges = []
+        offset = self.text.find(needle)
+        while offset >= 0:
+            start = self.index_at(offset)
+            end = self.index_at(offset + len(needle), closing=True)
+            if end - start != _utf16_length(needle):
+                raise ValueError(f"'{needle}' spans content that is not plain text")
+            ranges.append((start, end))
+            if len(ranges) == occurrences:
+                break
+            offset = self.text.find(needle, offset + len(needle))
+        return ranges
+
+    def paragraph_at(self, index):
+        position = bisect.bisect_right(self.paragraphs, (index, float("inf"))) - 1
+        return self.paragraphs[max(0, position)]
+
+    def last_paragraph_empty(self):
+        return not self.text or self.text.endswith("\n\n") or self.text == "\n"
+
+
+def _anchor(snapshot, operation):
+    needle = operation.get("before", operation.get("after"))
+    ranges = snapshot.find(needle, 1)
+    if not ranges:
+        raise ValueError(f"anchor text '{needle}' was not found")
+    return ranges[0]
+
+
+def _position(snapshot, operation):
+    """Resolves where an inline insert goes: ``at``, ``before`` or ``after``."""
+    if "before" in operation or "after" in operation:
+        start, end = _anchor(snapshot, operation)
+        return start if "before" in operation else end
+    at = operation.get("at", "end")
+    if at == "start":
+        return 1
+    if at == "end":
+        return snapshot.last_index
+    if isinstance(at, int) and not isinstance(at, bool) and 1 <= at <= snapshot.last_index:
+        return at
+    raise ValueError(f"'at' must be \"start\", \"end\" or an index from 1 to {snapshot.last_index}")
+
+
+def _paragraph_position(snapshot, operation):
+    """Returns the paragraph boundary a new paragraph goes to, or None for the end."""
+    if "before" in operation or "after" in operation:
+        start, end = _anchor(snapshot, operation)
+        if "before" in operation:
+            return snapshot.paragraph_at(start)[0]
+        paragraph_end = snapshot.paragraph_at(end - 1)[1]
+        return None if paragraph_end >= snapshot.end_index else paragraph_end
+    at = operation.get("at", "end")
+    if at == "start":
+        return snapshot.paragraphs[0][0] if snapshot.paragraphs else 1
+    if at == "end":
+        return None
+    raise ValueError("'at' must be \"start\" or \"end\" for paragraphs")
+
+
+def _named_style(operation):
+    if operation["op"] == "heading":
+        level = operation.get("level", 1)
+        if level not in HEADING_LEVELS:
+            raise ValueError("'level' must be a number from 1 to 6")
+        return f"HEADING_{level}"
+    if operation["op"] == "paragraph":
+        return operation.get("style", "NORMAL_TEXT")
+    return None
+
+
+def _text(operation, key="text", allow_empty=False):
+    text = operation.get(key)
+    if not isinstance(text, str) or (not text and not allow_empty):
+        raise ValueError(f"'{key}' must be a non-empty string")
+    return text
+
+
+def resolve_operations(snapshot, operations):
+    """Turns operations into edits against one snapshot of the document.
+
+    Each edit is ``(index, sequence, end, text, style)``: delete the range
+    from ``index`` to ``end`` (when ``end`` is greater), insert ``text`` at
+    ``index`` and give the inserted paragraph ``style``.
+    """
+    edits = []
+    trailing = []
+    for sequence, operation in enumerate(operations):
+        try:
+            kind = operation["op"]
+            if kind in ("replace", "delete"):
+                if "find" in operation:
+                    occurrences = 0 if operation.get("all", True) else 1
+                    ranges = snapshot.find(_text(operation, "find"), occurrences)
+                else:
+                    start, end = operation.get("start"), operation.get("end")
+                    if not all(isinstance(value, int) for value in (start, end)) or not (
+                        1 <= start < end <= snapshot.last_index
+                    ):
+                        raise ValueError(
+                            "needs 'find', or 'start' and 'end' indexes within the body "
+                            "(the final newline cannot be deleted)"
+                        )
+                    ranges = [(start, end)]
+                replacement = (
+                    _text(operation, allow_empty=True) if kind == "replace" else ""
+                )
+                edits.extend((start, sequence, end, replacement, None) for start, end in ranges)
+            elif kind == "insert":
+                index = _position(snapshot, operation)
+                edits.append((index, sequence, index, _text(operation), None))
+            else:
+                text = _text(operation).rstrip("\n")
+                style = _named_style(operation) if kind != "append" else None
+                index = None if kind == "append" else _paragraph_position(snapshot, operation)
+                if index is None:
+                    trailing.append((sequence, text, style))
+                else:
+                    edits.append((index, sequence, index, text + "\n", style))
+        except ValueError as error:
+            raise ValueError(f"Line {operation.get('_line', sequence + 1)}: {error}.") from None
+
+    # New paragraphs at the end go before the final newline. Each one starts
+    # with a newline of its own, unless the last paragraph is empty, where
+    # the last of them fills it instead.
+    fill_last = snapshot.last_paragraph_empty()
+    for position, (sequence, text, style) in enumerate(trailing):
+        if not fill_last:
+            text = "\n" + text
+        elif position < len(trailing) - 1:
+            text = text + "\n"
+        edits.append((snapshot.last_index, sequence, snapshot.last_index, text, style))
+
+    _check_overlaps(edits)
+    return edits
+
+
+def _check_overlaps(edits):
+    deletions = sorted((start, end) for start, _, end, _, _ in edits if end > start)
+    for (_, previous_end), (start, _) in zip(deletions, deletions[1:]):
+        if start < previous_end:
+            raise ValueError(f"Edits overlap at index {start}.")
+    starts = [start for start, _ in deletions]
+    for index, _, end, _, _ in edits:
+        if end > index:
+            continue
+        position = bisect.bisect_left(starts, index) - 1
+        if position >= 0 and deletions[position][0] < index < deletions[position][1]:
+            raise ValueError(f"An insert at index {index} falls inside a deleted range.")
+
+
+def build_requests(edits):
+    """Orders edits from the highest index down and turns them into requests.
+
+    Working from the end of the document keeps every index resolved against
+    the snapshot valid. At the same index a deletion runs first, then the
+    inserts in reverse, so their results read in the order the operations
+    were given.
+    """
+    steps = []
+    for index, sequence, end, text, style in edits:
+        if end > index:
+            steps.append(((index, 1, sequence), [
+                {"deleteContentRange": {"range": {"startIndex": index, "endIndex": end}}}
+            ]))
+        if not text:
+            continue
+        insert = [{"insertText": {"location": {"index": index}, "text": text}}]
+        if style:
+            # A paragraph inserted at the end starts after its leading newline.
+            start = index + 1 if text.startswith("\n") else index
+            insert.append(
+                {
+                    "updateParagraphStyle": {
+                        "range": {
+                            "startIndex": start,
+                            "endIndex": start + max(1, _utf16_length(text.strip("\n"))),
+                        },
+                        "paragraphStyle": {"namedStyleType": style},
+                        "fields": "namedStyleType",
+                    }
+                }
+            )
+        steps.append(((index, 0, sequence), insert))
+
+    requests = []
+    for _, step_requests in sorted(steps, key=lambda step: step[0], reverse=True):
+        requests.extend(step_requests)
+    return requests
+
+
+def apply_operations(creds, document_id, operations, max_requests=MAX_BATCH_REQUESTS):
+    """Applies edit operations against one snapshot of the document.
+
+    The document is read once, every operation is resolved to indexes in
+    that snapshot and the resulting requests are sent in as few batchUpdate
+    calls as ``max_requests`` allows. Each call is guarded by the revision
+    the previous one produced, so a concurrent edit fails the run instead of
+    shifting its indexes. Returns ``(request_count, batch_count, revision_id)``.
+    """
+    service = build_service("docs", "v1", creds)
+    document = service.documents().get(
+        documentId=document_id,
+        fields=SNAPSHOT_FIELDS,
+    ).execute()
+    snapshot = _Snapshot(document)
+    requests = build_requests(resolve_operations(snapshot, operations))
+
+    revision_id = snapshot.revision_id
+    batches = 0
+    for start in range(0, len(requests), max_requests):
+        body = {"requests": requests[start:start + max_requests]}
+        if revision_id:
+            body["writeControl"] = {"requiredRevisionId": revision_id}
+        response = service.documents().batchUpdate(
+            documentId=document_id,
+            body=body,
+        ).execute()
+        revision_id = response.get("writeControl", {}).get("requiredRevisionId", revision_id)
+        batches += 1
+    return len(requests), batches, revision_id
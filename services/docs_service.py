@@ -1,22 +1,39 @@
-from googleapiclient.discovery import build
+import difflib
+import tempfile
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from services import drive_service
+from services.google_client import api_url, build_service, build_session
+from services.json_stream import iter_values
+
+
+# Changed line blocks larger than this are replaced wholesale instead of
+# being diffed character by character, which is quadratic in the worst case.
+MAX_CHARACTER_DIFF = 20000
+
+STREAM_CHUNK_BYTES = 64 * 1024
+_TEXT_RUN_PATH = ("body", "content", None, "paragraph", "elements", None, "textRun", "content")
+_STREAM_PATHS = {("title",), ("documentId",), _TEXT_RUN_PATH}
 
 
 def create_document(creds, title):
-    service = build("docs", "v1", credentials=creds)
+    service = build_service("docs", "v1", creds)
     return service.documents().create(body={"title": title}).execute()
 
 
-def copy_document(creds, document_id, new_title):
-    service = build("drive", "v3", credentials=creds)
+def copy_document(creds, document_id, new_title, num_retries=0):
+    service = build_service("drive", "v3", creds)
     return service.files().copy(
         fileId=document_id,
         body={"name": new_title},
         fields="id, name",
-    ).execute()
+    ).execute(num_retries=num_retries)
 
 
 def share_document(creds, document_id, email, role):
-    service = build("drive", "v3", credentials=creds)
+    service = build_service("drive", "v3", creds)
     permission = {
         "type": "user",
         "role": role,
@@ -30,23 +47,34 @@ def share_document(creds, document_id, email, role):
     ).execute()
 
 
-def list_documents(creds):
-    service = build("drive", "v3", credentials=creds)
-    results = service.files().list(
-        q="mimeType='application/vnd.google-apps.document'",
-        fields="nextPageToken, files(id, name)",
-    ).execute()
-    return results.get("files", [])
+def iter_document_files(creds, fields="id, name, modifiedTime", page_size=1000):
+    """Yields every Google Doc visible to the user, following pagination."""
+    return drive_service.iter_files(
+        creds,
+        "mimeType='application/vnd.google-apps.document' and trashed = false",
+        fields=fields,
+        page_size=page_size,
+    )
 
 
 def get_document(creds, document_id):
-    service = build("docs", "v1", credentials=creds)
+    service = build_service("docs", "v1", creds)
     return service.documents().get(documentId=document_id).execute()
 
 
-def delete_document(creds, document_id):
-    service = build("drive", "v3", credentials=creds)
-    service.files().delete(fileId=document_id).execute()
+def get_document_text(creds, document_id):
+    """Returns the plain text of a document, requesting only its text runs."""
+    service = build_service("docs", "v1", creds)
+    document = service.documents().get(
+        documentId=document_id,
+        fields="body(content(paragraph(elements(textRun(content)))))",
+    ).execute()
+    return _extract_plain_text(document)
+
+
+def delete_document(creds, document_id, num_retries=0):
+    service = build_service("drive", "v3", creds)
+    service.files().delete(fileId=document_id).execute(num_retries=num_retries)
 
 
 def _max_end_index(document):
@@ -80,6 +108,114 @@ def get_document_summary(creds, document_id):
     }
 
 
+def stream_document(creds, document_id, chunk_size=STREAM_CHUNK_BYTES):
+    """Yields ``("title" | "document_id" | "text", value)`` while the document downloads.
+
+    The response body is read in chunks and parsed incrementally, so memory
+    stays flat however large the document is. Only the fields needed for
+    plain text are requested.
+    """
+    session = build_session(creds)
+    response = session.get(
+        api_url("docs", f"v1/documents/{document_id}"),
+        params={
+            "fields": "title,documentId,body(content(paragraph(elements(textRun(content)))))",
+        },
+        stream=True,
+    )
+    try:
+        if response.status_code >= 400:
+            raise HttpError(
+                httplib2.Response({"status": str(response.status_code)}),
+                response.content,
+                uri=response.url,
+            )
+
+        for path, value in iter_values(response.iter_content(chunk_size), _STREAM_PATHS):
+            if path == _TEXT_RUN_PATH:
+                yield "text", value
+            elif path == ("title",):
+                yield "title", value
+            else:
+                yield "document_id", value
+    finally:
+        response.close()
+
+
+def _coalesce(pieces, size=STREAM_CHUNK_BYTES):
+    # Text runs are often a single line; writing them one by one would cost a
+    # flush per paragraph on stdout.
+    buffered = []
+    buffered_size = 0
+    for piece in pieces:
+        buffered.append(piece)
+        buffered_size += len(piece)
+        if buffered_size >= size:
+            yield "".join(buffered)
+            buffered = []
+            buffered_size = 0
+    if buffered:
+        yield "".join(buffered)
+
+
+def _render_stream(title, pieces, output_format):
+    if output_format != "markdown":
+        yield from pieces
+        return
+
+    # Mirrors render_content: trailing newlines are dropped and replaced by one.
+    yield f"# {title or 'Untitled Document'}\n"
+    started = False
+    held = ""
+    for piece in pieces:
+        stripped = piece.rstrip("\n")
+        if not stripped:
+            held += piece
+            continue
+        if not started:
+            yield "\n"
+            started = True
+        yield held + stripped
+        held = piece[len(stripped):]
+    if started:
+        yield "\n"
+
+
+def stream_document_content(creds, document_id, output_format):
+    """Returns ``(metadata, chunks)`` for writing a document without loading it.
+
+    ``chunks`` yields the rendered content piece by piece. Text that arrives
+    before the title is spooled to a temporary file, which only happens if
+    the API reorders its fields.
+    """
+    events = stream_document(creds, document_id)
+    metadata = {"title": None, "document_id": document_id}
+    spool = tempfile.SpooledTemporaryFile(max_size=STREAM_CHUNK_BYTES, mode="w+", encoding="utf-8")
+    for kind, value in events:
+        if kind == "text":
+            spool.write(value)
+            continue
+        metadata[kind] = value
+        if kind == "title":
+            break
+
+    def pieces():
+        try:
+            spool.seek(0)
+            while True:
+                spooled = spool.read(STREAM_CHUNK_BYTES)
+                if not spooled:
+                    break
+                yield spooled
+        finally:
+            spool.close()
+        for kind, value in events:
+            if kind == "text":
+                yield value
+
+    return metadata, _render_stream(metadata["title"], _coalesce(pieces()), output_format)
+
+
 def render_content(title, content, output_format):
     if output_format == "markdown":
         safe_title = title or "Untitled Document"
@@ -92,7 +228,7 @@ def render_content(title, content, output_format):
 
 
 def append_text(creds, document_id, text):
-    service = build("docs", "v1", credentials=creds)
+    service = build_service("docs", "v1", creds)
     document = service.documents().get(documentId=document_id, fields="body(content)").execute()
     insertion_index = max(1, _max_end_index(document) - 1)
 
@@ -110,11 +246,134 @@ def append_text(creds, document_id, text):
     ).execute()
 
 
-def set_text(creds, document_id, text):
-    service = build("docs", "v1", credentials=creds)
-    document = service.documents().get(documentId=document_id, fields="body(content)").execute()
-    end_index = _max_end_index(document)
+def _text_runs_base(document):
+    """Returns the index of the first character if the body is plain paragraphs.
+
+    The plain text then maps onto document indexes by a constant offset.
+    Returns ``None`` for anything else (tables, inline objects, section
+    breaks mid-document), where only a full replacement is safe.
+    """
+    base = None
+    expected = None
+    for structural_element in document.get("body", {}).get("content", []):
+        if "sectionBreak" in structural_element and base is None:
+            continue
+        if "paragraph" not in structural_element:
+            return None
+        for paragraph_element in structural_element["paragraph"].get("elements", []):
+            text_run = paragraph_element.get("textRun")
+            start_index = paragraph_element.get("startIndex")
+            if not text_run or "content" not in text_run or not isinstance(start_index, int):
+                return None
+            if base is None:
+                base = expected = start_index
+            if start_index != expected:
+                return None
+            expected += _utf16_length(text_run["content"])
+    return base
+
+
+def _utf16_length(text):
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _diff_ranges(old, new):
+    """Yields ``(start, end, replacement)`` character edits turning old into new.
+
+    Lines are matched first and only changed blocks are diffed by character,
+    which keeps large documents with small edits fast.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+
+    # Typical edits leave long runs untouched at both ends; trimming them
+    # first keeps the matcher's work proportional to the changed region.
+    prefix = 0
+    while (
+        prefix < len(old_lines)
+        and prefix < len(new_lines)
+        and old_lines[prefix] == new_lines[prefix]
+    ):
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < len(old_lines) - prefix
+        and suffix < len(new_lines) - prefix
+        and old_lines[-1 - suffix] == new_lines[-1 - suffix]
+    ):
+        suffix += 1
+    old_offsets = [sum(len(line) for line in old_lines[:prefix])]
+    old_lines = old_lines[prefix:len(old_lines) - suffix]
+    new_lines = new_lines[prefix:len(new_lines) - suffix]
+
+    for line in old_lines:
+        old_offsets.append(old_offsets[-1] + len(line))
+
+    line_matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+    for tag, old_start, old_end, new_start, new_end in line_matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        old_block = "".join(old_lines[old_start:old_end])
+        new_block = "".join(new_lines[new_start:new_end])
+        offset = old_offsets[old_start]
+        if tag != "replace" or len(old_block) + len(new_block) > MAX_CHARACTER_DIFF:
+            yield offset, offset + len(old_block), new_block
+            continue
+
+        char_matcher = difflib.SequenceMatcher(None, old_block, new_block, autojunk=False)
+        for char_tag, char_old_start, char_old_end, char_new_start, char_new_end in (
+            char_matcher.get_opcodes()
+        ):
+            if char_tag != "equal":
+                yield (
+                    offset + char_old_start,
+                    offset + char_old_end,
+                    new_block[char_new_start:char_new_end],
+                )
+
+
+def _minimal_edit_requests(current, text, base):
+    # Both sides keep the body's final newline out of the diff; Docs does not
+    # allow deleting it, and set_text has always left it in place.
+    current = current[:-1] if current.endswith("\n") else current
+    edits = _diff_ranges(current, text)
+
+    # Document indexes count UTF-16 code units.
+    if current.isascii():
+        to_index = lambda position: base + position
+    else:
+        code_unit_offsets = [0]
+        for character in current:
+            code_unit_offsets.append(code_unit_offsets[-1] + (2 if ord(character) > 0xFFFF else 1))
+        to_index = lambda position: base + code_unit_offsets[position]
 
+    requests = []
+    # Descending order keeps every earlier index valid while later ones change.
+    for start, end, replacement in sorted(edits, key=lambda edit: edit[0], reverse=True):
+        if end > start:
+            requests.append(
+                {
+                    "deleteContentRange": {
+                        "range": {"startIndex": to_index(start), "endIndex": to_index(end)}
+                    }
+                }
+            )
+        if replacement:
+            requests.append(
+                {
+                    "insertText": {
+                        "location": {"index": to_index(start)},
+                        "text": replacement,
+                    }
+                }
+            )
+    return requests
+
+
+def _full_replace_requests(document, text):
+    end_index = _max_end_index(document)
     requests = []
     if end_index > 2:
         requests.append(
@@ -137,9 +396,55 @@ def set_text(creds, document_id, text):
                 }
             }
         )
+    return requests
+
+
+def set_text(creds, document_id, text):
+    """Makes the document body read ``text``, changing only what differs.
+
+    Returns the number of requests sent. Plain-paragraph documents get a
+    minimal set of deletes and inserts, so unchanged text keeps its
+    formatting. Other documents are cleared and rewritten. The update is
+    guarded by the revision that was read, so concurrent edits fail the
+    request instead of being overwritten.
+    """
+    service = build_service("docs", "v1", creds)
+    document = service.documents().get(
+        documentId=document_id,
+        fields="revisionId,body(content)",
+    ).execute()
+
+    base = _text_runs_base(document)
+    if base is None:
+        requests = _full_replace_requests(document, text)
+    else:
+        requests = _minimal_edit_requests(_extract_plain_text(document), text, base)
 
     if requests:
+        body = {"requests": requests}
+        if document.get("revisionId"):
+            body["writeControl"] = {"requiredRevisionId": document["revisionId"]}
         service.documents().batchUpdate(
             documentId=document_id,
-            body={"requests": requests},
+            body=body,
         ).execute()
+    return len(requests)
+
+
+def replace_placeholders(creds, document_id, replacements, num_retries=0):
+    service = build_service("docs", "v1", creds)
+    requests = [
+        {
+            "replaceAllText": {
+                "containsText": {"text": placeholder, "matchCase": True},
+                "replaceText": value,
+            }
+        }
+        for placeholder, value in replacements.items()
+    ]
+    if not requests:
+        return {}
+    return service.documents().batchUpdate(
+        documentId=document_id,
+        body={"requests": requests},
+    ).execute(num_retries=num_retries)
@@ -0,0 +1,71 @@
+import random
+import time
+
+from googleapiclient.errors import HttpError
+
+from services import concurrency
+from services.google_client import build_service, new_batch_request
+
+
+# Drive accepts at most 100 calls per batch request.
+MAX_BATCH_SIZE = 100
+MAX_PART_ATTEMPTS = 6
+MAX_BACKOFF_SECONDS = 30.0
+
+
+def _send(creds, jobs, build_request):
+    started = time.monotonic()
+    service = build_service("drive", "v3", creds)
+    outcomes = {}
+
+    def collect(request_id, response, exception):
+        outcomes[int(request_id)] = (response, exception)
+
+    batch = new_batch_request("drive", service, callback=collect)
+    for number, job in enumerate(jobs):
+        batch.add(build_request(service, job), request_id=str(number))
+    batch.execute()
+    return started, [outcomes.get(number, (None, None)) for number in range(len(jobs))]
+
+
+def execute(creds, jobs, build_request):
+    """Sends one Drive batch request with a call per job.
+
+    ``build_request(service, job)`` returns each job's call. Every job is a
+    dict whose ``attempt`` counts earlier tries; retried jobs wait out an
+    exponential backoff first. The batch runs under the adaptive concurrency
+    limit for Drive. Returns when it started and each job's
+    ``(response, error)``.
+    """
+    attempt = max(job["attempt"] for job in jobs)
+    if attempt:
+        delay = min(0.5 * 2 ** (attempt - 1), MAX_BACKOFF_SECONDS)
+        time.sleep(delay * (0.5 + random.random()))
+    return concurrency.call("drive", _send, creds, jobs, build_request)
+
+
+def settle(jobs, started, outcomes, requeue):
+    """Sorts a batch's outcomes into retries and results.
+
+    Parts that were throttled or hit a server error go back to ``requeue``
+    with their ``attempt`` raised, until they run out of attempts, and cut
+    the Drive concurrency limit once per batch. Returns ``(job, response,
+    error)`` for every other part; ``error`` is set whenever ``response``
+    is missing.
+    """
+    results = []
+    throttled = None
+    for job, (response, error) in zip(jobs, outcomes):
+        if isinstance(error, HttpError) and (
+            error.resp.status in concurrency.RETRYABLE_STATUSES
+            and job["attempt"] + 1 < MAX_PART_ATTEMPTS
+        ):
+            throttled = error.resp.status
+            requeue({**job, "attempt": job["attempt"] + 1})
+        elif error is None and response is None:
+            results.append((job, None, ValueError("No response.")))
+        else:
+            results.append((job, response, error))
+    if throttled:
+        concurrency.get_limiter("drive").congested(started, throttled)
+    return results
@@ -0,0 +1,152 @@
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from services import concurrency
+from services import drive_batch
+from services import drive_service
+from services.drive_service import FOLDER_MIME_TYPE
+
+
+MAPPING_FIELDS = ["source_id", "copy_id", "mime_type", "path"]
+DEFAULT_BATCH_SIZE = 20
+
+
+def default_mapping_path(dest_name):
+    return re.sub(r"[^\w.-]+", "_", dest_name).strip("_") + ".mapping.csv"
+
+
+def _list_folder(creds, folder_id):
+    children = []
+    page_token = None
+    while True:
+        page = concurrency.call(
+            "drive", drive_service.list_children, creds, folder_id, page_token=page_token
+        )
+        children.extend(page.get("files", []))
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return children
+
+
+def _copy_request(service, job):
+    body = {"name": job["source"]["name"], "parents": [job["parent"]]}
+    if job["source"]["mimeType"] == FOLDER_MIME_TYPE:
+        return service.files().create(body={**body, "mimeType": FOLDER_MIME_TYPE}, fields="id")
+    return service.files().copy(fileId=job["source"]["id"], body=body, fields="id")
+
+
+def copy_tree(
+    creds,
+    folder_id,
+    dest_name,
+    parent_id=None,
+    workers=8,
+    batch_size=DEFAULT_BATCH_SIZE,
+    on_copied=None,
+):
+    """Recreates the folder tree under ``folder_id`` as a new folder ``dest_name``.
+
+    Folders are listed as soon as their copy exists, and files are copied
+    with batched ``files.copy`` calls on up to ``workers`` threads, under the
+    adaptive concurrency limit for Drive. Calls throttled inside a batch cut
+    that limit and are retried in a later batch. Every copied folder and file
+    is passed to ``on_copied`` as a ``MAPPING_FIELDS`` record. Returns totals.
+    """
+    source = concurrency.call(
+        "drive",
+        drive_service.get_file_metadata,
+        creds,
+        folder_id,
+        fields="id, name, mimeType, parents",
+    )
+    if source["mimeType"] != FOLDER_MIME_TYPE:
+        raise ValueError(f"'{folder_id}' is not a folder.")
+    parents = [parent_id] if parent_id else source.get("parents", [])[:1]
+    root = concurrency.call("drive", drive_service.create_folder, creds, dest_name, parents)
+
+    totals = {"root_id": root["id"], "folders": 0, "files": 0, "failed": []}
+    # With the destination inside the source tree, listings would find the
+    # copies and copy them again without end.
+    copied_folder_ids = {root["id"]}
+
+    def record(item, copy_id, path):
+        if item["mimeType"] == FOLDER_MIME_TYPE:
+            totals["folders"] += 1
+        else:
+            totals["files"] += 1
+        if on_copied:
+            on_copied({
+                "source_id": item["id"],
+                "copy_id": copy_id,
+                "mime_type": item["mimeType"],
+                "path": path,
+            })
+
+    record(source, root["id"], source["name"])
+
+    # Folders go out first, since each one unlocks the listing of its
+    # contents. A partial batch is only sent once no listing can add to it.
+    folder_jobs = deque()
+    file_jobs = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+
+        def list_folder(source_id, copy_id, path):
+            future = executor.submit(_list_folder, creds, source_id)
+            pending[future] = ("list", copy_id, path)
+
+        def queue(job):
+            (folder_jobs if job["source"]["mimeType"] == FOLDER_MIME_TYPE else file_jobs).append(job)
+
+        list_folder(source["id"], root["id"], source["name"])
+        while pending or folder_jobs or file_jobs:
+            listing = any(task[0] == "list" for task in pending.values())
+            while (folder_jobs or file_jobs) and len(pending) < workers * 2:
+                if listing and len(folder_jobs) + len(file_jobs) < batch_size:
+                    break
+                jobs = []
+                while (folder_jobs or file_jobs) and len(jobs) < batch_size:
+                    jobs.append((folder_jobs or file_jobs).popleft())
+                future = executor.submit(drive_batch.execute, creds, jobs, _copy_request)
+                pending[future] = ("batch", jobs)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = pending.pop(future)
+                if task[0] == "list":
+                    _, copy_id, path = task
+                    try:
+                        children = future.result()
+                    except Exception as error:
+                        totals["failed"].append((path, error))
+                        continue
+                    for child in children:
+                        if child["id"] in copied_folder_ids:
+                            continue
+                        queue({
+                            "source": child,
+                            "parent": copy_id,
+                            "path": f"{path}/{child['name']}",
+                            "attempt": 0,
+                        })
+                    continue
+
+                jobs = task[1]
+                try:
+                    started, outcomes = future.result()
+                except Exception as error:
+                    totals["failed"].extend((job["path"], error) for job in jobs)
+                    continue
+
+                for job, response, error in drive_batch.settle(jobs, started, outcomes, queue):
+                    if error is not None:
+                        totals["failed"].append((job["path"], error))
+                        continue
+                    record(job["source"], response["id"], job["path"])
+                    if job["source"]["mimeType"] == FOLDER_MIME_TYPE:
+                        copied_folder_ids.add(response["id"])
+                        list_folder(job["source"]["id"], response["id"], job["path"])
+
+    concurrency.trace_limits()
+    return totals
@@ -0,0 +1,264 @@
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from googleapiclient.errors import HttpError
+
+from services import concurrency
+from services import drive_batch
+from services import drive_service
+from services.config import CACHE_DIR
+from services.credentials import granted_scopes
+from services.drive_watch import WATCH_TYPES
+
+
+REPORT_FIELDS = [
+    "file_id",
+    "file_name",
+    "file_type",
+    "principal",
+    "principal_type",
+    "role",
+    "anyone_with_link",
+]
+REPORT_STATE_DIR = os.path.join(CACHE_DIR, "permissions")
+# Listing permissionIds alongside modifiedTime catches grants and removals,
+# which do not change modifiedTime.
+FILE_FIELDS = "id, name, mimeType, modifiedTime, permissionIds"
+PERMISSION_FIELDS = (
+    "nextPageToken, permissions(id, type, role, emailAddress, domain, displayName)"
+)
+DEFAULT_BATCH_SIZE = 50
+
+
+def state_file_path(profile):
+    return os.path.join(REPORT_STATE_DIR, re.sub(r"[^\w.-]+", "_", profile) + ".json")
+
+
+def _load_state(state_path):
+    if not os.path.exists(state_path):
+        return {"files": {}}
+    with open(state_path, "r", encoding="utf-8") as state_file:
+        return json.load(state_file)
+
+
+def _save_state(state_path, state):
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as state_file:
+        json.dump(state, state_file, separators=(",", ":"))
+    os.replace(temp_path, state_path)
+
+
+def _owned_files_query(types):
+    mime_types = " or ".join(f"mimeType = '{WATCH_TYPES[file_type]}'" for file_type in types)
+    return f"'me' in owners and trashed = false and ({mime_types})"
+
+
+def _compact(permission):
+    compact = {"type": permission.get("type"), "role": permission.get("role")}
+    principal = (
+        permission.get("emailAddress")
+        or permission.get("domain")
+        or permission.get("displayName")
+    )
+    if principal:
+        compact["principal"] = principal
+    return compact
+
+
+def _rows(file_id, entry, type_by_mime):
+    for permission in entry["permissions"]:
+        principal_type = permission.get("type")
+        yield {
+            "file_id": file_id,
+            "file_name": entry.get("name", ""),
+            "file_type": type_by_mime.get(entry.get("mimeType"), ""),
+            "principal": permission.get("principal")
+            or ("anyone" if principal_type == "anyone" else ""),
+            "principal_type": principal_type,
+            "role": permission.get("role"),
+            "anyone_with_link": principal_type == "anyone",
+        }
+
+
+def _list_remaining(creds, file_id, page_token):
+    permissions = []
+    while page_token:
+        page = concurrency.call(
+            "drive",
+            drive_service.list_permissions,
+            creds,
+            file_id,
+            page_token=page_token,
+            fields=PERMISSION_FIELDS,
+        )
+        permissions.extend(page.get("permissions", []))
+        page_token = page.get("nextPageToken")
+    return permissions
+
+
+def _permissions_request(service, job):
+    return service.permissions().list(
+        fileId=job["file"]["id"], fields=PERMISSION_FIELDS, pageSize=100
+    )
+
+
+def _run_batch(creds, jobs):
+    started, outcomes = drive_batch.execute(creds, jobs, _permissions_request)
+    # The rare file with more than one page of permissions is finished here,
+    # off the thread that hands out batches.
+    completed = []
+    for job, (response, error) in zip(jobs, outcomes):
+        if response is not None and response.get("nextPageToken"):
+            try:
+                response = {
+                    "permissions": response.get("permissions", [])
+                    + _list_remaining(creds, job["file"]["id"], response["nextPageToken"])
+                }
+            except Exception as page_error:
+                response, error = None, page_error
+        completed.append((response, error))
+    return started, completed
+
+
+def permissions_report(
+    creds,
+    state_path,
+    types=tuple(WATCH_TYPES),
+    full=False,
+    workers=8,
+    batch_size=DEFAULT_BATCH_SIZE,
+    on_row=None,
+):
+    """Reports who can access every doc, sheet and form the user owns.
+
+    One listing of the owned files is compared with the ``modifiedTime`` and
+    permission IDs stored in ``state_path`` by the previous run, and only new
+    or changed files have their permissions fetched, with batched
+    ``permissions.list`` calls on up to ``workers`` threads under the adaptive
+    concurrency limit for Drive. ``full`` refetches every file, which also
+    catches role changes on existing permissions. The stored state is dropped
+    whenever the granted scopes change. Each permission is passed
+    to ``on_row`` as a ``REPORT_FIELDS`` record as soon as it is known.
+    Returns totals.
+    """
+    type_by_mime = {WATCH_TYPES[file_type]: file_type for file_type in types}
+    state = _load_state(state_path)
+    scopes = granted_scopes(creds)
+    if state.get("scopes") != scopes:
+        # Other scopes can reveal other files, so nothing stored can be trusted.
+        state = {"scopes": scopes, "files": {}}
+    cached = state["files"]
+    totals = {
+        "files": 0,
+        "fetched": 0,
+        "unchanged": 0,
+        "removed": 0,
+        "permissions": 0,
+        "anyone_with_link": 0,
+        "failed": [],
+    }
+
+    def report(file_id, entry):
+        anyone = False
+        for row in _rows(file_id, entry, type_by_mime):
+            totals["permissions"] += 1
+            anyone = anyone or row["anyone_with_link"]
+            if on_row:
+                on_row(row)
+        if anyone:
+            totals["anyone_with_link"] += 1
+
+    jobs = deque()
+    listed = set()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+
+        def dispatch(listing):
+            while jobs and len(pending) < workers * 2:
+                # A partial batch is only sent once the listing can no longer add to it.
+                if listing and len(jobs) < batch_size:
+                    return
+                batch = [jobs.popleft() for _ in range(min(batch_size, len(jobs)))]
+                pending[executor.submit(_run_batch, creds, batch)] = batch
+
+        def collect(timeout):
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = pending.pop(future)
+                try:
+                    started, outcomes = future.result()
+                except Exception as error:
+                    totals["failed"].extend((job["file"]["id"], error) for job in batch)
+                    continue
+
+                results = drive_batch.settle(batch, started, outcomes, jobs.append)
+                for job, response, error in results:
+                    file_entry = job["file"]
+                    if isinstance(error, HttpError) and error.resp.status == 404:
+                        # Deleted since it was listed.
+                        cached.pop(file_entry["id"], None)
+                    elif error is not None:
+                        totals["failed"].append((file_entry["id"], error))
+                    else:
+                        entry = {
+                            "name": file_entry.get("name", ""),
+                            "mimeType": file_entry.get("mimeType"),
+                            "modifiedTime": file_entry.get("modifiedTime"),
+                            "permissionIds": sorted(file_entry.get("permissionIds", [])),
+                            "permissions": [
+                                _compact(permission)
+                                for permission in response.get("permissions", [])
+                            ],
+                        }
+                        cached[file_entry["id"]] = entry
+                        totals["fetched"] += 1
+                        report(file_entry["id"], entry)
+
+        # Unchanged files are reported straight from the state while the
+        # listing pages in; changed ones go out in batches as they fill up.
+        for file_entry in drive_service.iter_files(
+            creds, _owned_files_query(types), fields=FILE_FIELDS
+        ):
+            file_id = file_entry["id"]
+            listed.add(file_id)
+            totals["files"] += 1
+            entry = cached.get(file_id)
+            if (
+                not full
+                and entry is not None
+                and entry["modifiedTime"] == file_entry.get("modifiedTime")
+                and entry["permissionIds"] == sorted(file_entry.get("permissionIds", []))
+            ):
+                if entry["name"] != file_entry.get("name", ""):
+                    entry["name"] = file_entry.get("name", "")
+                totals["unchanged"] += 1
+                report(file_id, entry)
+                continue
+            jobs.append({"file": file_entry, "attempt": 0})
+            dispatch(listing=True)
+            if pending:
+                collect(timeout=0)
+
+        while jobs or pending:
+            dispatch(listing=False)
+            collect(timeout=None)
+
+    removed = [
+        file_id for file_id, entry in cached.items()
+        if entry.get("mimeType") in type_by_mime and file_id not in listed
+    ]
+    for file_id in removed:
+        del cached[file_id]
+    totals["removed"] = len(removed)
+
+    # Files that failed keep no entry, so the next run fetches them again.
+    for file_id, _ in totals["failed"]:
+        cached.pop(file_id, None)
+    _save_state(state_path, state)
+
+    concurrency.trace_limits()
+    return totals
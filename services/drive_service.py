@@ -0,0 +1,79 @@
+from services.credential_pool import pinned
+from services.google_client import build_service
+
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+
+def get_file_metadata(creds, file_id, fields="id, name, mimeType, modifiedTime"):
+    service = build_service("drive", "v3", creds)
+    return service.files().get(fileId=file_id, fields=fields).execute()
+
+
+def iter_files(creds, query, fields="id, name", page_size=1000):
+    """Yields every file matching ``query``, one page of results at a time."""
+    service = build_service("drive", "v3", creds)
+    page_token = None
+    # A page token is only valid for the account that received it.
+    with pinned(creds):
+        while True:
+            results = service.files().list(
+                q=query,
+                fields=f"nextPageToken, files({fields})",
+                pageSize=page_size,
+                pageToken=page_token,
+            ).execute()
+            yield from results.get("files", [])
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                return
+
+
+def get_start_page_token(creds):
+    service = build_service("drive", "v3", creds)
+    return service.changes().getStartPageToken().execute()["startPageToken"]
+
+
+def list_changes(creds, page_token, fields, page_size=1000):
+    service = build_service("drive", "v3", creds)
+    return service.changes().list(
+        pageToken=page_token,
+        fields=fields,
+        pageSize=page_size,
+        spaces="drive",
+        includeRemoved=True,
+    ).execute()
+
+
+def list_children(
+    creds,
+    folder_id,
+    page_token=None,
+    fields="nextPageToken, files(id, name, mimeType)",
+    page_size=1000,
+):
+    service = build_service("drive", "v3", creds)
+    return service.files().list(
+        q=f"'{folder_id}' in parents and trashed = false",
+        fields=fields,
+        pageSize=page_size,
+        pageToken=page_token,
+    ).execute()
+
+
+def create_folder(creds, name, parents=None):
+    service = build_service("drive", "v3", creds)
+    body = {"name": name, "mimeType": FOLDER_MIME_TYPE}
+    if parents:
+        body["parents"] = parents
+    return service.files().create(body=body, fields="id, name").execute()
+
+
+def list_permissions(creds, file_id, page_token=None, fields=None, page_size=100):
+    service = build_service("drive", "v3", creds)
+    return service.permissions().list(
+        fileId=file_id,
+        fields=fields,
+        pageSize=page_size,
+        pageToken=page_token,
+    ).execute()
@@ -0,0 +1,158 @@
+import json
+import os
+import time
+
+from services import drive_service
+from services.config import WATCH_STATE_FILE
+from services.forms_service import FORM_MIME_TYPE
+
+
+WATCH_TYPES = {
+    "docs": "application/vnd.google-apps.document",
+    "sheets": "application/vnd.google-apps.spreadsheet",
+    "forms": FORM_MIME_TYPE,
+}
+
+# Only what an event needs; Drive otherwise returns the full file resource
+# for every change.
+CHANGE_FIELDS = (
+    "nextPageToken,newStartPageToken,"
+    "changes(fileId,removed,time,file(name,mimeType,createdTime,modifiedTime,trashed))"
+)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+MAX_KNOWN_FILES = 10000
+
+
+def _state_key(profile, types):
+    return f"{profile}:{','.join(sorted(types))}"
+
+
+def _load_state(key):
+    if not os.path.exists(WATCH_STATE_FILE):
+        return {}
+    with open(WATCH_STATE_FILE, "r", encoding="utf-8") as state_file:
+        return json.load(state_file).get(key, {})
+
+
+def _save_state(key, state):
+    all_states = {}
+    if os.path.exists(WATCH_STATE_FILE):
+        with open(WATCH_STATE_FILE, "r", encoding="utf-8") as state_file:
+            all_states = json.load(state_file)
+    all_states[key] = state
+
+    os.makedirs(os.path.dirname(WATCH_STATE_FILE), exist_ok=True)
+    temp_path = f"{WATCH_STATE_FILE}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as state_file:
+        json.dump(all_states, state_file)
+    os.replace(temp_path, WATCH_STATE_FILE)
+
+
+def _to_event(change, type_by_mime, known_files):
+    file_id = change.get("fileId")
+    file_entry = change.get("file")
+
+    if change.get("removed") or not file_entry:
+        file_type = known_files.pop(file_id, None)
+        if file_type is None:
+            return None
+        return {"event": "removed", "type": file_type, "id": file_id, "time": change.get("time")}
+
+    file_type = type_by_mime.get(file_entry.get("mimeType"))
+    if file_type is None:
+        return None
+
+    # Re-inserting keeps the most recently seen files at the end, so trimming
+    # from the front drops the stalest entries.
+    known_files.pop(file_id, None)
+    if file_entry.get("trashed"):
+        event_name = "trashed"
+    else:
+        known_files[file_id] = file_type
+        created = file_entry.get("createdTime") == file_entry.get("modifiedTime")
+        event_name = "created" if created else "modified"
+
+    return {
+        "event": event_name,
+        "type": file_type,
+        "id": file_id,
+        "name": file_entry.get("name"),
+        "modifiedTime": file_entry.get("modifiedTime"),
+        "time": change.get("time"),
+    }
+
+
+def poll_changes(creds, state, type_by_mime):
+    """Drains every page of changes since ``state['page_token']``.
+
+    Yields one event per relevant change. Yielding ``None`` after each page
+    tells the caller the page's token has been advanced and is safe to persist.
+    """
+    page_token = state["page_token"]
+    known_files = state.setdefault("known_files", {})
+    while True:
+        page = drive_service.list_changes(creds, page_token, CHANGE_FIELDS)
+        for change in page.get("changes", []):
+            event = _to_event(change, type_by_mime, known_files)
+            if event is not None:
+                yield event
+
+        while len(known_files) > MAX_KNOWN_FILES:
+            known_files.pop(next(iter(known_files)))
+
+        page_token = page.get("nextPageToken") or page.get("newStartPageToken")
+        state["page_token"] = page_token
+        yield None
+        if "newStartPageToken" in page or not page.get("nextPageToken"):
+            return
+
+
+def watch(
+    creds,
+    profile,
+    types,
+    emit,
+    min_interval=5.0,
+    max_interval=300.0,
+    once=False,
+    sleep=time.sleep,
+):
+    """Polls Drive's change feed and calls ``emit`` for each relevant change.
+
+    The poll interval grows by half after every quiet poll, up to
+    ``max_interval``, and drops back to ``min_interval`` when changes arrive.
+    Rate-limit and server errors double the interval instead of failing.
+    """
+    from googleapiclient.errors import HttpError
+
+    type_by_mime = {WATCH_TYPES[name]: name for name in types}
+    key = _state_key(profile, types)
+    state = _load_state(key)
+    if not state.get("page_token"):
+        state["page_token"] = drive_service.get_start_page_token(creds)
+        _save_state(key, state)
+
+    interval = min_interval
+    while True:
+        emitted = 0
+        try:
+            for event in poll_changes(creds, state, type_by_mime):
+                if event is None:
+                    _save_state(key, state)
+                    continue
+                emit(event)
+                emitted += 1
+        except HttpError as error:
+            if once or error.resp.status not in RETRYABLE_STATUSES:
+                raise
+            interval = min(max(interval, min_interval) * 2, max_interval)
+        else:
+            if emitted:
+                interval = min_interval
+            else:
+                interval = min(interval * 1.5, max_interval)
+
+        if once:
+            return
+        sleep(interval)
@@ -1,23 +1,24 @@
-from googleapiclient.discovery import build
+from services import drive_service
+from services.credential_pool import pinned
+from services.google_client import build_service
 
 
 FORM_MIME_TYPE = "application/vnd.google-apps.form"
 
 
 def create_form(creds, title):
-    service = build("forms", "v1", credentials=creds)
+    service = build_service("forms", "v1", creds)
     return service.forms().create(
         body={"info": {"title": title}},
     ).execute()
 
 
-def list_forms(creds):
-    service = build("drive", "v3", credentials=creds)
-    results = service.files().list(
-        q=f"mimeType='{FORM_MIME_TYPE}'",
-        fields="nextPageToken, files(id, name)",
-    ).execute()
-    return results.get("files", [])
+def iter_forms(creds, page_size=1000):
+    return drive_service.iter_files(
+        creds,
+        f"mimeType='{FORM_MIME_TYPE}' and trashed = false",
+        page_size=page_size,
+    )
 
 
 def _question_payload(question_type, options):
@@ -42,7 +43,7 @@ def _question_payload(question_type, options):
 
 
 def add_question(creds, form_id, question_type, title, options=None):
-    service = build("forms", "v1", credentials=creds)
+    service = build_service("forms", "v1", creds)
     form = service.forms().get(formId=form_id).execute()
     item_index = len(form.get("items", []))
 
@@ -66,9 +67,28 @@ def add_question(creds, form_id, question_type, title, options=None):
     ).execute()
 
 
-def get_responses(creds, form_id):
-    service = build("forms", "v1", credentials=creds)
-    return service.forms().responses().list(formId=form_id).execute()
+def iter_responses(creds, form_id, submitted_since=None, page_size=5000):
+    """Yields responses page by page, optionally only those submitted at or after
+    ``submitted_since`` (an RFC 3339 timestamp)."""
+    service = build_service("forms", "v1", creds)
+    params = {"formId": form_id, "pageSize": page_size}
+    if submitted_since:
+        params["filter"] = f"timestamp >= {submitted_since}"
+
+    # A page token is only valid for the account that received it.
+    with pinned(creds):
+        while True:
+            result = service.forms().responses().list(**params).execute(num_retries=3)
+            page_token = result.get("nextPageToken")
+            responses = result.pop("responses", [])
+            # Handing responses out one at a time lets each go as soon as it
+            # is used, so no two pages are ever held together.
+            responses.reverse()
+            while responses:
+                yield responses.pop()
+            if not page_token:
+                break
+            params["pageToken"] = page_token
 
 
 def extract_answer_values(answer):
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+
+from services import forms_service
+from services import sheets_service
+from services.config import SYNC_STATE_DIR
+
+
+FIXED_COLUMNS = ["responseId", "lastSubmittedTime"]
+API_RETRIES = 3
+
+
+def state_file_path(form_id, spreadsheet_id, sheet_title):
+    key = "\0".join([form_id, spreadsheet_id, sheet_title or ""])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SYNC_STATE_DIR, f"{digest}.json")
+
+
+def _ids_path(state_path):
+    return state_path[:-len(".json")] + ".ids"
+
+
+def load_state(state_path):
+    if not os.path.exists(state_path):
+        return {"watermark": None, "columns": [], "header_cell": None, "header_width": 0}
+    with open(state_path, "r", encoding="utf-8") as state_file:
+        return json.load(state_file)
+
+
+def load_synced_ids(state_path):
+    ids_path = _ids_path(state_path)
+    if not os.path.exists(ids_path):
+        return set()
+    with open(ids_path, "r", encoding="utf-8") as ids_file:
+        return {line.strip() for line in ids_file if line.strip()}
+
+
+def record_synced_ids(state_path, response_ids):
+    # An append-only log keeps each batch's bookkeeping proportional to the
+    # batch rather than to every response synced so far.
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    with open(_ids_path(state_path), "a", encoding="utf-8") as ids_file:
+        ids_file.writelines(f"{response_id}\n" for response_id in response_ids)
+
+
+def save_state(state_path, state):
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as state_file:
+        json.dump(state, state_file)
+    os.replace(temp_path, state_path)
+
+
+def _sheet_range(sheet_title, cell="A1"):
+    if not sheet_title:
+        return cell
+    return "'" + sheet_title.replace("'", "''") + "'!" + cell
+
+
+def _to_row(response, columns):
+    answers = response.get("answers", {})
+    row = [response.get("responseId", ""), response.get("lastSubmittedTime", "")]
+    for question_id in columns:
+        answer = answers.get(question_id)
+        row.append(", ".join(forms_service.extract_answer_values(answer)) if answer else "")
+    return row
+
+
+def sync(
+    creds,
+    form_id,
+    spreadsheet_id,
+    sheet_title=None,
+    batch_size=1000,
+    on_batch=None,
+):
+    """Appends form responses that are not yet in the sheet.
+
+    Only responses submitted at or after the stored watermark are fetched, so
+    a run with nothing new costs a single ``responses.list`` call. Responses
+    already appended are skipped by ``responseId``, which also covers ties on
+    the watermark timestamp and responses edited after they were synced.
+    Columns are ``responseId``, ``lastSubmittedTime`` and one per question ID,
+    in the order the questions were first seen.
+    """
+    state_path = state_file_path(form_id, spreadsheet_id, sheet_title)
+    state = load_state(state_path)
+    synced_ids = load_synced_ids(state_path)
+    columns = state["columns"]
+    known_columns = set(columns)
+
+    totals = {
+        "fetched": 0,
+        "appended": 0,
+        "duplicates": 0,
+        "batches": 0,
+        "watermark": state["watermark"],
+    }
+    # The API does not promise any order, so the watermark only moves once
+    # every page has been read. Until then the ID log prevents duplicates.
+    latest = state["watermark"] or ""
+    batch = []
+
+    def flush():
+        header = FIXED_COLUMNS + columns
+        values = [_to_row(response, columns) for response in batch]
+        if state["header_cell"] is None:
+            values.insert(0, header)
+        elif len(header) > state["header_width"]:
+            sheets_service.write_values(creds, spreadsheet_id, state["header_cell"], [header])
+
+        result = sheets_service.append_values(
+            creds,
+            spreadsheet_id,
+            _sheet_range(sheet_title),
+            values,
+            num_retries=API_RETRIES,
+        )
+        if state["header_cell"] is None:
+            updated_range = result.get("updates", {}).get("updatedRange", "A1")
+            state["header_cell"] = updated_range.split(":", 1)[0]
+        state["header_width"] = len(header)
+
+        record_synced_ids(state_path, [response["responseId"] for response in batch])
+        save_state(state_path, state)
+        totals["appended"] += len(batch)
+        totals["batches"] += 1
+        if on_batch:
+            on_batch(len(batch))
+        batch.clear()
+
+    for response in forms_service.iter_responses(creds, form_id, state["watermark"]):
+        totals["fetched"] += 1
+        response_id = response.get("responseId")
+        if response_id in synced_ids:
+            totals["duplicates"] += 1
+            continue
+
+        synced_ids.add(response_id)
+        latest = max(latest, response.get("lastSubmittedTime", ""))
+        for question_id in sorted(response.get("answers", {})):
+            if question_id not in known_columns:
+                known_columns.add(question_id)
+                columns.append(question_id)
+        batch.append(response)
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    if latest and latest != state["watermark"]:
+        state["watermark"] = latest
+        save_state(state_path, state)
+    totals["watermark"] = state["watermark"]
+    return totals
@@ -0,0 +1,212 @@
+import functools
+import threading
+
+from services.config import EMULATOR_URL
+from services.credential_pool import CredentialPool, resolve_credentials
+from services.http_cache import DiskLruCache
+from services.tracing import trace
+
+
+# Path prefixes each API expects below its root URL. Only Drive nests its
+# methods under a service path; Docs, Sheets and Forms use the bare root.
+SERVICE_PATHS = {
+    "drive": "drive/v3/",
+}
+
+# Batch endpoints. Discovery derives them from the public root URL, so they
+# are only looked up here when requests go to the emulator.
+BATCH_PATHS = {
+    "drive": "batch/drive/v3",
+}
+
+# Root URLs for requests made outside googleapiclient, such as streamed reads.
+API_ROOT_URLS = {
+    "docs": "https://docs.googleapis.com/",
+    "drive": "https://www.googleapis.com/",
+    "forms": "https://forms.googleapis.com/",
+    "sheets": "https://sheets.googleapis.com/",
+}
+
+# Building a client parses the API's discovery document, which costs far more
+# than most requests, so clients are built once and shared by all threads.
+# Each thread still gets its own connection, because httplib2 is not
+# thread-safe.
+_clients = {}
+_clients_lock = threading.Lock()
+MAX_CACHED_CLIENTS = 16
+
+# GET responses are kept on disk with their ETags and revalidated on every
+# use, so unchanged documents, sheets and responses come back as empty 304s.
+_http_cache = DiskLruCache()
+
+
+def disable_http_cache():
+    global _http_cache
+    _http_cache = None
+
+
+class _ThreadLocalHttp:
+    """Authorized httplib2 transport that gives every thread its own connection.
+
+    ``creds`` may be a CredentialPool. Every request then acquires a
+    credential from the pool, so pagination, batches and clients shared
+    between calls all count against the pool's per-minute budgets.
+    """
+
+    def __init__(self, creds):
+        self._creds = creds
+        self._local = threading.local()
+
+    @property
+    def credentials(self):
+        # googleapiclient reads this to authorize the parts of a batch.
+        if not isinstance(self._creds, CredentialPool):
+            return self._creds
+        credentials = getattr(self._local, "credentials", None)
+        if credentials is None:
+            credentials = self._local.credentials = self._creds.acquire()
+        return credentials
+
+    def _http(self):
+        credentials = self.credentials
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        http = connections.get(id(credentials))
+        if http is None:
+            import googleapiclient.http
+            from google_auth_httplib2 import AuthorizedHttp
+
+            http = connections[id(credentials)] = AuthorizedHttp(
+                credentials,
+                http=googleapiclient.http.build_http(),
+            )
+            if _http_cache is not None:
+                http.http.cache = _http_cache
+                # httplib2 would otherwise add If-Match to writes of cached URLs.
+                http.http.optimistic_concurrency_methods = []
+        return http
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        if method == "GET" and _http_cache is not None:
+            # Never serve a cached copy without asking the server; the cache
+            # only saves the download when the ETag still matches.
+            headers = dict(headers or {})
+            headers.setdefault("cache-control", "max-age=0")
+        if isinstance(self._creds, CredentialPool):
+            self._local.credentials = self._creds.acquire()
+        response, content = self._http().request(
+            uri, method=method, body=body, headers=headers, **kwargs
+        )
+        if method == "GET" and getattr(response, "fromcache", False):
+            trace("http_cache", status="revalidated", uri=uri.split("?")[0], bytes=len(content))
+        return response, content
+
+    def __getattr__(self, name):
+        return getattr(self._http(), name)
+
+
+def api_base_url(service_name):
+    if not EMULATOR_URL:
+        return None
+    return EMULATOR_URL.rstrip("/") + "/" + SERVICE_PATHS.get(service_name, "")
+
+
+def api_url(service_name, path):
+    base_url = api_base_url(service_name)
+    if base_url is None:
+        base_url = API_ROOT_URLS[service_name] + SERVICE_PATHS.get(service_name, "")
+    return base_url + path.lstrip("/")
+
+
+def new_batch_request(service_name, service, callback=None):
+    """Returns a BatchHttpRequest for ``service`` that follows the emulator URL."""
+    if not EMULATOR_URL:
+        return service.new_batch_http_request(callback=callback)
+
+    from googleapiclient.http import BatchHttpRequest
+
+    return BatchHttpRequest(
+        callback=callback,
+        batch_uri=EMULATOR_URL.rstrip("/") + "/" + BATCH_PATHS[service_name],
+    )
+
+
+def build_session(creds):
+    """Returns a requests session for raw HTTP calls, e.g. streamed downloads."""
+    from google.auth.transport.requests import AuthorizedSession
+
+    return AuthorizedSession(resolve_credentials(creds))
+
+
+def _reuse_collections(resource):
+    # Every call to a collection accessor such as ``documents()`` builds a new
+    # Resource and renders docstrings for all of its methods, which for the
+    # Docs and Sheets schemas costs tens of milliseconds and megabytes of
+    # memory. The returned Resource is stateless, so it is built once per
+    # client and handed back on every later call.
+    for name in resource._resourceDesc.get("resources", {}):
+        factory = getattr(resource, name)
+
+        @functools.lru_cache(maxsize=None)
+        def collection(factory=factory):
+            return _reuse_collections(factory())
+
+        setattr(resource, name, collection)
+    return resource
+
+
+class JsonText(str):
+    """A request body that is already JSON text and is sent as is.
+
+    Pass one as ``body`` to skip the client library's ``json.dumps``, e.g.
+    for values serialized straight from a Grid.
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def _json_model():
+    from googleapiclient.model import JsonModel
+
+    class JsonTextModel(JsonModel):
+        def serialize(self, body_value):
+            if isinstance(body_value, JsonText):
+                return str(body_value)
+            return super().serialize(body_value)
+
+    # None of the APIs used here wrap bodies in a "data" object.
+    return JsonTextModel(data_wrapper=False)
+
+
+def build_service(service_name, version, creds):
+    # A pool is kept as is: the transport picks a credential per request.
+    key = (service_name, version, id(creds))
+    with _clients_lock:
+        cached = _clients.get(key)
+        if cached is not None and cached[0] is creds:
+            return cached[1]
+
+    # googleapiclient takes a noticeable share of startup time, so it is
+    # only imported once a command actually talks to an API.
+    from googleapiclient.discovery import build
+
+    client_options = None
+    base_url = api_base_url(service_name)
+    if base_url:
+        client_options = {"api_endpoint": base_url}
+    service = _reuse_collections(
+        build(
+            service_name,
+            version,
+            http=_ThreadLocalHttp(creds),
+            client_options=client_options,
+            model=_json_model(),
+        )
+    )
+
+    with _clients_lock:
+        if len(_clients) >= MAX_CACHED_CLIENTS:
+            # Drop the oldest client; dicts keep insertion order.
+            _clients.pop(next(iter(_clients)))
+        _clients[key] = (creds, service)
+    return service
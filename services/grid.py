@@ -0,0 +1,345 @@
+import csv
+import json
+import re
+from array import array
+from itertools import accumulate, islice
+
+
+# Rows are parsed, stored and serialized this many at a time, so only one
+# chunk ever exists as Python lists.
+CHUNK_ROWS = 1024
+
+_NUMBER_TYPECODES = {"int": "q", "float": "d", "bool": "B"}
+_SCALAR_TYPES = frozenset((int, float, bool, type(None)))
+_INT_LIMIT = 2 ** 63
+_MAX_NARROW_OFFSET = 2 ** 32 - 1
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+_encode_row = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+class _Missing:
+    """Stands in for the cells past the end of a short row."""
+
+
+_MISSING = _Missing()
+
+
+def _kind_of(cells):
+    types = set(map(type, cells))
+    types.discard(_Missing)
+    if not types:
+        return None
+    if types == {str}:
+        return "str"
+    if types == {bool}:
+        return "bool"
+    if types == {float}:
+        return "float"
+    if types == {int}:
+        numbers = [cell for cell in cells if type(cell) is int]
+        if not (-_INT_LIMIT <= min(numbers) and max(numbers) < _INT_LIMIT):
+            return "json"
+        return "int"
+    # Mixed types, including ints next to floats, keep each cell's JSON so
+    # that 1 still reads back as 1 rather than 1.0.
+    return "json"
+
+
+def _merge_kinds(current, new):
+    if new is None or new == current:
+        return current
+    return "json"
+
+
+class _Column:
+    """One column's cells in a typed array, or as text with end offsets.
+
+    ``str`` columns hold the UTF-8 text of each cell and ``json`` columns,
+    for cells of mixed types or nulls, the JSON encoding of each cell. Text
+    cells are each followed by a NUL, so a run of them decodes with one
+    ``split`` unless a cell itself contains NUL.
+    """
+
+    __slots__ = ("kind", "data", "offsets", "separated")
+
+    def __init__(self, kind, row_count):
+        self.kind = kind
+        self.separated = True
+        if kind in _NUMBER_TYPECODES:
+            self.data = array(_NUMBER_TYPECODES[kind])
+            self.data.frombytes(bytes(row_count * self.data.itemsize))
+            self.offsets = None
+        else:
+            self.data = bytearray(b"\0" * row_count)
+            self.offsets = array("I", range(row_count + 1))
+
+    @property
+    def nbytes(self):
+        if self.offsets is None:
+            return len(self.data) * self.data.itemsize
+        return len(self.data) + len(self.offsets) * self.offsets.itemsize
+
+    def _row_count(self):
+        return len(self.data) if self.offsets is None else len(self.offsets) - 1
+
+    def _convert(self, kind):
+        converted = _Column(kind, 0)
+        converted.extend(self.cells(0, self._row_count()), kind, ragged=False)
+        self.kind, self.data, self.offsets = converted.kind, converted.data, converted.offsets
+        self.separated = converted.separated
+
+    def extend(self, cells, kind, ragged):
+        kind = _merge_kinds(self.kind, kind)
+        if kind != self.kind:
+            self._convert(kind)
+
+        if self.offsets is None:
+            if ragged:
+                cells = [0 if cell is _MISSING else cell for cell in cells]
+            self.data.extend(cells)
+            return
+
+        if self.kind == "str":
+            texts = ["" if cell is _MISSING else cell for cell in cells] if ragged else cells
+        else:
+            if ragged:
+                cells = [None if cell is _MISSING else cell for cell in cells]
+            if set(map(type, cells)) <= _SCALAR_TYPES:
+                # Numbers, booleans and nulls never contain a comma.
+                texts = _encode_row(cells)[1:-1].split(",")
+            else:
+                texts = [json.dumps(cell, ensure_ascii=False) for cell in cells]
+        text = "\0".join(texts) + "\0"
+        if self.kind == "str" and text.count("\0") != len(texts):
+            self.separated = False
+        encoded = text.encode()
+        if len(encoded) == len(text):
+            lengths = map(len, texts)
+        else:
+            lengths = (len(cell.encode()) for cell in texts)
+        end = self.offsets[-1]
+        if self.offsets.typecode == "I" and end + len(encoded) > _MAX_NARROW_OFFSET:
+            self.offsets = array("Q", self.offsets)
+        self.data += encoded
+        self.offsets.extend(islice(accumulate(map((1).__add__, lengths), initial=end), 1, None))
+
+    def pad(self, count):
+        if self.offsets is None:
+            self.data.frombytes(bytes(count * self.data.itemsize))
+        else:
+            end = self.offsets[-1]
+            self.data += b"\0" * count
+            self.offsets.extend(range(end + 1, end + count + 1))
+
+    def cells(self, start, stop):
+        if self.offsets is None:
+            cells = self.data[start:stop].tolist()
+            return list(map(bool, cells)) if self.kind == "bool" else cells
+        if stop <= start:
+            return []
+        if not self.separated:
+            offsets = self.offsets[start:stop + 1]
+            return [
+                self.data[begin:end - 1].decode()
+                for begin, end in zip(offsets, offsets[1:])
+            ]
+        texts = self.data[self.offsets[start]:self.offsets[stop] - 1].decode().split("\0")
+        if self.kind == "str":
+            return texts
+        return json.loads("[" + ",".join(text or "null" for text in texts) + "]")
+
+
+class Grid:
+    """Cell values of a range, stored column by column in typed arrays.
+
+    Rows may differ in length, as they do in Sheets responses. Each column
+    takes the narrowest type that fits all of its cells: 64-bit integers,
+    doubles, booleans or UTF-8 text. Columns that mix types, ints and floats
+    included, keep each cell's JSON encoding instead. A cell costs a few bytes instead of a Python
+    object, and rows only become lists while they are being read.
+    """
+
+    def __init__(self, rows=()):
+        self._columns = []
+        self._widths = array("I")
+        self.extend(rows)
+
+    @classmethod
+    def from_json(cls, text):
+        """Builds a grid from a JSON list of rows, or a single row of cells.
+
+        Rows are decoded one at a time, so the whole nested list is never
+        built. Raises ValueError for invalid JSON.
+        """
+        position = _skip(text, 0)
+        if not text.startswith("[", position):
+            raise ValueError("JSON data must be a list or list of lists.")
+        rows = _iter_array(text, position)
+        first = next(rows, _MISSING)
+        if first is _MISSING:
+            return cls()
+        if not isinstance(first, list):
+            return cls([json.loads(text)])
+        grid = cls([first])
+        grid.extend(rows)
+        return grid
+
+    @classmethod
+    def from_csv(cls, lines, delimiter=","):
+        """Builds a grid of text cells from CSV lines, e.g. an open file."""
+        return cls(csv.reader(lines, delimiter=delimiter))
+
+    def __len__(self):
+        return len(self._widths)
+
+    def __iter__(self):
+        return self.rows()
+
+    @property
+    def width(self):
+        return len(self._columns)
+
+    @property
+    def kinds(self):
+        """The storage type of each column."""
+        return [column.kind for column in self._columns]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the grid's arrays."""
+        return len(self._widths) * self._widths.itemsize + sum(
+            column.nbytes for column in self._columns
+        )
+
+    def extend(self, rows):
+        """Appends rows, each a list of JSON-compatible cell values."""
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, CHUNK_ROWS))
+            if not chunk:
+                return
+            self._extend_chunk(chunk)
+
+    def _extend_chunk(self, rows):
+        if not all(isinstance(row, list) for row in rows):
+            raise ValueError("JSON data must be a list or list of lists.")
+        widths = list(map(len, rows))
+        width = max(widths)
+        ragged = any(row_width != width for row_width in widths)
+        if ragged:
+            rows = [row + [_MISSING] * (width - len(row)) for row in rows]
+
+        row_count = len(self._widths)
+        for index, cells in enumerate(zip(*rows)):
+            kind = _kind_of(cells)
+            if index == len(self._columns):
+                self._columns.append(_Column(kind, row_count))
+            self._columns[index].extend(cells, kind, ragged)
+        for column in self._columns[width:]:
+            column.pad(len(rows))
+        self._widths.extend(widths)
+
+    def chunks(self, start=0, stop=None):
+        """Yields rows ``start`` to ``stop`` as lists of up to CHUNK_ROWS tuples.
+
+        Cheaper than ``rows`` when each row is only read, e.g. to print it.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        for chunk_start in range(start, stop, CHUNK_ROWS):
+            chunk_stop = min(chunk_start + CHUNK_ROWS, stop)
+            widths = self._widths[chunk_start:chunk_stop]
+            columns = [column.cells(chunk_start, chunk_stop) for column in self._columns]
+            if not columns:
+                yield [()] * len(widths)
+            elif min(widths) == len(columns):
+                yield list(zip(*columns))
+            else:
+                yield [row[:width] for width, row in zip(widths, zip(*columns))]
+
+    def rows(self, start=0, stop=None):
+        """Yields rows ``start`` to ``stop`` as lists of cell values."""
+        for chunk in self.chunks(start, stop):
+            yield from map(list, chunk)
+
+    def to_json(self, start=0, stop=None):
+        """Returns rows ``start`` to ``stop`` as the JSON text of a list of rows."""
+        return "[" + ",".join(
+            _encode_row(chunk)[1:-1] for chunk in self.chunks(start, stop) if chunk
+        ) + "]"
+
+    def changed_rows(self, current):
+        """Yields ``(start, stop)`` ranges of rows that differ from ``current``.
+
+        A row is unchanged when ``current`` holds the same values in the same
+        cells; cells past the end of this grid's row are not compared, since
+        writing the row would leave them as they are.
+        """
+        current_rows = current.rows()
+        block_start = None
+        index = -1
+        for index, row in enumerate(self.rows()):
+            previous = next(current_rows, [])
+            if row != previous[:len(row)]:
+                if block_start is None:
+                    block_start = index
+            elif block_start is not None:
+                yield block_start, index
+                block_start = None
+        if block_start is not None:
+            yield block_start, index + 1
+
+
+def _skip(text, position):
+    return _WHITESPACE.match(text, position).end()
+
+
+def _expect(text, position, token):
+    if not text.startswith(token, position):
+        raise ValueError(f"Invalid JSON: expected '{token}' at position {position}.")
+    return _skip(text, position + 1)
+
+
+def _iter_array(text, position):
+    """Yields the elements of the JSON array at ``position``, one at a time.
+
+    Returns the position after the array, for ``yield from``.
+    """
+    position = _expect(text, position, "[")
+    if text.startswith("]", position):
+        return _skip(text, position + 1)
+    while True:
+        value, position = _decoder.raw_decode(text, position)
+        yield value
+        position = _skip(text, position)
+        if text.startswith("]", position):
+            return _skip(text, position + 1)
+        position = _expect(text, position, ",")
+
+
+def load_value_range(content):
+    """Parses a Sheets ValueRange response, with its ``values`` as a Grid."""
+    text = content.decode("utf-8") if isinstance(content, bytes) else content
+    result = {}
+    grid = Grid()
+
+    def fields():
+        position = _expect(text, _skip(text, 0), "{")
+        if text.startswith("}", position):
+            return
+        while True:
+            key, position = _decoder.raw_decode(text, position)
+            position = _expect(text, _skip(text, position), ":")
+            if key == "values":
+                position = yield from _iter_array(text, position)
+            else:
+                result[key], position = _decoder.raw_decode(text, position)
+                position = _skip(text, position)
+            if text.startswith("}", position):
+                return
+            position = _expect(text, position, ",")
+
+    grid.extend(fields())
+    result["values"] = grid
+    return result
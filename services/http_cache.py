@@ -0,0 +1,90 @@
+import hashlib
+import os
+import threading
+
+from services.config import HTTP_CACHE_DIR
+
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+class DiskLruCache:
+    """Size-bounded on-disk cache implementing httplib2's cache interface.
+
+    httplib2 stores each response under its URL together with the ETag and
+    sends ``If-None-Match`` on the next request, so an unchanged resource
+    comes back as an empty 304. Entries are files whose modification time is
+    refreshed on every hit; when the directory grows past ``max_bytes`` the
+    least recently used entries are removed.
+    """
+
+    def __init__(self, directory=HTTP_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as cache_file:
+                value = cache_file.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return value
+
+    def set(self, key, value):
+        headers = value.split(b"\r\n\r\n", 1)[0].lower()
+        if not headers.startswith(b"etag:") and b"\r\netag:" not in headers:
+            # Without an ETag the entry could never be revalidated.
+            self.delete(key)
+            return
+        path = self._path(key)
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(temp_path, "wb") as cache_file:
+                cache_file.write(value)
+            os.replace(temp_path, path)
+            if self._total_bytes is not None:
+                self._total_bytes += len(value) - previous_size
+            self._evict()
+
+    def delete(self, key):
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _evict(self):
+        if self._total_bytes is not None and self._total_bytes <= self.max_bytes:
+            return
+
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        self._total_bytes = sum(size for _, size, _ in entries)
+
+        entries.sort()
+        for _, size, path in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._total_bytes -= size
@@ -0,0 +1,115 @@
+import codecs
+import json
+import re
+
+
+# One token per match: a complete string, a structural character or a
+# number/literal. An unterminated string at the end of the buffer does not
+# match, which is the signal to read more input.
+_TOKEN_PATTERN = re.compile(
+    r'[ \t\r\n]*(?:"((?:[^"\\]|\\.)*)"|([{}\[\]:,])|(-?[0-9][0-9.eE+-]*|true|false|null))',
+    re.S,
+)
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+def _decode_string(raw):
+    if "\\" not in raw:
+        return raw
+    return json.loads('"' + raw + '"')
+
+
+def _decode_literal(raw):
+    if raw in _LITERALS:
+        return _LITERALS[raw]
+    return json.loads(raw)
+
+
+def iter_values(chunks, paths, arrays=()):
+    """Yields ``(path, value)`` for every scalar whose path is in ``paths``.
+
+    ``chunks`` is an iterable of UTF-8 byte strings, e.g. an HTTP response
+    read in pieces. A path is a tuple of object keys, with ``None`` standing
+    for any array position, e.g. ``("body", "content", None, "paragraph")``.
+    An array whose path is in ``arrays`` is yielded whole, as a list of its
+    scalar elements, once it closes; e.g. ``("values", None)`` yields each
+    row of a Sheets value range. Only the unread tail of the input is
+    buffered, so memory is bounded by the chunk size plus the longest single
+    value or collected array.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    finished = False
+
+    # Parallel stacks: whether each open container is an object, and the
+    # path of the value currently being read inside it.
+    is_object = []
+    path_stack = []
+    path = ()
+    expecting_key = False
+    match_token = _TOKEN_PATTERN.match
+    # Elements of the array from ``arrays`` being read, and its nesting depth.
+    collected = None
+    collected_depth = 0
+
+    while True:
+        match = match_token(buffer, position)
+        if match is None or (
+            match.group(3) is not None and match.end() == len(buffer) and not finished
+        ):
+            # Incomplete token, or a literal that may continue in the next chunk.
+            if finished:
+                if buffer[position:].strip():
+                    raise ValueError(f"Invalid JSON near: {buffer[position:position + 40]!r}")
+                return
+            chunk = next(chunks, None)
+            buffer = buffer[position:]
+            position = 0
+            if chunk is None:
+                buffer += decoder.decode(b"", final=True)
+                finished = True
+            else:
+                buffer += decoder.decode(chunk)
+            continue
+
+        position = match.end()
+        string, structural, literal = match.groups()
+
+        if structural is not None:
+            if structural == "{" or structural == "[":
+                is_object.append(structural == "{")
+                path_stack.append(path)
+                expecting_key = structural == "{"
+                if not expecting_key:
+                    if collected is None and path in arrays:
+                        collected = []
+                        collected_depth = len(is_object)
+                    path = path + (None,)
+            elif structural == "}" or structural == "]":
+                if collected is not None and len(is_object) == collected_depth:
+                    yield path_stack[-1], collected
+                    collected = None
+                is_object.pop()
+                path = path_stack.pop()
+                expecting_key = False
+            elif structural == ",":
+                if is_object and is_object[-1]:
+                    expecting_key = True
+            continue
+
+        if expecting_key:
+            path = path_stack[-1] + (_decode_string(string),)
+            expecting_key = False
+            continue
+
+        if collected is not None and len(is_object) == collected_depth:
+            collected.append(
+                _decode_string(string) if string is not None else _decode_literal(literal)
+            )
+        elif path in paths:
+            if string is not None:
+                yield path, _decode_string(string)
+            else:
+                yield path, _decode_literal(literal)
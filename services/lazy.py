@@ -0,0 +1,21 @@
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Returns module ``name``, deferring its execution until first attribute access.
+
+    The CLI imports every service module, but a single command uses only a
+    few of them and shell completion uses none. Loading them on demand keeps
+    googleapiclient, httplib2 and friends out of startup.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,49 @@
+import json
+
+import click
+
+
+FORMATS = ("table", "ndjson", "json")
+
+_format = "table"
+_records_written = 0
+
+
+def set_format(output_format):
+    global _format, _records_written
+    _format = output_format
+    _records_written = 0
+
+
+def is_structured():
+    """True when stdout carries JSON records instead of human-readable text."""
+    return _format != "table"
+
+
+def text(message="", **kwargs):
+    """Writes human-readable output, which the JSON formats leave out."""
+    if _format == "table":
+        click.echo(message, **kwargs)
+
+
+def record(item):
+    """Writes one record as soon as it is known.
+
+    ``ndjson`` writes one JSON object per line and flushes it, so a reader
+    on the other end of a pipe sees it immediately. ``json`` writes the
+    records as the elements of a single array, closed by ``finish``.
+    """
+    global _records_written
+    if _format == "ndjson":
+        click.echo(json.dumps(item, ensure_ascii=False))
+    elif _format == "json":
+        prefix = "[\n" if not _records_written else ",\n"
+        click.echo(prefix + json.dumps(item, ensure_ascii=False), nl=False)
+    _records_written += 1
+
+
+def finish():
+    global _records_written
+    if _format == "json":
+        click.echo("\n]" if _records_written else "[]")
+    _records_written = 0
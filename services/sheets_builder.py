@@ -0,0 +1,205 @@
+import json
+
+from services import sheets_service
+
+
+MAX_BATCH_REQUESTS = 500
+MAX_BATCH_BYTES = 2 * 1024 * 1024
+DEFAULT_ROW_COUNT = 1000
+DEFAULT_COLUMN_COUNT = 26
+
+# Keys whose GridRange/DimensionRange values get the tab's sheetId filled in
+# when a request listed under one tab of a spec leaves it out.
+_SHEET_SCOPED_KEYS = {"range", "ranges", "dimensions", "source", "destination"}
+
+
+class BatchUpdateBuilder:
+    """Collects spreadsheets.batchUpdate requests and sends them in bounded batches.
+
+    A batch is flushed once it holds ``max_requests`` requests or adding the
+    next one would push its JSON body past ``max_bytes``. Requests keep their
+    order, both within and across batches.
+    """
+
+    def __init__(
+        self,
+        creds,
+        spreadsheet_id,
+        max_requests=MAX_BATCH_REQUESTS,
+        max_bytes=MAX_BATCH_BYTES,
+    ):
+        self.creds = creds
+        self.spreadsheet_id = spreadsheet_id
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.batches_sent = 0
+        self.requests_sent = 0
+        self._pending = []
+        self._pending_bytes = 0
+
+    def add(self, request):
+        size = len(json.dumps(request, separators=(",", ":"))) + 1
+        if self._pending and self._pending_bytes + size > self.max_bytes:
+            self.flush()
+        self._pending.append(request)
+        self._pending_bytes += size
+        if len(self._pending) >= self.max_requests:
+            self.flush()
+
+    def extend(self, requests):
+        for request in requests:
+            self.add(request)
+
+    def flush(self):
+        if not self._pending:
+            return
+        sheets_service.batch_update(self.creds, self.spreadsheet_id, self._pending)
+        self.batches_sent += 1
+        self.requests_sent += len(self._pending)
+        self._pending = []
+        self._pending_bytes = 0
+
+
+def _extended_value(value):
+    if value is None or value == "":
+        return {}
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, (int, float)):
+        return {"numberValue": value}
+    value = str(value)
+    if value.startswith("="):
+        return {"formulaValue": value}
+    return {"stringValue": value}
+
+
+def _row_data(row, cell_format=None):
+    cells = []
+    for value in row:
+        cell = {}
+        extended = _extended_value(value)
+        if extended:
+            cell["userEnteredValue"] = extended
+        if cell_format:
+            cell["userEnteredFormat"] = cell_format
+        cells.append(cell)
+    return {"values": cells}
+
+
+def _with_sheet_id(value, sheet_id):
+    if isinstance(value, list):
+        return [_with_sheet_id(item, sheet_id) for item in value]
+    if not isinstance(value, dict):
+        return value
+    result = {}
+    for key, item in value.items():
+        if key in _SHEET_SCOPED_KEYS:
+            if isinstance(item, list):
+                item = [
+                    {"sheetId": sheet_id, **entry} if isinstance(entry, dict) else entry
+                    for entry in item
+                ]
+            elif isinstance(item, dict):
+                item = {"sheetId": sheet_id, **item}
+        result[key] = _with_sheet_id(item, sheet_id)
+    return result
+
+
+def _validate_spec(spec):
+    if not isinstance(spec, dict):
+        raise ValueError("The spec must be a JSON object.")
+    tabs = spec.get("sheets") or []
+    if not isinstance(tabs, list):
+        raise ValueError("'sheets' must be a list of tab objects.")
+    titles = set()
+    for number, tab in enumerate(tabs, start=1):
+        if not isinstance(tab, dict):
+            raise ValueError(f"Tab {number} must be a JSON object.")
+        title = tab.get("title") or f"Sheet{number}"
+        if title in titles:
+            raise ValueError(f"Duplicate tab title: {title}")
+        titles.add(title)
+        data = tab.get("data", [])
+        if not isinstance(data, list) or any(not isinstance(row, list) for row in data):
+            raise ValueError(f"'data' of tab '{title}' must be a list of rows.")
+    if not isinstance(spec.get("requests", []), list):
+        raise ValueError("'requests' must be a list of batchUpdate requests.")
+    return tabs
+
+
+def build_create_body(spec):
+    """Turns a spec into the ``sheets`` of a create call plus follow-up requests.
+
+    Everything the create call accepts (tab properties, frozen rows and
+    columns, column widths, initial data and header formatting) goes into it
+    directly. Only what it cannot express is returned as batchUpdate requests.
+    """
+    tabs = _validate_spec(spec)
+    sheets = []
+    requests = []
+    for index, tab in enumerate(tabs):
+        sheet_id = index
+        data = tab.get("data", [])
+        width = max((len(row) for row in data), default=0)
+        properties = {
+            "sheetId": sheet_id,
+            "title": tab.get("title") or f"Sheet{index + 1}",
+            "index": index,
+            "gridProperties": {
+                "rowCount": tab.get("rowCount", max(DEFAULT_ROW_COUNT, len(data))),
+                "columnCount": tab.get("columnCount", max(DEFAULT_COLUMN_COUNT, width)),
+                "frozenRowCount": tab.get("frozenRows", 0),
+                "frozenColumnCount": tab.get("frozenColumns", 0),
+            },
+        }
+        if tab.get("tabColor"):
+            properties["tabColorStyle"] = {"rgbColor": tab["tabColor"]}
+
+        header_format = tab.get("headerFormat")
+        grid_data = {"startRow": 0, "startColumn": 0}
+        if data:
+            grid_data["rowData"] = [
+                _row_data(row, header_format if row_index == 0 else None)
+                for row_index, row in enumerate(data)
+            ]
+        if tab.get("columnWidths"):
+            grid_data["columnMetadata"] = [
+                {"pixelSize": pixels} for pixels in tab["columnWidths"]
+            ]
+
+        sheet = {"properties": properties}
+        if len(grid_data) > 2:
+            sheet["data"] = [grid_data]
+        sheets.append(sheet)
+
+        if tab.get("autoResizeColumns") and width:
+            requests.append({
+                "autoResizeDimensions": {
+                    "dimensions": {
+                        "sheetId": sheet_id,
+                        "dimension": "COLUMNS",
+                        "startIndex": 0,
+                        "endIndex": width,
+                    }
+                }
+            })
+        requests.extend(_with_sheet_id(request, sheet_id) for request in tab.get("requests", []))
+
+    requests.extend(spec.get("requests", []))
+    return sheets, requests
+
+
+def create_from_spec(creds, spec, title=None):
+    """Creates a spreadsheet from a spec in one create call plus bounded batchUpdates.
+
+    Returns the created spreadsheet and the builder, whose counters show how
+    many follow-up requests and batches were sent.
+    """
+    sheets, requests = build_create_body(spec)
+    title = title or spec.get("title") or "Untitled spreadsheet"
+    spreadsheet = sheets_service.create_spreadsheet(creds, title, sheets=sheets or None)
+
+    builder = BatchUpdateBuilder(creds, spreadsheet["spreadsheetId"])
+    builder.extend(requests)
+    builder.flush()
+    return spreadsheet, builder
@@ -0,0 +1,221 @@
+import csv
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from services import sheets_service
+from services.config import FOLLOW_STATE_DIR
+from services.tracing import trace
+
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+API_RETRIES = 3
+MAX_BACKOFF_SECONDS = 60.0
+# About two minutes of backoff before a batch is given up on.
+MAX_APPEND_ATTEMPTS = 8
+
+
+def parse_line(line, delimiter=","):
+    text = line.rstrip("\r\n")
+    if not text.strip():
+        return None
+    if text.lstrip().startswith("["):
+        row = json.loads(text)
+        if not isinstance(row, list):
+            raise ValueError("JSON lines must contain a list of cell values.")
+        return row
+    return next(csv.reader([text], delimiter=delimiter))
+
+
+def state_file_path(spreadsheet_id, cell_range, source_path):
+    key = "\0".join([spreadsheet_id, cell_range, os.path.abspath(source_path)])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(FOLLOW_STATE_DIR, f"{digest}.json")
+
+
+def load_offset(state_path):
+    if not os.path.exists(state_path):
+        return 0
+    with open(state_path, "r", encoding="utf-8") as state_file:
+        return int(json.load(state_file).get("offset", 0))
+
+
+def save_offset(state_path, offset, source_path):
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as state_file:
+        json.dump({"source": os.path.abspath(source_path), "offset": offset}, state_file)
+    os.replace(temp_path, state_path)
+
+
+def _read_rows(stream, offset, follow, poll_interval, delimiter, stop_event, rows):
+    try:
+        while not stop_event.is_set():
+            line = stream.readline()
+            if line.endswith(b"\n") or (line and not follow):
+                offset += len(line)
+                row = parse_line(line.decode("utf-8"), delimiter)
+                if row is not None:
+                    # Blocks while the buffer is full, which is the backpressure.
+                    rows.put(("row", row, offset))
+                continue
+
+            if not follow:
+                break
+
+            if line:
+                # Wait for the writer to finish the partial line.
+                stream.seek(offset)
+            if os.fstat(stream.fileno()).st_size < offset:
+                offset = 0
+                stream.seek(0)
+            time.sleep(poll_interval)
+        rows.put(("end", None, offset))
+    except Exception as error:
+        rows.put(("error", error, offset))
+
+
+def _append_with_retry(
+    creds, spreadsheet_id, cell_range, values, value_input_option, on_retry=None
+):
+    delay = 1.0
+    for attempt in range(1, MAX_APPEND_ATTEMPTS + 1):
+        try:
+            return sheets_service.append_values(
+                creds,
+                spreadsheet_id,
+                cell_range,
+                values,
+                value_input_option=value_input_option,
+                num_retries=API_RETRIES,
+            )
+        except HttpError as error:
+            if error.resp.status not in RETRYABLE_STATUSES or attempt == MAX_APPEND_ATTEMPTS:
+                raise
+            failure = error
+        except OSError as error:
+            if attempt == MAX_APPEND_ATTEMPTS:
+                raise
+            failure = error
+        trace("follow_retry", attempt=attempt, delay=delay, error=str(failure))
+        if on_retry:
+            on_retry(attempt, delay, failure)
+        time.sleep(delay)
+        delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+
+
+def follow(
+    creds,
+    spreadsheet_id,
+    cell_range,
+    source_path,
+    batch_size=500,
+    flush_interval=2.0,
+    max_buffered_rows=10000,
+    value_input_option="RAW",
+    delimiter=",",
+    exit_on_eof=False,
+    poll_interval=0.25,
+    on_flush=None,
+    on_retry=None,
+):
+    """Tails ``source_path`` (or stdin for ``-``) and appends rows in batches.
+
+    A batch is flushed when it reaches ``batch_size`` rows or when its oldest
+    row has waited ``flush_interval`` seconds. For files, the byte offset after
+    the last committed row is persisted so a restart resumes from there.
+    Rows are delivered at least once: a crash between an append and the
+    offset save replays that batch. A batch that is still throttled or failing
+    after ``MAX_APPEND_ATTEMPTS`` tries raises; each retry before that is
+    passed to ``on_retry``.
+    """
+    from_stdin = source_path == "-"
+    state_path = None if from_stdin else state_file_path(spreadsheet_id, cell_range, source_path)
+    offset = 0 if from_stdin else load_offset(state_path)
+
+    if from_stdin:
+        stream = sys.stdin.buffer
+    else:
+        stream = open(source_path, "rb")
+        if os.fstat(stream.fileno()).st_size < offset:
+            offset = 0
+        stream.seek(offset)
+
+    rows = queue.Queue(maxsize=max_buffered_rows)
+    stop_event = threading.Event()
+    reader = threading.Thread(
+        target=_read_rows,
+        args=(
+            stream,
+            offset,
+            not from_stdin and not exit_on_eof,
+            poll_interval,
+            delimiter,
+            stop_event,
+            rows,
+        ),
+        daemon=True,
+    )
+    reader.start()
+
+    totals = {"rows": 0, "batches": 0, "offset": offset}
+    buffer = []
+    buffered_offset = offset
+    deadline = None
+
+    def flush():
+        nonlocal buffer, deadline
+        if not buffer:
+            return
+        _append_with_retry(
+            creds, spreadsheet_id, cell_range, buffer, value_input_option, on_retry=on_retry
+        )
+        if state_path:
+            save_offset(state_path, buffered_offset, source_path)
+        totals["rows"] += len(buffer)
+        totals["batches"] += 1
+        totals["offset"] = buffered_offset
+        if on_flush:
+            on_flush(len(buffer), buffered_offset)
+        buffer = []
+        deadline = None
+
+    try:
+        while True:
+            timeout = poll_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                kind, payload, item_offset = rows.get(timeout=timeout)
+            except queue.Empty:
+                kind = None
+
+            if kind == "error":
+                flush()
+                raise payload
+            if kind == "end":
+                flush()
+                break
+            if kind == "row":
+                buffer.append(payload)
+                buffered_offset = item_offset
+                if deadline is None:
+                    deadline = time.monotonic() + flush_interval
+
+            if len(buffer) >= batch_size or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                flush()
+    except KeyboardInterrupt:
+        stop_event.set()
+        flush()
+    finally:
+        stop_event.set()
+        if not from_stdin:
+            stream.close()
+
+    return totals
@@ -0,0 +1,319 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import time
+
+from services import drive_service
+from services import sheets_service
+from services.config import CACHE_DIR, DEFAULT_PROFILE
+
+
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "sheets")
+TABLE_NAME = "sheet"
+DOWNLOAD_CHUNK_ROWS = 20000
+
+_TYPE_ORDER = ["INTEGER", "REAL", "TEXT"]
+_INTEGER_PATTERN = re.compile(r"^[+-]?\d+$")
+# Codes such as "007" lose their zeros as numbers, and "1_000" is only a
+# number to Python.
+_TEXT_PATTERN = re.compile(r"^[+-]?0\d|_")
+
+
+def _safe_name(text):
+    return re.sub(r"[^A-Za-z0-9_-]", "_", text)
+
+
+def snapshot_path(profile, spreadsheet_id, sheet_title):
+    """Returns the snapshot of one sheet as seen by ``profile``."""
+    # Titles may hold any character, so they are hashed into the file name.
+    title_digest = hashlib.sha1(sheet_title.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(
+        SNAPSHOT_DIR, _safe_name(profile), f"{_safe_name(spreadsheet_id)}-{title_digest}.sqlite"
+    )
+
+
+def _first_sheet_path(profile, spreadsheet_id):
+    return os.path.join(SNAPSHOT_DIR, _safe_name(profile), f"{_safe_name(spreadsheet_id)}.first")
+
+
+def _read_first_sheet(profile, spreadsheet_id):
+    """Returns the title the first sheet had when it was last downloaded."""
+    path = _first_sheet_path(profile, spreadsheet_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as first_file:
+        return json.load(first_file).get("title")
+
+
+def _write_first_sheet(profile, spreadsheet_id, title):
+    path = _first_sheet_path(profile, spreadsheet_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as first_file:
+        json.dump({"title": title}, first_file)
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _a1_sheet(title):
+    return "'" + title.replace("'", "''") + "'"
+
+
+def _column_name(header_cell, position, used):
+    name = re.sub(r"\W+", "_", str(header_cell or "").strip()).strip("_")
+    if not name:
+        name = f"col{position + 1}"
+    candidate = name
+    suffix = 2
+    while candidate.lower() in used:
+        candidate = f"{name}_{suffix}"
+        suffix += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def _cell_type(value):
+    if _TEXT_PATTERN.search(value):
+        return "TEXT"
+    if _INTEGER_PATTERN.match(value):
+        return "INTEGER"
+    try:
+        number = float(value)
+    except ValueError:
+        return "TEXT"
+    return "REAL" if math.isfinite(number) else "TEXT"
+
+
+def _read_meta(path):
+    if not os.path.exists(path):
+        return None
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute("SELECT key, value FROM _snapshot").fetchall()
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        connection.close()
+    return {key: json.loads(value) for key, value in rows}
+
+
+def _write_meta(connection, meta):
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS _snapshot (key TEXT PRIMARY KEY, value TEXT)"
+    )
+    connection.executemany(
+        "INSERT OR REPLACE INTO _snapshot (key, value) VALUES (?, ?)",
+        [(key, json.dumps(value)) for key, value in meta.items()],
+    )
+
+
+def _download(creds, spreadsheet_id, sheet_title, row_count, path, modified_time):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    connection = sqlite3.connect(temp_path)
+    columns = []
+    used_names = set()
+    column_types = []
+    data_rows = 0
+    try:
+        # Cells land as text in a staging table one chunk at a time, so peak
+        # memory is bounded by the chunk size rather than the sheet size.
+        connection.execute("CREATE TABLE _raw (_placeholder TEXT)")
+        for start in range(1, max(row_count, 1) + 1, DOWNLOAD_CHUNK_ROWS):
+            end = start + DOWNLOAD_CHUNK_ROWS - 1
+            result = sheets_service.read_values(
+                creds,
+                spreadsheet_id,
+                f"{_a1_sheet(sheet_title)}!{start}:{end}",
+            )
+            values = result["values"]
+            rows = values.rows()
+            if start == 1 and values:
+                for position, cell in enumerate(next(rows)):
+                    columns.append(_column_name(cell, position, used_names))
+                    column_types.append(None)
+                    connection.execute(f"ALTER TABLE _raw ADD COLUMN c{position} TEXT")
+
+            while len(columns) < values.width:
+                position = len(columns)
+                columns.append(_column_name(None, position, used_names))
+                column_types.append(None)
+                connection.execute(f"ALTER TABLE _raw ADD COLUMN c{position} TEXT")
+
+            batch = []
+            for row in rows:
+                cells = []
+                for position in range(len(columns)):
+                    cell = str(row[position]) if position < len(row) else ""
+                    if cell == "":
+                        cells.append(None)
+                        continue
+                    cell_type = _cell_type(cell)
+                    current = column_types[position]
+                    if current is None or _TYPE_ORDER.index(cell_type) > _TYPE_ORDER.index(current):
+                        column_types[position] = cell_type
+                    cells.append(cell)
+                batch.append(cells)
+
+            if batch and columns:
+                placeholders = ", ".join("?" for _ in columns)
+                names = ", ".join(f"c{position}" for position in range(len(columns)))
+                connection.executemany(
+                    f"INSERT INTO _raw ({names}) VALUES ({placeholders})",
+                    batch,
+                )
+                data_rows += len(batch)
+
+        column_types = [column_type or "TEXT" for column_type in column_types]
+        if columns:
+            definitions = ", ".join(
+                f"{_quote(name)} {column_type}"
+                for name, column_type in zip(columns, column_types)
+            )
+            selections = ", ".join(
+                f"CAST(c{position} AS {column_type})" if column_type != "TEXT" else f"c{position}"
+                for position, column_type in enumerate(column_types)
+            )
+            connection.execute(f"CREATE TABLE {TABLE_NAME} ({definitions})")
+            connection.execute(f"INSERT INTO {TABLE_NAME} SELECT {selections} FROM _raw")
+        else:
+            connection.execute(f"CREATE TABLE {TABLE_NAME} (_empty TEXT)")
+        connection.execute("DROP TABLE _raw")
+
+        _write_meta(
+            connection,
+            {
+                "spreadsheet_id": spreadsheet_id,
+                "sheet_title": sheet_title,
+                "modified_time": modified_time,
+                "checked_at": time.time(),
+                "columns": list(zip(columns, column_types)),
+                "row_count": data_rows,
+            },
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+    os.replace(temp_path, path)
+
+
+def ensure_snapshot(
+    creds,
+    spreadsheet_id,
+    sheet_title=None,
+    profile=DEFAULT_PROFILE,
+    max_age=300,
+    refresh=False,
+    offline=False,
+):
+    """Makes sure a local snapshot exists and is fresh enough.
+
+    Snapshots are kept per ``profile`` and sheet. Without ``sheet_title`` the
+    first sheet is used; its title is remembered from the last download and
+    is trusted until the spreadsheet's ``modifiedTime`` changes.
+
+    Returns ``(path, status)`` where status is ``cached`` (no API calls),
+    ``revalidated`` (one Drive metadata call confirmed it is current) or
+    ``downloaded``.
+    """
+    title = sheet_title if sheet_title is not None else _read_first_sheet(profile, spreadsheet_id)
+    path = snapshot_path(profile, spreadsheet_id, title) if title is not None else None
+    meta = _read_meta(path) if path else None
+    current = meta is not None and meta.get("sheet_title") == title
+
+    if current and not refresh:
+        if offline or time.time() - meta.get("checked_at", 0) < max_age:
+            return path, "cached"
+    elif offline:
+        raise ValueError("No local snapshot for this sheet; run once without --offline.")
+
+    modified_time = drive_service.get_file_metadata(
+        creds,
+        spreadsheet_id,
+        fields="modifiedTime",
+    ).get("modifiedTime")
+
+    # An unchanged modifiedTime also means the sheets were not reordered.
+    if current and not refresh and meta.get("modified_time") == modified_time:
+        connection = sqlite3.connect(path)
+        try:
+            _write_meta(connection, {"checked_at": time.time()})
+            connection.commit()
+        finally:
+            connection.close()
+        return path, "revalidated"
+
+    sheets = sheets_service.get_sheet_properties(creds, spreadsheet_id)
+    if not sheets:
+        raise ValueError("Spreadsheet has no sheets.")
+    if sheet_title is None:
+        sheet = sheets[0]
+    else:
+        matches = [sheet for sheet in sheets if sheet["title"] == sheet_title]
+        if not matches:
+            raise ValueError(f"Sheet '{sheet_title}' not found in spreadsheet.")
+        sheet = matches[0]
+
+    path = snapshot_path(profile, spreadsheet_id, sheet["title"])
+    row_count = sheet.get("gridProperties", {}).get("rowCount", DOWNLOAD_CHUNK_ROWS)
+    _download(creds, spreadsheet_id, sheet["title"], row_count, path, modified_time)
+    if sheet_title is None:
+        _write_first_sheet(profile, spreadsheet_id, sheet["title"])
+    return path, "downloaded"
+
+
+def describe_snapshot(path):
+    meta = _read_meta(path) or {}
+    return meta.get("columns", []), meta.get("row_count", 0)
+
+
+def ensure_indexes(path, column_names):
+    columns, _ = describe_snapshot(path)
+    known = {name.lower(): name for name, _ in columns}
+    connection = sqlite3.connect(path)
+    try:
+        for column_name in column_names:
+            name = known.get(column_name.lower())
+            if name is None:
+                raise ValueError(f"Unknown column '{column_name}' for --index.")
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {_quote('idx_' + name)} "
+                f"ON {TABLE_NAME} ({_quote(name)})"
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def run_query(path, sql):
+    """Runs ``sql`` read-only against a snapshot and returns ``(columns, rows)``.
+
+    ``rows`` is a generator so callers can stream large results.
+    """
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        cursor = connection.execute(sql)
+    except Exception:
+        connection.close()
+        raise
+    columns = [description[0] for description in cursor.description or []]
+
+    def iterate_rows():
+        try:
+            while True:
+                batch = cursor.fetchmany(1000)
+                if not batch:
+                    break
+                yield from batch
+        finally:
+            connection.close()
+
+    return columns, iterate_rows()
@@ -1,31 +1,102 @@
+import itertools
 import json
+import re
+from urllib.parse import quote
 
-from googleapiclient.discovery import build
+import httplib2
+from googleapiclient.errors import HttpError
 
+from services import drive_service
+from services.google_client import JsonText, api_url, build_service, build_session
+from services.grid import Grid, load_value_range
+from services.json_stream import iter_values
 
-def create_spreadsheet(creds, title):
-    service = build("sheets", "v4", credentials=creds)
+
+SPREADSHEET_MIME_TYPE = "application/vnd.google-apps.spreadsheet"
+STREAM_CHUNK_BYTES = 64 * 1024
+_ROW_PATH = ("values", None)
+_STREAM_PATHS = {("range",), ("majorDimension",)}
+_STREAM_ARRAYS = {_ROW_PATH}
+# The column letters and row number a range starts at, e.g. "B2:D" or "3:9".
+_RANGE_START = re.compile(r"([A-Za-z]{1,3})?(\d+)?(?::|$)")
+
+
+def create_spreadsheet(creds, title, sheets=None):
+    body = {"properties": {"title": title}}
+    if sheets:
+        body["sheets"] = sheets
+    service = build_service("sheets", "v4", creds)
     return service.spreadsheets().create(
-        body={"properties": {"title": title}},
-        fields="spreadsheetId,spreadsheetUrl,properties.title",
+        body=body,
+        fields="spreadsheetId,spreadsheetUrl,properties.title,sheets.properties(sheetId,title)",
     ).execute()
 
 
-def list_spreadsheets(creds):
-    service = build("drive", "v3", credentials=creds)
-    results = service.files().list(
-        q="mimeType='application/vnd.google-apps.spreadsheet'",
-        fields="nextPageToken, files(id, name)",
-    ).execute()
-    return results.get("files", [])
+def batch_update(creds, spreadsheet_id, requests):
+    service = build_service("sheets", "v4", creds)
+    return service.spreadsheets().batchUpdate(
+        spreadsheetId=spreadsheet_id,
+        body={"requests": requests},
+        fields="spreadsheetId",
+    ).execute(num_retries=3)
+
 
+def iter_spreadsheets(creds, page_size=1000):
+    return drive_service.iter_files(
+        creds,
+        f"mimeType='{SPREADSHEET_MIME_TYPE}' and trashed = false",
+        page_size=page_size,
+    )
 
-def read_values(creds, spreadsheet_id, cell_range):
-    service = build("sheets", "v4", credentials=creds)
-    return service.spreadsheets().values().get(
+
+def get_sheet_properties(creds, spreadsheet_id):
+    service = build_service("sheets", "v4", creds)
+    spreadsheet = service.spreadsheets().get(
         spreadsheetId=spreadsheet_id,
-        range=cell_range,
+        fields="sheets.properties(sheetId,title,gridProperties)",
     ).execute()
+    return [sheet["properties"] for sheet in spreadsheet.get("sheets", [])]
+
+
+def read_values(creds, spreadsheet_id, cell_range, value_render_option=None):
+    """Reads a range; its ``values`` come back as a Grid, parsed row by row."""
+    service = build_service("sheets", "v4", creds)
+    params = {"spreadsheetId": spreadsheet_id, "range": cell_range}
+    if value_render_option:
+        params["valueRenderOption"] = value_render_option
+    request = service.spreadsheets().values().get(**params)
+    request.postproc = lambda response, content: load_value_range(content)
+    return request.execute()
+
+
+def stream_values(creds, spreadsheet_id, cell_range, chunk_size=STREAM_CHUNK_BYTES):
+    """Yields ``("range" | "majorDimension" | "row", value)`` while a range downloads.
+
+    Rows are parsed out of the response as it arrives, so the first ones
+    are available before the rest has been read and memory stays flat
+    however large the range is.
+    """
+    session = build_session(creds)
+    response = session.get(
+        api_url("sheets", f"v4/spreadsheets/{spreadsheet_id}/values/{quote(cell_range, safe='')}"),
+        stream=True,
+    )
+    try:
+        if response.status_code >= 400:
+            raise HttpError(
+                httplib2.Response({"status": str(response.status_code)}),
+                response.content,
+                uri=response.url,
+            )
+
+        for path, value in iter_values(
+            response.iter_content(chunk_size),
+            _STREAM_PATHS,
+            arrays=_STREAM_ARRAYS,
+        ):
+            yield ("row" if path == _ROW_PATH else path[0]), value
+    finally:
+        response.close()
 
 
 def _parse_plain_data(data):
@@ -44,14 +115,35 @@ def _parse_plain_data(data):
 def parse_input_data(data):
     stripped_data = data.strip()
     if stripped_data.startswith("["):
-        parsed = json.loads(stripped_data)
-        if not isinstance(parsed, list):
-            raise ValueError("JSON data must be a list or list of lists.")
-        if parsed and not isinstance(parsed[0], list):
-            return [parsed]
-        return parsed
+        return Grid.from_json(stripped_data)
+
+    return Grid(_parse_plain_data(data))
+
+
+def parse_input_file(input_file):
+    """Reads a Grid from an open JSON or CSV file, telling them apart by the
+    first character: JSON data is a list, so it starts with ``[``."""
+    head = input_file.readline()
+    while head and not head.strip():
+        head = input_file.readline()
+    if head.lstrip().startswith("["):
+        return Grid.from_json(head + input_file.read())
+    if not head:
+        return Grid()
+    return Grid.from_csv(itertools.chain([head], input_file))
+
 
-    return _parse_plain_data(data)
+def _as_grid(values):
+    return values if isinstance(values, Grid) else Grid(values)
+
+
+def _with_json(body, key, json_text):
+    """Returns ``body`` as JSON text with ``json_text`` added under ``key``.
+
+    The client library would build the body with json.dumps over nested
+    lists; sending the text built from the grid skips that copy.
+    """
+    return JsonText(json.dumps(body)[:-1] + f', "{key}": ' + json_text + "}")
 
 
 def write_values(
@@ -62,23 +154,106 @@ def write_values(
     major_dimension="ROWS",
     value_input_option="RAW",
 ):
-    service = build("sheets", "v4", credentials=creds)
+    service = build_service("sheets", "v4", creds)
     return service.spreadsheets().values().update(
         spreadsheetId=spreadsheet_id,
         range=cell_range,
         valueInputOption=value_input_option,
-        body={
-            "majorDimension": major_dimension,
-            "values": values,
-        },
+        body=_with_json(
+            {"majorDimension": major_dimension}, "values", _as_grid(values).to_json()
+        ),
     ).execute()
 
 
+def _range_start(cell_range):
+    """Returns the sheet, column number and row number ``cell_range`` starts at."""
+    sheet, _, cells = cell_range.rpartition("!")
+    match = _RANGE_START.match(cells)
+    if match is None:
+        # A bare sheet name.
+        sheet, match = cells, _RANGE_START.match("")
+    column = 0
+    for letter in (match.group(1) or "A").upper():
+        column = column * 26 + ord(letter) - ord("A") + 1
+    return sheet, column, int(match.group(2) or 1)
+
+
+def _a1(sheet, column, row):
+    letters = ""
+    while column:
+        column, remainder = divmod(column - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return f"{sheet}!{letters}{row}" if sheet else f"{letters}{row}"
+
+
+def write_changed_values(
+    creds,
+    spreadsheet_id,
+    cell_range,
+    values,
+    value_input_option="RAW",
+):
+    """Writes only the rows of ``values`` that differ from the sheet.
+
+    The range is read once with its stored values (formulas rather than
+    their results) and compared row by row; each run of changed rows goes
+    out as one range of a single values.batchUpdate call. Returns the
+    batchUpdate response, plus ``changedRows`` and ``unchangedRows``.
+    """
+    sheet, column, row = _range_start(cell_range)
+    # Read exactly the cells the new values cover; the range may name only
+    # the first one.
+    end = _a1("", column + max(values.width, 1) - 1, row + max(len(values), 1) - 1)
+    current = read_values(
+        creds,
+        spreadsheet_id,
+        f"{_a1(sheet, column, row)}:{end}",
+        value_render_option="FORMULA",
+    )
+    blocks = list(values.changed_rows(current["values"]))
+    changed = sum(stop - start for start, stop in blocks)
+    result = {"changedRows": changed, "unchangedRows": len(values) - changed}
+    if not blocks:
+        return {**result, "totalUpdatedCells": 0, "responses": []}
+
+    data = ",".join(
+        _with_json(
+            {"range": _a1(sheet, column, row + start), "majorDimension": "ROWS"},
+            "values",
+            values.to_json(start, stop),
+        )
+        for start, stop in blocks
+    )
+    service = build_service("sheets", "v4", creds)
+    response = service.spreadsheets().values().batchUpdate(
+        spreadsheetId=spreadsheet_id,
+        body=_with_json({"valueInputOption": value_input_option}, "data", f"[{data}]"),
+    ).execute()
+    return {**result, **response}
+
+
 def clear_values(creds, spreadsheet_id, cell_range):
-    service = build("sheets", "v4", credentials=creds)
+    service = build_service("sheets", "v4", creds)
     return service.spreadsheets().values().clear(
         spreadsheetId=spreadsheet_id,
         range=cell_range,
         body={},
     ).execute()
 
+
+def append_values(
+    creds,
+    spreadsheet_id,
+    cell_range,
+    values,
+    value_input_option="RAW",
+    num_retries=0,
+):
+    service = build_service("sheets", "v4", creds)
+    return service.spreadsheets().values().append(
+        spreadsheetId=spreadsheet_id,
+        range=cell_range,
+        valueInputOption=value_input_option,
+        insertDataOption="INSERT_ROWS",
+        body=_with_json({"majorDimension": "ROWS"}, "values", _as_grid(values).to_json()),
+    ).execute(num_retries=num_retries)
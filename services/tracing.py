@@ -0,0 +1,28 @@
+import json
+import os
+import sys
+import threading
+import time
+
+
+_enabled = os.environ.get("GSUITE_CLI_TRACE", "").strip().lower() not in {"", "0", "false", "no"}
+_lock = threading.Lock()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def is_enabled():
+    return _enabled
+
+
+def trace(event, **fields):
+    """Writes one JSON line describing ``event`` to stderr when tracing is on."""
+    if not _enabled:
+        return
+    line = json.dumps({"time": round(time.time(), 3), "event": event, **fields})
+    with _lock:
+        sys.stderr.write(line + "\n")
+        sys.stderr.flush()